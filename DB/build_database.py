@@ -28,7 +28,11 @@ except ImportError as e:
 from DB.populator import DatabasePopulator
 from DB.utils.chunker import DocumentChunker
 from DB.utils.embeddings import EmbeddingGenerator
+from DB.utils.build_pipeline import BuildPipeline, BuildStage
+from DB.utils.change_log import database_id
 from KG.graph_builder import GraphBuilder
+from KG.graph_columns import GraphColumns
+from KG.graph_diff import diff_graphs, diff_delta, write_delta
 
 
 def create_database_schema(db_path: str):
@@ -227,6 +231,13 @@ def create_database_schema(db_path: str):
                 
                 columns.append(col_def)
             
+            # Add constraints
+            constraints = table_config.get('constraints', {})
+            for constraint_name, constraint_config in constraints.items():
+                if constraint_config['type'] == 'UNIQUE':
+                    constraint_cols = ', '.join(constraint_config['columns'])
+                    columns.append(f"UNIQUE({constraint_cols})")
+            
             columns_str = ',\n    '.join(columns)
             create_sql = f"CREATE TABLE IF NOT EXISTS {table_name} (\n    {columns_str}\n)"
             cursor.execute(create_sql)
@@ -241,6 +252,9 @@ def create_database_schema(db_path: str):
             cursor.execute(create_index_sql)
             print(f"  ✓ Created index: {index_name}")
         
+        # Exported graphs remember it, so they are not patched from another database
+        database_id(cursor, create=True)
+        
         conn.commit()
         print("✓ Database schema created successfully")
         
@@ -252,21 +266,12 @@ def create_database_schema(db_path: str):
         conn.close()
 
 
-def build_database(db_path: str, skip_embeddings: bool = False, skip_graph: bool = False, 
-                  skip_deduplication: bool = False):
-    """Build complete database using blueprint-driven components"""
-    
+def populate_stage(db_path: str) -> dict:
+    """Import metadata for all document types (blueprint-driven)"""
     blueprint_loader = get_blueprint_loader()
     
-    print("\n" + "="*60)
-    print("BLUEPRINT-DRIVEN DATABASE BUILD")
-    print("="*60)
-    
-    # Step 1: Populate from metadata using blueprints
-    print("\nStep 1: Importing metadata (blueprint-driven)")
-    print("-" * 50)
-    
-    populator = DatabasePopulator(db_path)
+    # Fresh database: stage relationships in memory and bulk-load them once
+    populator = DatabasePopulator(db_path, bulk_load=True)
     
     # Process all document types found in blueprints
     total_docs = 0
@@ -283,11 +288,17 @@ def build_database(db_path: str, skip_embeddings: bool = False, skip_graph: bool
             total_docs += len(doc_ids)
             print(f"✓ Imported {len(doc_ids)} {doc_type} documents")
     
+    relationship_count = populator.flush_relationships()
+    
     print(f"\n✓ Total documents imported: {total_docs}")
+    print(f"✓ Bulk-loaded {relationship_count} relationships")
     
-    # Step 2: Create document chunks
-    print("\nStep 2: Creating document chunks")
-    print("-" * 40)
+    return {'documents': total_docs, 'relationships': relationship_count}
+
+
+def chunk_stage(db_path: str) -> dict:
+    """Create document chunks and map entities to them"""
+    blueprint_loader = get_blueprint_loader()
     
     # Use smaller chunk size for personal notes which tend to be shorter
     chunker = DocumentChunker(chunk_size=800, chunk_overlap=150, min_chunk_size=300)
@@ -325,89 +336,126 @@ def build_database(db_path: str, skip_embeddings: bool = False, skip_graph: bool
     print(f"✓ Total entity-chunk mappings: {total_mappings}")
     conn.close()
     
-    # Step 3: Generate embeddings
-    if not skip_embeddings:
-        print("\nStep 3: Generating embeddings")
-        print("-" * 40)
-        
+    return {'chunks': total_chunks, 'mappings': total_mappings}
+
+
+def embedding_stage(db_path: str, kind: str) -> dict:
+    """Generate embeddings of one kind ('documents', 'chunks' or 'entities').
+    
+    Existing embeddings are skipped, so a resumed stage continues where it stopped.
+    """
+    embedder = EmbeddingGenerator(db_path)
+    generate = {
+        'documents': embedder.generate_document_embeddings,
+        'chunks': embedder.generate_chunk_embeddings,
+        'entities': embedder.generate_entity_embeddings
+    }[kind]
+    
+    count = generate()
+    print(f"✓ Generated {count} {kind[:-1]} embeddings")
+    return {'embeddings': count}
+
+
+def deduplication_stage(db_path: str) -> dict:
+    """Merge duplicate entities in-process"""
+    from agents.entity_deduplicator import EntityDeduplicator
+    
+    deduplicator = EntityDeduplicator(db_path=db_path)
+    stats = deduplicator.deduplicate_all(dry_run=False, parallel_workers=20)
+    
+    print(f"✓ Entity deduplication completed ({stats['merged']} duplicates merged, "
+          f"{stats['pairs_checked']} pairs checked, {stats['llm_calls']} LLM calls)")
+    return stats
+
+
+def graph_stage(db_path: str) -> dict:
+    """Export the blueprint-driven knowledge graph, with a delta against the previous export"""
+    graph_path = Path("KG/knowledge_graph.json")
+    previous = None
+    if graph_path.exists():
         try:
-            embedder = EmbeddingGenerator(db_path)
-            
-            doc_count = embedder.generate_document_embeddings()
-            chunk_count = embedder.generate_chunk_embeddings()
-            entity_count = embedder.generate_entity_embeddings()
-            
-            print(f"✓ Generated {doc_count + chunk_count + entity_count} embeddings")
-            print(f"  - Documents: {doc_count}")
-            print(f"  - Chunks: {chunk_count}")
-            print(f"  - Entities: {entity_count}")
-            
-        except Exception as e:
-            print(f"⚠️  Warning: Could not generate embeddings: {e}")
-            print("   Make sure OPENAI_API_KEY is set in your .env file")
+            previous = GraphColumns.from_file(str(graph_path))
+        except ValueError as e:  # Unreadable previous export: nothing to compare against
+            print(f"⚠️  Could not read previous graph for comparison: {e}")
+    
+    graph_builder = GraphBuilder(db_path)
+    graph_data = graph_builder.export_graph(str(graph_path), compact=True, compress='gzip',
+                                            layout=True, communities=True, metrics=True, snapshot=True)
+    
+    print(f"✓ Generated knowledge graph:")
+    print(f"  - Nodes: {graph_data['metadata']['total_nodes']}")
+    print(f"  - Edges: {graph_data['metadata']['total_edges']}")
+    print(f"  - Node types: {len(graph_data['metadata']['node_types'])}")
+    print(f"  - Clusters: {len(graph_data['metadata']['communities']['clusters'])}")
+    
+    if previous is not None:
+        current = GraphColumns.from_file(str(graph_path))
+        diff = diff_graphs(previous, current)
+        write_delta(diff_delta(previous, current, diff), "KG/knowledge_graph.delta.json")
+        print(f"  - Changes since previous graph: "
+              f"+{len(diff['added_nodes'])}/-{len(diff['removed_nodes'])}/~{len(diff['changed_nodes'])} nodes, "
+              f"+{len(diff['added_links'])}/-{len(diff['removed_links'])}/~{len(diff['changed_links'])} links "
+              f"(KG/knowledge_graph.delta.json)")
+    
+    return {
+        'nodes': graph_data['metadata']['total_nodes'],
+        'edges': graph_data['metadata']['total_edges']
+    }
+
+
+def build_stages(db_path: str, skip_embeddings: bool = False, skip_graph: bool = False,
+                 skip_deduplication: bool = False) -> list:
+    """Declare the build as a stage graph.
+    
+    Chunk and document embeddings only feed search, so they run alongside
+    deduplication and the graph export instead of blocking them.
+    """
+    stages = [
+        BuildStage('populate', lambda: populate_stage(db_path),
+                   description="Importing metadata (blueprint-driven)"),
+        BuildStage('chunk', lambda: chunk_stage(db_path), depends_on=['populate'],
+                   description="Creating document chunks")
+    ]
+    
+    if not skip_embeddings:
+        stages += [
+            BuildStage('embed_entities', lambda: embedding_stage(db_path, 'entities'),
+                       depends_on=['populate'], optional=True,
+                       description="Generating entity embeddings"),
+            BuildStage('embed_documents', lambda: embedding_stage(db_path, 'documents'),
+                       depends_on=['populate'], optional=True,
+                       description="Generating document embeddings"),
+            BuildStage('embed_chunks', lambda: embedding_stage(db_path, 'chunks'),
+                       depends_on=['chunk'], optional=True,
+                       description="Generating chunk embeddings")
+        ]
     
-    # Step 4: Entity deduplication
     if not skip_deduplication:
-        print("\nStep 4: Entity deduplication")
-        print("-" * 40)
-        print("  Ensuring entity embeddings are generated...")
-        print("  Running deduplication with blueprint-driven entities...")
-        
-        try:
-            import subprocess
-            result = subprocess.run([
-                sys.executable, "../agents/entity_deduplicator.py", 
-                "--db", "metadata.db",  # Specify correct path when running from DB dir
-                "--parallel-workers", "20", "--merge"
-            ], cwd="DB", capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print("✓ Entity deduplication completed")
-                # Show summary from stdout
-                if result.stdout:
-                    lines = result.stdout.strip().split('\n')
-                    for line in lines[-5:]:
-                        if line.strip():
-                            print(f"  {line}")
-            else:
-                print("⚠️  Deduplication encountered issues")
-                print(f"  Return code: {result.returncode}")
-                
-                # Show detailed error information
-                if result.stderr:
-                    print("\n  Error details:")
-                    print("-" * 40)
-                    # Show full stderr output
-                    for line in result.stderr.strip().split('\n'):
-                        print(f"  {line}")
-                    print("-" * 40)
-                
-                # Also show any stdout that might contain error info
-                if result.stdout:
-                    print("\n  Output before error:")
-                    print("-" * 40)
-                    for line in result.stdout.strip().split('\n')[-10:]:
-                        print(f"  {line}")
-                    print("-" * 40)
-        except Exception as e:
-            print(f"⚠️  Could not run deduplication: {e}")
-    
-    # Step 5: Generate knowledge graph
+        stages.append(BuildStage('deduplicate', lambda: deduplication_stage(db_path),
+                                 depends_on=['chunk', 'embed_entities'], optional=True,
+                                 description="Entity deduplication"))
+    
     if not skip_graph:
-        print("\nStep 5: Generating blueprint-driven knowledge graph")
-        print("-" * 50)
-        
-        try:
-            graph_builder = GraphBuilder(db_path)
-            graph_data = graph_builder.export_graph("KG/knowledge_graph.json")
-            
-            print(f"✓ Generated knowledge graph:")
-            print(f"  - Nodes: {graph_data['metadata']['total_nodes']}")
-            print(f"  - Edges: {graph_data['metadata']['total_edges']}")
-            print(f"  - Node types: {len(graph_data['metadata']['node_types'])}")
-            
-        except Exception as e:
-            print(f"⚠️  Warning: Could not generate knowledge graph: {e}")
+        stages.append(BuildStage('graph', lambda: graph_stage(db_path),
+                                 depends_on=['populate', 'deduplicate'], optional=True,
+                                 description="Generating blueprint-driven knowledge graph"))
+    
+    return stages
+
+
+def build_database(db_path: str, skip_embeddings: bool = False, skip_graph: bool = False, 
+                  skip_deduplication: bool = False, resume: bool = False,
+                  max_parallel: int = 2) -> bool:
+    """Build complete database using blueprint-driven components"""
+    
+    print("\n" + "="*60)
+    print("BLUEPRINT-DRIVEN DATABASE BUILD")
+    print("="*60)
+    
+    stages = build_stages(db_path, skip_embeddings, skip_graph, skip_deduplication)
+    pipeline = BuildPipeline(db_path, stages, max_parallel=max_parallel)
+    
+    return pipeline.run(resume=resume)
 
 
 def print_database_stats(db_path: str):
@@ -465,6 +513,10 @@ def main():
                        help='Skip entity deduplication')
     parser.add_argument('--validate-blueprints', action='store_true',
                        help='Validate blueprint configurations before building')
+    parser.add_argument('--resume', action='store_true',
+                       help='Resume an interrupted build from its last completed stage')
+    parser.add_argument('--max-parallel', type=int, default=2,
+                       help='Maximum number of build stages to run concurrently')
     
     args = parser.parse_args()
     
@@ -485,21 +537,45 @@ def main():
     
     # Backup existing database if requested
     if args.backup and db_path.exists():
+        # Fold the write-ahead log into the main file so the copy is complete
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
         backup_path = db_path.parent / f"{args.db}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         shutil.copy2(db_path, backup_path)
         print(f"✓ Backed up existing database to: {backup_path}")
     
-    # Remove old database
-    if db_path.exists():
-        db_path.unlink()
-        print(f"✓ Removed existing database: {db_path}")
+    resume = args.resume and db_path.exists()
+    if args.resume and not resume:
+        print(f"⚠️  No database to resume at {db_path}, starting a fresh build")
+    
+    if resume:
+        print(f"✓ Resuming build in existing database: {db_path}")
+    else:
+        # Remove old database
+        if db_path.exists():
+            db_path.unlink()
+            print(f"✓ Removed existing database: {db_path}")
+        
+        # A stale write-ahead log must not be replayed into the new database
+        for suffix in ('-wal', '-shm'):
+            sidecar = Path(f"{db_path}{suffix}")
+            if sidecar.exists():
+                sidecar.unlink()
+        
+        print(f"✓ Creating new database: {db_path}")
     
-    # Create database with blueprint-driven schema
-    print(f"✓ Creating new database: {db_path}")
+    # Create database with blueprint-driven schema (no-op for existing tables)
     create_database_schema(str(db_path))
     
     # Build database using blueprint system
-    build_database(str(db_path), args.skip_embeddings, args.skip_graph, args.no_deduplication)
+    completed = build_database(str(db_path), args.skip_embeddings, args.skip_graph,
+                               args.no_deduplication, resume=resume,
+                               max_parallel=args.max_parallel)
+    
+    if not completed:
+        print_database_stats(str(db_path))
+        return 1
     
     # Print statistics
     print_database_stats(str(db_path))
@@ -516,7 +592,8 @@ def main():
     print("- Database schema generated from core/database_schema.yaml")
     print("- Entity mappings defined in academic/personal blueprints")
     print("- Visualization rules in core/visualization.yaml")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
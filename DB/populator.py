@@ -8,7 +8,12 @@ import json
 import sqlite3
 import sys
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+# Add project root and blueprints to path for imports
+project_root_path = Path(__file__).parent.parent
+if str(project_root_path) not in sys.path:
+    sys.path.append(str(project_root_path))
 
 # Add blueprints to path (robust path resolution)
 blueprint_core_path = Path(__file__).parent.parent / "blueprints" / "core"
@@ -23,13 +28,41 @@ except ImportError as e:
     print(f"Path exists: {blueprint_core_path.exists()}")
     raise
 
+from DB.utils.manifest import record_ingest
+from DB.utils.change_log import log_graph_changes, ensure_change_log, NODE, EDGES
+
 
 class DatabasePopulator:
     """Populates database from extracted metadata JSON files using blueprint configurations"""
     
-    def __init__(self, db_path: str = "DB/metadata.db"):
+    # Attribute columns each entity table fills on insert / merges on conflict
+    ENTITY_ATTRIBUTE_COLUMNS = {
+        'topics': ('category', 'description'),
+        'people': ('role', 'affiliation'),
+        'methods': ('category', 'description'),
+        'applications': ('domain', 'description'),
+        'institutions': ('type', 'location'),
+        'projects': ('description', 'start_date', 'end_date'),
+    }
+    
+    # Relationship/graph entity type of each entity table
+    ENTITY_TYPES = {
+        'topics': 'topic',
+        'people': 'person',
+        'methods': 'method',
+        'applications': 'application',
+        'institutions': 'institution',
+        'projects': 'project',
+    }
+    
+    def __init__(self, db_path: str = "DB/metadata.db", bulk_load: bool = False):
         self.db_path = db_path
         self.blueprint_loader = get_blueprint_loader()
+        # Per-run entity cache: table -> name -> (id, non-null attribute columns)
+        self._entity_cache: Optional[Dict[str, Dict[str, Tuple[int, frozenset]]]] = None
+        # Bulk-load mode stages relationships in memory until flush_relationships()
+        self.bulk_load = bulk_load
+        self._pending_relationships: Dict[str, Dict[Tuple[str, str, str, str, str], float]] = {}
         self._ensure_database()
     
     def _ensure_database(self):
@@ -51,6 +84,8 @@ class DatabasePopulator:
         
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        doc_unified_id = None
+        staged_relationships = None
         
         try:
             cursor.execute("BEGIN TRANSACTION")
@@ -71,6 +106,8 @@ class DatabasePopulator:
             # Read actual content if available
             content = ""
             content_source = document_mapping.get('content_source')
+            # File the content is read from, tracked in the ingest manifest
+            content_path = self.get_content_path(json_path, metadata, doc_type)
             
             # For academic documents, try to find the analysis file
             if doc_type == 'academic':
@@ -127,11 +164,17 @@ class DatabasePopulator:
             # Format document ID for relationships
             doc_unified_id = f"{id_prefix}_{doc_id}"
             
+            # The document node and all of its edges are rewritten below
+            ensure_change_log(cursor)
+            log_graph_changes(cursor, NODE, 'document', [doc_unified_id])
+            log_graph_changes(cursor, EDGES, 'document', [doc_unified_id])
+            
             # Clear existing relationships for this document
             cursor.execute("""
                 DELETE FROM relationships 
                 WHERE source_type = 'document' AND source_id = ?
             """, (doc_unified_id,))
+            staged_relationships = self._pending_relationships.pop(doc_unified_id, None)
             
             # Process entities using blueprint mappings
             stats = {}
@@ -168,6 +211,9 @@ class DatabasePopulator:
                 'success'
             ))
             
+            # Record file signatures for change detection by update_database.py
+            record_ingest(cursor, json_path, doc_type, doc_id, content_path)
+            
             conn.commit()
             
             # Print summary
@@ -179,11 +225,36 @@ class DatabasePopulator:
             
         except Exception as e:
             conn.rollback()
+            # Cached ids may refer to rows that were just rolled back
+            self.reset_entity_cache()
+            if self.bulk_load:
+                self._pending_relationships.pop(doc_unified_id, None)
+                if staged_relationships is not None:
+                    self._pending_relationships[doc_unified_id] = staged_relationships
             print(f"  ✗ Error: {e}")
             raise e
         finally:
             conn.close()
     
+    def get_content_path(self, json_path: Path, metadata: Dict[str, Any], doc_type: str) -> Optional[Path]:
+        """Resolve the file a document's content is loaded from, if it comes from a file"""
+        
+        if doc_type == 'academic':
+            base_name = json_path.stem.replace('_metadata', '')
+            return json_path.parent.parent / 'generated_analyses' / f'{base_name}.md'
+        
+        document_mapping = self.blueprint_loader.get_document_mapping(doc_type)
+        content_source = document_mapping.get('content_source')
+        content_value = metadata.get(content_source) if content_source else None
+        
+        if content_source == 'file_path' and isinstance(content_value, str):
+            source_path = Path(__file__).parent.parent / content_value
+            if not source_path.exists():
+                source_path = Path(content_value)
+            return source_path
+        
+        return None
+    
     def _update_document(self, cursor: sqlite3.Cursor, table: str, doc_id: int, 
                         metadata: Dict[str, Any], document_mapping: Dict[str, Any], content: str):
         """Update existing document using blueprint field mappings"""
@@ -205,8 +276,8 @@ class DatabasePopulator:
                 values.append(metadata[metadata_field])
         
         # Always update content and modified timestamp
-        set_clauses.extend(["content = ?", "modified_at = CURRENT_TIMESTAMP"])
-        values.extend([content, doc_id])
+        set_clauses.extend(["content = ?", "content_hash = ?", "modified_at = CURRENT_TIMESTAMP"])
+        values.extend([content, str(hash(content)), doc_id])
         
         update_query = f"""
             UPDATE {table} 
@@ -358,104 +429,178 @@ class DatabasePopulator:
         
         return entity_data
     
-    def _insert_entity(self, cursor: sqlite3.Cursor, table: str, name: str, 
-                      entity_data: Dict[str, Any], mapping) -> Optional[int]:
-        """Insert entity into appropriate table with conflict handling"""
+    def _entity_upsert_statement(self, table: str, name: str,
+                                 entity_data: Dict[str, Any]) -> Tuple[str, Dict[str, Any], Tuple[str, ...]]:
+        """Build the upsert for an entity table.
         
-        try:
-            if table == 'topics':
-                if 'category' in entity_data and 'description' in entity_data:
-                    cursor.execute("""
-                        INSERT INTO topics (name, category, description) 
-                        VALUES (?, ?, ?)
-                        ON CONFLICT(name) DO UPDATE SET
-                            category = COALESCE(category, excluded.category),
-                            description = COALESCE(description, excluded.description)
-                    """, (name, entity_data['category'], entity_data['description']))
-                elif 'category' in entity_data:
-                    cursor.execute("""
-                        INSERT INTO topics (name, category) 
-                        VALUES (?, ?)
-                        ON CONFLICT(name) DO UPDATE SET
-                            category = COALESCE(category, excluded.category)
-                    """, (name, entity_data['category']))
-                else:
-                    cursor.execute("INSERT OR IGNORE INTO topics (name) VALUES (?)", (name,))
-            
-            elif table == 'people':
-                role = entity_data.get('role')
-                affiliation = entity_data.get('affiliation')
-                cursor.execute("""
-                    INSERT INTO people (name, role, affiliation) 
-                    VALUES (?, ?, ?)
-                    ON CONFLICT(name) DO UPDATE SET
-                        role = COALESCE(role, excluded.role),
-                        affiliation = COALESCE(affiliation, excluded.affiliation)
-                """, (name, role, affiliation))
-            
-            elif table == 'methods':
-                category = entity_data.get('category')
-                description = entity_data.get('description')
-                cursor.execute("""
-                    INSERT INTO methods (name, category, description) 
+        Returns the SQL, the column values it inserts and the columns it merges
+        (via COALESCE) when the name already exists.
+        """
+        
+        if table == 'topics':
+            if 'category' in entity_data and 'description' in entity_data:
+                return """
+                    INSERT INTO topics (name, category, description) 
                     VALUES (?, ?, ?)
                     ON CONFLICT(name) DO UPDATE SET
                         category = COALESCE(category, excluded.category),
                         description = COALESCE(description, excluded.description)
-                """, (name, category, description))
-            
-            elif table == 'applications':
-                domain = entity_data.get('domain')
-                description = entity_data.get('description')
-                cursor.execute("""
-                    INSERT INTO applications (name, domain, description) 
-                    VALUES (?, ?, ?)
-                    ON CONFLICT(name) DO UPDATE SET
-                        domain = COALESCE(domain, excluded.domain),
-                        description = COALESCE(description, excluded.description)
-                """, (name, domain, description))
-            
-            elif table == 'institutions':
-                inst_type = entity_data.get('type')
-                location = entity_data.get('location')
-                cursor.execute("""
-                    INSERT INTO institutions (name, type, location) 
-                    VALUES (?, ?, ?)
-                    ON CONFLICT(name) DO UPDATE SET
-                        type = COALESCE(type, excluded.type),
-                        location = COALESCE(location, excluded.location)
-                """, (name, inst_type, location))
-            
-            elif table == 'projects':
-                description = entity_data.get('description')
-                start_date = entity_data.get('start_date')
-                end_date = entity_data.get('end_date')
-                cursor.execute("""
-                    INSERT INTO projects (name, description, start_date, end_date) 
-                    VALUES (?, ?, ?, ?)
+                    RETURNING id
+                """, {'category': entity_data['category'], 'description': entity_data['description']}, \
+                    ('category', 'description')
+            elif 'category' in entity_data:
+                return """
+                    INSERT INTO topics (name, category) 
+                    VALUES (?, ?)
                     ON CONFLICT(name) DO UPDATE SET
-                        description = COALESCE(description, excluded.description),
-                        start_date = COALESCE(start_date, excluded.start_date),
-                        end_date = COALESCE(end_date, excluded.end_date)
-                """, (name, description, start_date, end_date))
-            
+                        category = COALESCE(category, excluded.category)
+                    RETURNING id
+                """, {'category': entity_data['category']}, ('category',)
             else:
-                # Generic table
-                cursor.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
-            
-            # Get entity ID
-            cursor.execute(f"SELECT id FROM {table} WHERE name = ?", (name,))
-            result = cursor.fetchone()
-            return result[0] if result else None
+                return "INSERT OR IGNORE INTO topics (name) VALUES (?) RETURNING id", {}, ()
+        
+        elif table == 'people':
+            return """
+                INSERT INTO people (name, role, affiliation) 
+                VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    role = COALESCE(role, excluded.role),
+                    affiliation = COALESCE(affiliation, excluded.affiliation)
+                RETURNING id
+            """, {'role': entity_data.get('role'), 'affiliation': entity_data.get('affiliation')}, \
+                ('role', 'affiliation')
+        
+        elif table == 'methods':
+            return """
+                INSERT INTO methods (name, category, description) 
+                VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    category = COALESCE(category, excluded.category),
+                    description = COALESCE(description, excluded.description)
+                RETURNING id
+            """, {'category': entity_data.get('category'), 'description': entity_data.get('description')}, \
+                ('category', 'description')
+        
+        elif table == 'applications':
+            return """
+                INSERT INTO applications (name, domain, description) 
+                VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    domain = COALESCE(domain, excluded.domain),
+                    description = COALESCE(description, excluded.description)
+                RETURNING id
+            """, {'domain': entity_data.get('domain'), 'description': entity_data.get('description')}, \
+                ('domain', 'description')
+        
+        elif table == 'institutions':
+            return """
+                INSERT INTO institutions (name, type, location) 
+                VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    type = COALESCE(type, excluded.type),
+                    location = COALESCE(location, excluded.location)
+                RETURNING id
+            """, {'type': entity_data.get('type'), 'location': entity_data.get('location')}, \
+                ('type', 'location')
+        
+        elif table == 'projects':
+            return """
+                INSERT INTO projects (name, description, start_date, end_date) 
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    description = COALESCE(description, excluded.description),
+                    start_date = COALESCE(start_date, excluded.start_date),
+                    end_date = COALESCE(end_date, excluded.end_date)
+                RETURNING id
+            """, {'description': entity_data.get('description'), 'start_date': entity_data.get('start_date'),
+                  'end_date': entity_data.get('end_date')}, ('description', 'start_date', 'end_date')
+        
+        # Generic table
+        return f"INSERT OR IGNORE INTO {table} (name) VALUES (?) RETURNING id", {}, ()
+    
+    def _insert_entity(self, cursor: sqlite3.Cursor, table: str, name: str, 
+                      entity_data: Dict[str, Any], mapping) -> Optional[int]:
+        """Insert entity into appropriate table with conflict handling"""
+        
+        try:
+            sql, values, merged = self._entity_upsert_statement(table, name, entity_data)
+            return self._upsert_entity(cursor, table, name, sql, values, merged)
             
         except Exception as e:
             print(f"Error inserting entity {name} into {table}: {e}")
             return None
     
+    def _get_entity_cache(self, cursor: sqlite3.Cursor, table: str) -> Dict[str, Tuple[int, frozenset]]:
+        """Get the name -> (id, non-null attribute columns) cache for an entity table.
+        
+        Each table is warmed with a single SELECT the first time it is used in a run.
+        """
+        
+        if self._entity_cache is None:
+            self._entity_cache = {}
+        
+        if table not in self._entity_cache:
+            columns = self.ENTITY_ATTRIBUTE_COLUMNS.get(table, ())
+            cursor.execute(f"SELECT id, name{''.join(', ' + col for col in columns)} FROM {table}")
+            self._entity_cache[table] = {
+                row[1]: (row[0], frozenset(col for col, val in zip(columns, row[2:]) if val is not None))
+                for row in cursor.fetchall()
+            }
+        
+        return self._entity_cache[table]
+    
+    def _upsert_entity(self, cursor: sqlite3.Cursor, table: str, name: str, sql: str,
+                       values: Dict[str, Any], merged: Tuple[str, ...]) -> Optional[int]:
+        """Resolve an entity id through the cache, only writing when the row would change.
+        
+        A cached entity is skipped when every column the upsert would merge is already
+        set (COALESCE keeps the existing value) or has no new value to contribute.
+        """
+        
+        cache = self._get_entity_cache(cursor, table)
+        cached = cache.get(name)
+        
+        if cached and all(col in cached[1] or values[col] is None for col in merged):
+            return cached[0]
+        
+        cursor.execute(sql, (name, *values.values()))
+        result = cursor.fetchone()
+        written = result is not None
+        
+        if result:
+            entity_id = result[0]
+            if cached:
+                filled = cached[1] | {col for col in merged if values[col] is not None}
+            else:
+                filled = frozenset(col for col, val in values.items() if val is not None)
+        else:
+            # Ignored insert of a row we have not cached (e.g. written by another process)
+            cursor.execute(f"SELECT id FROM {table} WHERE name = ?", (name,))
+            result = cursor.fetchone()
+            if not result:
+                return None
+            entity_id = result[0]
+            filled = frozenset()
+        
+        cache[name] = (entity_id, filled)
+        if written and table in self.ENTITY_TYPES:
+            log_graph_changes(cursor, NODE, self.ENTITY_TYPES[table], [entity_id])
+        return entity_id
+    
+    def reset_entity_cache(self):
+        """Drop cached entity ids so they are re-read from the database on next use"""
+        self._entity_cache = None
+    
     def _create_relationship(self, cursor: sqlite3.Cursor, source_id: str, target_type: str, 
                            target_id: int, relationship_type: str, confidence: float):
         """Create relationship between document and entity"""
         
+        if self.bulk_load:
+            # First write wins, matching INSERT OR IGNORE
+            key = ('document', source_id, target_type, str(target_id), relationship_type)
+            self._pending_relationships.setdefault(source_id, {}).setdefault(key, confidence)
+            return
+        
         cursor.execute("""
             INSERT OR IGNORE INTO relationships 
             (source_type, source_id, target_type, target_id, relationship_type, confidence)
@@ -471,29 +616,81 @@ class DatabasePopulator:
         if 'authors' in metadata and isinstance(metadata['authors'], list):
             for author in metadata['authors']:
                 if author and isinstance(author, str):
-                    cursor.execute("""
+                    person_id = self._upsert_entity(cursor, 'people', author, """
                         INSERT OR IGNORE INTO people (name, role)
                         VALUES (?, ?)
-                    """, (author, 'author'))
+                        RETURNING id
+                    """, {'role': 'author'}, ())
                     
-                    cursor.execute("SELECT id FROM people WHERE name = ?", (author,))
-                    result = cursor.fetchone()
-                    if result:
-                        person_id = result[0]
+                    if person_id:
                         confidence = confidence_scores.get('authored_by', 1.0)
-                        cursor.execute("""
-                            INSERT OR IGNORE INTO relationships
-                            (source_type, source_id, target_type, target_id, relationship_type, confidence)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        """, ('document', doc_unified_id, 'person', str(person_id), 'authored_by', confidence))
+                        self._create_relationship(cursor, doc_unified_id, 'person', person_id,
+                                                'authored_by', confidence)
                         stats['authors'] = stats.get('authors', 0) + 1
     
+    def flush_relationships(self) -> int:
+        """Write relationships staged in bulk-load mode in a single pass.
+        
+        Secondary indexes on the relationships table are dropped for the load and
+        rebuilt afterwards; edges are already de-duplicated in memory.
+        
+        Returns:
+            Number of relationships written
+        """
+        
+        rows = [
+            (*key, confidence)
+            for doc_relationships in self._pending_relationships.values()
+            for key, confidence in doc_relationships.items()
+        ]
+        if not rows:
+            return 0
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("BEGIN TRANSACTION")
+            
+            # Defer index maintenance until after the load
+            cursor.execute("""
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'index' AND tbl_name = 'relationships' AND sql IS NOT NULL
+            """)
+            indexes = cursor.fetchall()
+            for index_name, _ in indexes:
+                cursor.execute(f"DROP INDEX {index_name}")
+            
+            cursor.executemany("""
+                INSERT OR IGNORE INTO relationships 
+                (source_type, source_id, target_type, target_id, relationship_type, confidence)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, rows)
+            written = cursor.rowcount
+            
+            for _, index_sql in indexes:
+                cursor.execute(index_sql)
+            
+            conn.commit()
+            self._pending_relationships.clear()
+            return written
+            
+        except Exception as e:
+            conn.rollback()
+            print(f"  ✗ Error writing relationships: {e}")
+            raise e
+        finally:
+            conn.close()
+    
     def populate_directory(self, metadata_dir: Path, doc_type: str) -> List[int]:
         """Populate database from all JSON files in a directory"""
         
         json_files = list(metadata_dir.glob("*_metadata.json"))
         print(f"\nFound {len(json_files)} {doc_type} metadata files")
         
+        # Start each run from the current database state
+        self.reset_entity_cache()
+        
         processed_ids = []
         for json_file in json_files:
             print(f"\nProcessing {json_file.name}...")
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Incremental database updater
-Updates existing database with new documents and changes
+Updates existing database with new documents and changes, using the ingest
+manifest to detect new and modified metadata files without parsing them
 """
 
 import sqlite3
@@ -9,6 +10,7 @@ import sys
 from pathlib import Path
 import argparse
 import json
+from typing import Dict, List, Tuple
 
 # Add parent and blueprints to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
@@ -28,6 +30,9 @@ except ImportError as e:
 from DB.populator import DatabasePopulator
 from DB.utils.chunker import DocumentChunker
 from DB.utils.embeddings import EmbeddingGenerator
+from DB.utils.manifest import (
+    NEW, MODIFIED, TOUCHED, UNCHANGED, check_file, load_manifest, manifest_key, record_ingest
+)
 from KG.graph_builder import GraphBuilder
 
 
@@ -59,19 +64,120 @@ def check_embedding_model_version(db_path: str):
     
     # Check for old model embeddings
     cursor.execute("""
-        SELECT COUNT(*) FROM embeddings 
-        WHERE embedding_model = 'text-embedding-3-small'
-        OR embedding_model IS NULL
+        SELECT 1 FROM embeddings 
+        WHERE model_name = 'text-embedding-3-small'
+        LIMIT 1
     """)
-    old_count = cursor.fetchone()[0]
+    has_old = cursor.fetchone() is not None
     
     conn.close()
-    return old_count > 0
+    return has_old
+
+
+def scan_metadata_changes(db_path: str, blueprint_loader) -> Dict[str, List[Tuple[str, Path]]]:
+    """Classify every metadata file against the ingest manifest.
+    
+    Files are only stat()ed; they are hashed when their mtime or size changed and
+    never parsed here. Returns (doc_type, json_path) lists keyed by file state.
+    """
+    manifest = load_manifest(db_path)
+    changes = {NEW: [], MODIFIED: [], TOUCHED: [], UNCHANGED: []}
+    
+    for doc_type in blueprint_loader.list_document_types():
+        # Use absolute paths relative to project root
+        project_root = Path(__file__).parent.parent
+        metadata_dir = project_root / f"raw_data/{doc_type}/extracted_metadata"
+        if doc_type == 'personal':
+            metadata_dir = project_root / "raw_data/personal_notes/extracted_metadata"
+        
+        if metadata_dir.exists():
+            for json_file in sorted(metadata_dir.glob("*_metadata.json")):
+                state = check_file(json_file, manifest.get(manifest_key(json_file)))
+                changes[state].append((doc_type, json_file))
+    
+    return changes
+
+
+def adopt_untracked_documents(db_path: str, populator: DatabasePopulator,
+                              untracked: List[Tuple[str, Path]]) -> List[Tuple[str, Path]]:
+    """Record manifest baselines for files ingested before the manifest existed.
+    
+    Returns the files that are genuinely new and still need to be populated.
+    """
+    existing_docs = get_existing_documents(db_path)
+    new_files = []
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        for doc_type, json_file in untracked:
+            with open(json_file) as f:
+                metadata = json.load(f)
+            
+            # Get file path
+            file_path = metadata.get('file_path', str(json_file))
+            if len(file_path) > 255:  # Truncate if too long
+                file_path = str(json_file)
+            
+            if file_path in existing_docs:
+                _, doc_id = existing_docs[file_path]
+                record_ingest(cursor, json_file, doc_type, doc_id,
+                              populator.get_content_path(json_file, metadata, doc_type))
+            else:
+                new_files.append((doc_type, json_file))
+        
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return new_files
+
+
+def refresh_signatures(db_path: str, touched: List[Tuple[str, Path]]):
+    """Store new mtimes for files whose content hash is unchanged so they are not rehashed"""
+    manifest = load_manifest(db_path)
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        for doc_type, json_file in touched:
+            entry = manifest[manifest_key(json_file)]
+            source_path = Path(entry['source_path']) if entry['source_path'] else None
+            record_ingest(cursor, json_file, doc_type, entry['document_id'], source_path)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def clear_document_derivatives(db_path: str, db_doc_type: str, doc_id: int):
+    """Remove chunk mappings and embeddings derived from a document's previous content"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("""
+            DELETE FROM chunk_entities WHERE chunk_id IN (
+                SELECT id FROM document_chunks WHERE document_type = ? AND document_id = ?
+            )
+        """, (db_doc_type, doc_id))
+        cursor.execute("""
+            DELETE FROM embeddings WHERE entity_type = 'chunk' AND entity_id IN (
+                SELECT 'chunk_' || id FROM document_chunks WHERE document_type = ? AND document_id = ?
+            )
+        """, (db_doc_type, doc_id))
+        cursor.execute("""
+            DELETE FROM embeddings WHERE entity_type = 'document' AND entity_id = ?
+        """, (f"{db_doc_type}_{doc_id}",))
+        conn.commit()
+    finally:
+        conn.close()
 
 
 def update_database(db_path: str, skip_embeddings: bool = False, skip_graph: bool = False, 
                    skip_deduplication: bool = False):
-    """Update existing database with new documents and changes"""
+    """Update existing database with new and modified documents"""
     
     blueprint_loader = get_blueprint_loader()
     
@@ -79,91 +185,91 @@ def update_database(db_path: str, skip_embeddings: bool = False, skip_graph: boo
     print("INCREMENTAL DATABASE UPDATE")
     print("="*60)
     
-    # Step 1: Check for new documents
-    print("\nStep 1: Checking for new documents")
+    # Step 1: Check for new and modified documents
+    print("\nStep 1: Checking for new and modified documents")
     print("-" * 40)
     
-    existing_docs = get_existing_documents(db_path)
-    print(f"Found {len(existing_docs)} existing documents in database")
+    changes = scan_metadata_changes(db_path, blueprint_loader)
+    print(f"Scanned {sum(len(files) for files in changes.values())} metadata files: "
+          f"{len(changes[NEW])} untracked, {len(changes[MODIFIED])} modified, "
+          f"{len(changes[UNCHANGED]) + len(changes[TOUCHED])} unchanged")
     
     populator = DatabasePopulator(db_path)
     
-    # Process all document types found in blueprints
+    if changes[TOUCHED]:
+        refresh_signatures(db_path, changes[TOUCHED])
+    
+    new_files = []
+    if changes[NEW]:
+        new_files = adopt_untracked_documents(db_path, populator, changes[NEW])
+        adopted = len(changes[NEW]) - len(new_files)
+        if adopted:
+            print(f"Recorded manifest baseline for {adopted} previously imported documents")
+    
+    # Process new and modified files
     new_doc_count = 0
-    new_doc_ids = []
+    modified_doc_count = 0
+    changed_doc_ids = []
     
-    for doc_type in blueprint_loader.list_document_types():
-        # Use absolute paths relative to project root
-        project_root = Path(__file__).parent.parent
-        metadata_dir = project_root / f"raw_data/{doc_type}/extracted_metadata"
-        if doc_type == 'personal':
-            metadata_dir = project_root / "raw_data/personal_notes/extracted_metadata"
+    for state, files in (('new', new_files), ('modified', changes[MODIFIED])):
+        if files:
+            print(f"\nFound {len(files)} {state} documents")
+        for doc_type, json_file in files:
+            print(f"  Processing {json_file.name}...")
+            try:
+                doc_id = populator.populate_from_json(json_file, doc_type)
+                if doc_id:
+                    changed_doc_ids.append((doc_type, doc_id))
+                    if state == 'new':
+                        new_doc_count += 1
+                    else:
+                        modified_doc_count += 1
+            except Exception as e:
+                print(f"    Error processing {json_file}: {e}")
+    
+    print(f"\n✓ Added {new_doc_count} new documents, updated {modified_doc_count} modified documents")
+    
+    if not changed_doc_ids:
+        print("\n✓ Database is up to date")
+        return
+    
+    # Step 2: Update chunks for changed documents
+    print("\nStep 2: Creating chunks for changed documents")
+    print("-" * 40)
+    
+    chunker = DocumentChunker(chunk_size=800, chunk_overlap=150, min_chunk_size=300)
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    total_chunks = 0
+    total_mappings = 0
+    changed_chunk_ids = []
+    
+    for doc_type, doc_id in changed_doc_ids:
+        # Get document content
+        table = 'academic_documents' if doc_type == 'academic' else 'chronicle_documents'
+        cursor.execute(f"SELECT content FROM {table} WHERE id = ?", (doc_id,))
+        result = cursor.fetchone()
         
-        if metadata_dir.exists():
-            json_files = list(metadata_dir.glob("*_metadata.json"))
-            new_files = []
+        if result and result[0]:
+            content = result[0]
+            # Map doc_type to database document type
+            db_doc_type = 'chronicle' if doc_type == 'personal' else doc_type
             
-            # Check which files are new
-            for json_file in json_files:
-                # Check if this document already exists
-                with open(json_file) as f:
-                    metadata = json.load(f)
-                
-                # Get file path
-                file_path = metadata.get('file_path', str(json_file))
-                if len(file_path) > 255:  # Truncate if too long
-                    file_path = str(json_file)
-                
-                if file_path not in existing_docs:
-                    new_files.append(json_file)
+            # Drop mappings and embeddings of the previous chunks before re-chunking
+            clear_document_derivatives(db_path, db_doc_type, doc_id)
             
-            if new_files:
-                print(f"\nFound {len(new_files)} new {doc_type} documents")
-                for json_file in new_files:
-                    print(f"  Processing {json_file.name}...")
-                    try:
-                        doc_id = populator.populate_from_json(json_file, doc_type)
-                        if doc_id:
-                            new_doc_ids.append((doc_type, doc_id))
-                            new_doc_count += 1
-                    except Exception as e:
-                        print(f"    Error processing {json_file}: {e}")
-    
-    print(f"\n✓ Added {new_doc_count} new documents")
-    
-    # Step 2: Update chunks for new documents
-    if new_doc_ids:
-        print("\nStep 2: Creating chunks for new documents")
-        print("-" * 40)
-        
-        chunker = DocumentChunker(chunk_size=800, chunk_overlap=150, min_chunk_size=300)
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        total_chunks = 0
-        total_mappings = 0
-        
-        for doc_type, doc_id in new_doc_ids:
-            # Get document content
-            table = 'academic_documents' if doc_type == 'academic' else 'chronicle_documents'
-            cursor.execute(f"SELECT content FROM {table} WHERE id = ?", (doc_id,))
-            result = cursor.fetchone()
+            chunk_ids = chunker.chunk_and_store(db_path, doc_id, db_doc_type, content)
+            mappings = chunker.map_entities_to_chunks(db_path, doc_id, db_doc_type)
             
-            if result and result[0]:
-                content = result[0]
-                # Map doc_type to database document type
-                db_doc_type = 'chronicle' if doc_type == 'personal' else doc_type
-                
-                chunk_ids = chunker.chunk_and_store(db_path, doc_id, db_doc_type, content)
-                mappings = chunker.map_entities_to_chunks(db_path, doc_id, db_doc_type)
-                
-                total_chunks += len(chunk_ids)
-                total_mappings += mappings
-                print(f"  {doc_type} doc {doc_id}: {len(chunk_ids)} chunks, {mappings} mappings")
-        
-        print(f"✓ Created {total_chunks} new chunks with {total_mappings} entity mappings")
-        conn.close()
+            changed_chunk_ids.extend(chunk_ids)
+            total_chunks += len(chunk_ids)
+            total_mappings += mappings
+            print(f"  {doc_type} doc {doc_id}: {len(chunk_ids)} chunks, {mappings} mappings")
+    
+    print(f"✓ Created {total_chunks} chunks with {total_mappings} entity mappings")
+    conn.close()
     
     # Step 3: Check and update embeddings
     if not skip_embeddings:
@@ -181,86 +287,59 @@ def update_database(db_path: str, skip_embeddings: bool = False, skip_graph: boo
                 entity_count = embedder.generate_entity_embeddings()
                 print(f"✓ Regenerated all {doc_count + chunk_count + entity_count} embeddings")
             else:
-                # Just generate embeddings for new content
-                print("  Generating embeddings for new content...")
-                
-                # Generate embeddings for new documents
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
+                # Just generate embeddings for changed content
+                print("  Generating embeddings for changed content...")
                 
                 new_embeddings = 0
                 
-                # New document embeddings
-                for doc_type, doc_id in new_doc_ids:
-                    entity_id = f"{doc_type}_{doc_id}"
-                    
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM embeddings 
-                        WHERE entity_type = 'document' AND entity_id = ?
-                    """, (entity_id,))
-                    
-                    if cursor.fetchone()[0] == 0:
-                        # Generate embedding for this document
-                        text = embedder.prepare_document_text(doc_id, doc_type)
-                        if text:
-                            embedding = embedder.generate_embedding(text)
-                            embedder.store_embedding('document', entity_id, embedding)
-                            new_embeddings += 1
+                # Changed document embeddings (cleared in Step 2)
+                for doc_type, doc_id in changed_doc_ids:
+                    db_doc_type = 'chronicle' if doc_type == 'personal' else doc_type
+                    text = embedder.prepare_document_text(doc_id, db_doc_type)
+                    if text:
+                        embedding = embedder.generate_embedding(text)
+                        embedder.store_embedding('document', f"{db_doc_type}_{doc_id}", embedding)
+                        new_embeddings += 1
                 
-                # Generate chunk embeddings for new documents
-                chunk_count = embedder.generate_chunk_embeddings()
+                # Chunk embeddings for the re-chunked documents only
+                for chunk_id in changed_chunk_ids:
+                    text = embedder.prepare_chunk_text(chunk_id)
+                    if text:
+                        embedding = embedder.generate_embedding(text)
+                        embedder.store_embedding('chunk', f"chunk_{chunk_id}", embedding)
+                        new_embeddings += 1
                 
                 # Generate entity embeddings for any new entities
                 entity_count = embedder.generate_entity_embeddings()
                 
-                conn.close()
-                print(f"✓ Generated {new_embeddings + chunk_count + entity_count} new embeddings")
+                print(f"✓ Generated {new_embeddings + entity_count} new embeddings")
                 
         except Exception as e:
             print(f"⚠️  Warning: Could not generate embeddings: {e}")
             print("   Make sure OPENAI_API_KEY is set in your .env file")
     
     # Step 4: Entity deduplication for new entities
-    if not skip_deduplication and new_doc_count > 0:
+    if not skip_deduplication:
         print("\nStep 4: Entity deduplication for new entities")
         print("-" * 40)
         print("  Running deduplication with blueprint-driven entities...")
         
         try:
-            import subprocess
-            result = subprocess.run([
-                sys.executable, "../agents/entity_deduplicator.py", 
-                "--db", "metadata.db",  # Specify correct path when running from DB dir
-                "--parallel-workers", "20", "--merge"
-            ], cwd="DB", capture_output=True, text=True)
+            # In-process: shares this process' connection pool and warm page cache
+            from agents.entity_deduplicator import EntityDeduplicator
             
-            if result.returncode == 0:
-                print("✓ Entity deduplication completed")
-                # Show summary from stdout
-                if result.stdout:
-                    lines = result.stdout.strip().split('\n')
-                    for line in lines[-10:]:
-                        if line.strip() and ('Total:' in line or 'removed' in line or 'merged' in line):
-                            print(f"  {line}")
-            else:
-                print("⚠️  Deduplication encountered issues")
-                print(f"  Return code: {result.returncode}")
-                
-                # Show detailed error information
-                if result.stderr:
-                    print("\n  Error details:")
-                    print("-" * 40)
-                    for line in result.stderr.strip().split('\n')[:10]:
-                        print(f"  {line}")
-                    print("-" * 40)
-                
-                # Also show any stdout that might contain error info
-                if result.stdout:
-                    print("\n  Output before error:")
-                    print("-" * 40)
-                    for line in result.stdout.strip().split('\n')[-5:]:
-                        print(f"  {line}")
-                    print("-" * 40)
+            deduplicator = EntityDeduplicator(db_path=db_path)
+            # Compare only entities added since the last run
+            stats = deduplicator.deduplicate_all(dry_run=False, parallel_workers=20, incremental=True)
+            
+            print("✓ Entity deduplication completed")
+            print(f"  Pairs checked: {stats['pairs_checked']}, merged: {stats['merged']}, "
+                  f"LLM calls: {stats['llm_calls']} ({stats['cache_hits']} cached verdicts)")
+            seconds = stats['phase_seconds']
+            print(f"  Time: candidates {seconds['candidates']:.1f}s, "
+                  f"verification {seconds['verification']:.1f}s, merge {seconds['merge']:.1f}s")
+            if stats['unresolved']:
+                print(f"⚠️  {stats['unresolved']} pairs unresolved, they will be compared again next run")
         except Exception as e:
             print(f"⚠️  Could not run deduplication: {e}")
     
@@ -270,10 +349,16 @@ def update_database(db_path: str, skip_embeddings: bool = False, skip_graph: boo
         print("-" * 40)
         
         try:
+            # Re-read only the nodes and edges logged in graph_changes since the last export
             graph_builder = GraphBuilder(db_path)
-            graph_data = graph_builder.export_graph("KG/knowledge_graph.json")
+            graph_data = graph_builder.patch_graph("KG/knowledge_graph.json", compact=True, compress='gzip',
+                                                   delta_path="KG/knowledge_graph.delta.json", layout=True,
+                                                   communities=True, metrics=True, snapshot=True)
             
-            print(f"✓ Updated knowledge graph:")
+            if graph_data['full_rebuild']:
+                print(f"✓ Rebuilt knowledge graph (no change log baseline):")
+            else:
+                print(f"✓ Patched knowledge graph ({graph_data['changed_nodes']} changed nodes):")
             print(f"  - Nodes: {graph_data['metadata']['total_nodes']}")
             print(f"  - Edges: {graph_data['metadata']['total_edges']}")
             print(f"  - Node types: {len(graph_data['metadata']['node_types'])}")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Declarative build pipeline with resumable stages
+Runs build stages as a dependency graph, in parallel where dependencies allow,
+and checkpoints each stage in the database so an interrupted build can resume.
+"""
+
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Any
+
+
+# Mirrors metadata_tables.build_stages in blueprints/core/database_schema.yaml
+BUILD_STAGES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS build_stages (
+        stage TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        started_at TIMESTAMP,
+        finished_at TIMESTAMP,
+        error_message TEXT,
+        details JSON
+    )
+"""
+
+# Stage states recorded in build_stages
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+@dataclass
+class BuildStage:
+    """A single build step and the stages it depends on"""
+    name: str
+    run: Callable[[], Optional[Dict[str, Any]]]
+    depends_on: List[str] = field(default_factory=list)
+    optional: bool = False  # Failure is reported but dependents still run
+    description: str = ""
+
+
+class BuildPipeline:
+    """Executes build stages in dependency order with per-stage checkpoints"""
+
+    def __init__(self, db_path: str, stages: List[BuildStage], max_parallel: int = 2):
+        self.db_path = db_path
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_parallel = max_parallel
+
+        # Dependencies on stages that are not part of this run are already satisfied
+        for stage in stages:
+            stage.depends_on = [dep for dep in stage.depends_on if dep in self.stages]
+
+        self._ensure_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _ensure_table(self):
+        conn = self._connect()
+        try:
+            conn.execute(BUILD_STAGES_TABLE_SQL)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _set_status(self, stage: str, status: str, error: Optional[str] = None,
+                    details: Optional[Dict[str, Any]] = None):
+        """Record a stage checkpoint"""
+        conn = self._connect()
+        try:
+            if status == RUNNING:
+                conn.execute("""
+                    INSERT INTO build_stages (stage, status, started_at, finished_at, error_message, details)
+                    VALUES (?, ?, CURRENT_TIMESTAMP, NULL, NULL, NULL)
+                    ON CONFLICT(stage) DO UPDATE SET
+                        status = excluded.status,
+                        started_at = CURRENT_TIMESTAMP,
+                        finished_at = NULL,
+                        error_message = NULL,
+                        details = NULL
+                """, (stage, status))
+            else:
+                conn.execute("""
+                    INSERT INTO build_stages (stage, status, finished_at, error_message, details)
+                    VALUES (?, ?, CURRENT_TIMESTAMP, ?, ?)
+                    ON CONFLICT(stage) DO UPDATE SET
+                        status = excluded.status,
+                        finished_at = CURRENT_TIMESTAMP,
+                        error_message = excluded.error_message,
+                        details = excluded.details
+                """, (stage, status, error, json.dumps(details) if details is not None else None))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get_checkpoints(self) -> Dict[str, str]:
+        """Get recorded status for each stage"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute("SELECT stage, status FROM build_stages")
+            return {row['stage']: row['status'] for row in cursor.fetchall()}
+        finally:
+            conn.close()
+
+    def reset(self):
+        """Clear all checkpoints (fresh build)"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM build_stages")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _topological_order(self) -> List[str]:
+        order = []
+        visiting = set()
+        visited = set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle at build stage '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def plan(self, resume: bool = False) -> List[str]:
+        """Stages that need to run, in dependency order.
+
+        When resuming, completed stages are skipped unless something they depend
+        on has to run again.
+        """
+        order = self._topological_order()
+        if not resume:
+            return order
+
+        checkpoints = self.get_checkpoints()
+        to_run = set()
+        for name in order:
+            stage = self.stages[name]
+            if checkpoints.get(name) != DONE or any(dep in to_run for dep in stage.depends_on):
+                to_run.add(name)
+        return [name for name in order if name in to_run]
+
+    def run(self, resume: bool = False) -> bool:
+        """Run the pipeline. Returns True if every required stage completed."""
+        to_run = self.plan(resume)
+
+        if not resume:
+            self.reset()
+
+        skipped = [name for name in self.stages if name not in to_run]
+        if skipped:
+            print(f"Resuming build, skipping completed stages: {', '.join(skipped)}")
+
+        for name in to_run:
+            self._set_status(name, PENDING)
+
+        # Stages whose outcome lets dependents proceed
+        satisfied = set(skipped)
+        remaining = list(to_run)
+        running = {}
+        failed_required = None
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            while remaining or running:
+                if failed_required is None:
+                    ready = [name for name in remaining
+                             if all(dep in satisfied for dep in self.stages[name].depends_on)]
+                    for name in ready[:max(0, self.max_parallel - len(running))]:
+                        remaining.remove(name)
+                        self._set_status(name, RUNNING)
+                        running[executor.submit(self._run_stage, name)] = name
+                elif not running:
+                    break
+
+                if not running:
+                    # Nothing runnable: remaining stages depend on something that did not finish
+                    break
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    ok = future.result()
+                    if ok or self.stages[name].optional:
+                        satisfied.add(name)
+                    elif failed_required is None:
+                        failed_required = name
+
+        if failed_required:
+            print(f"\n✗ Build stopped: stage '{failed_required}' failed")
+            if remaining:
+                print(f"  Not started: {', '.join(remaining)}")
+            print("  Fix the problem and rerun with --resume to continue from the last checkpoint")
+            return False
+
+        return True
+
+    def _run_stage(self, name: str) -> bool:
+        stage = self.stages[name]
+        print(f"\n▶ Stage '{name}' started" + (f": {stage.description}" if stage.description else ""))
+        start = time.time()
+
+        try:
+            details = stage.run() or {}
+        except Exception as e:
+            elapsed = time.time() - start
+            self._set_status(name, FAILED, error=str(e), details={'seconds': round(elapsed, 2)})
+            marker = "⚠️ " if stage.optional else "✗"
+            print(f"{marker} Stage '{name}' failed after {elapsed:.1f}s: {e}")
+            return False
+
+        elapsed = time.time() - start
+        details['seconds'] = round(elapsed, 2)
+        self._set_status(name, DONE, details=details)
+        print(f"✓ Stage '{name}' completed in {elapsed:.1f}s")
+        return True
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Graph change log
+Writers append the graph nodes they touch (documents and entities inserted,
+updated or deleted, and nodes whose relationships were rewritten) to the
+graph_changes table, in the same transaction as the change itself. The graph
+builder reads the log since the sequence number recorded in the exported
+graph and re-reads only those nodes and edges.
+
+Entries only name what changed; the current rows are read back when the graph
+is patched, so replaying an entry twice is harmless. Sequence numbers only
+mean something within one database (a rebuilt database starts again at 1), so
+exported graphs also record the database's identity (database_id).
+"""
+
+import sqlite3
+import uuid
+from typing import Iterable, Optional, Set, Tuple
+
+
+# Mirrors metadata_tables.graph_changes in blueprints/core/database_schema.yaml,
+# so databases built before the change log existed can be upgraded in place.
+CHANGE_LOG_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS graph_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        scope TEXT NOT NULL,
+        node_type TEXT NOT NULL,
+        node_id TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Mirrors metadata_tables.database_info in blueprints/core/database_schema.yaml
+DATABASE_INFO_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS database_info (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Change scopes
+NODE = 'node'    # the node itself (inserted, updated or deleted)
+EDGES = 'edges'  # every relationship with the node as source or target
+
+# node_type/node_id follow the relationships table: documents are
+# ('document', 'academic_3'), entities are ('topic', '12').
+NodeKey = Tuple[str, str]
+
+
+def ensure_change_log(cursor: sqlite3.Cursor):
+    """Create the change log table if this database predates it"""
+    cursor.execute(CHANGE_LOG_TABLE_SQL)
+
+
+def database_id(cursor: sqlite3.Cursor, create: bool = False) -> Optional[str]:
+    """UUID identifying this database, recorded when it is created.
+
+    With create, databases that predate it are given one; otherwise None is
+    returned for them.
+    """
+    query = "SELECT value FROM database_info WHERE key = 'database_id'"
+    try:
+        row = cursor.execute(query).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # Table not created yet
+    if row is None and create:
+        cursor.execute(DATABASE_INFO_TABLE_SQL)
+        cursor.execute("INSERT OR IGNORE INTO database_info (key, value) VALUES ('database_id', ?)",
+                       (uuid.uuid4().hex,))
+        row = cursor.execute(query).fetchone()
+    return row[0] if row else None
+
+
+def graph_node_id(node_type: str, node_id) -> str:
+    """Graph node id for a relationships-style (type, id) pair"""
+    if node_type == 'document':
+        return str(node_id)
+    return f"{node_type}_{node_id}"
+
+
+def log_graph_changes(cursor: sqlite3.Cursor, scope: str, node_type: str, node_ids: Iterable):
+    """Append change entries for nodes of one type.
+
+    Runs on the caller's cursor so the entries commit (or roll back) together
+    with the change.
+    """
+    rows = [(scope, node_type, str(node_id)) for node_id in node_ids]
+    if not rows:
+        return
+    ensure_change_log(cursor)
+    cursor.executemany("""
+        INSERT INTO graph_changes (scope, node_type, node_id) VALUES (?, ?, ?)
+    """, rows)
+
+
+def current_change_seq(cursor: sqlite3.Cursor) -> int:
+    """Sequence number of the latest change (0 if nothing was logged yet)"""
+    try:
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM graph_changes")
+    except sqlite3.OperationalError:
+        return 0  # Table not created yet
+    return cursor.fetchone()[0]
+
+
+def read_changes(cursor: sqlite3.Cursor, since_seq: int) -> Tuple[int, Set[NodeKey], Set[NodeKey]]:
+    """Collect changes logged after since_seq.
+
+    Returns (latest seq, nodes to re-read, nodes whose edges to re-read).
+    """
+    nodes: Set[NodeKey] = set()
+    edges: Set[NodeKey] = set()
+    last_seq = since_seq
+
+    try:
+        cursor.execute("""
+            SELECT seq, scope, node_type, node_id FROM graph_changes
+            WHERE seq > ? ORDER BY seq
+        """, (since_seq,))
+    except sqlite3.OperationalError:
+        return last_seq, nodes, edges  # Table not created yet
+
+    for seq, scope, node_type, node_id in cursor.fetchall():
+        (nodes if scope == NODE else edges).add((node_type, node_id))
+        last_seq = seq
+
+    return last_seq, nodes, edges
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite connection layer
+Long-lived connections tuned for this workload: WAL journal (readers never
+block behind a writer, including update_database.py in another process),
+synchronous=NORMAL, a larger page cache and memory-mapped I/O. Connections
+are reused, so their prepared-statement caches stay warm across calls.
+
+Readers check out a connection from a per-database read pool; all writes in a
+process go through one serialized writer connection.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+
+# Pragmas applied to every connection
+PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'cache_size': -65536,        # 64 MB page cache (negative = KiB)
+    'mmap_size': 268435456,      # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+    'busy_timeout': 30000        # Wait up to 30s for another process' write lock
+}
+
+# Prepared statements kept per connection
+CACHED_STATEMENTS = 256
+
+# Idle read connections kept per database
+MAX_IDLE_READERS = 8
+
+
+class PooledConnection:
+    """Checked-out connection; close() hands it back instead of closing it.
+
+    Behaves like sqlite3.Connection, so existing code can keep its
+    connect / commit / close pattern.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, release):
+        object.__setattr__(self, '_conn', conn)
+        object.__setattr__(self, '_release', release)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name: str, value: Any):
+        # e.g. conn.row_factory = sqlite3.Row
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Same semantics as sqlite3.Connection: commit or roll back, don't close
+        if exc_type is None:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+        return False
+
+    def close(self):
+        release = self._release
+        if release is not None:
+            object.__setattr__(self, '_release', None)
+            release(self._conn)
+
+
+class ConnectionManager:
+    """Read pool and serialized writer for one database file"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._idle_readers: List[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.RLock()
+        self._write_depth = 0
+        self._writer_file_id = None
+
+        # Identity of the database file the pooled connections point at
+        self._file_id = self._current_file_id()
+
+    def _current_file_id(self):
+        try:
+            stat = Path(self.db_path).stat()
+            return stat.st_dev, stat.st_ino
+        except OSError:
+            return None
+
+    def _check_file(self):
+        """Drop pooled connections if the database file was replaced (e.g. a rebuild)"""
+        file_id = self._current_file_id()
+        if file_id == self._file_id:
+            return
+        self._file_id = file_id
+        with self._pool_lock:
+            readers, self._idle_readers = self._idle_readers, []
+        for conn in readers:
+            conn.close()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                               cached_statements=CACHED_STATEMENTS)
+        try:
+            # Persistent in the database file; needs write access the first time
+            conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.OperationalError:
+            pass
+        for pragma, value in PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+        return conn
+
+    def reader(self, row_factory=sqlite3.Row) -> PooledConnection:
+        """Check out a read connection (return it with close())"""
+        self._check_file()
+        with self._pool_lock:
+            conn = self._idle_readers.pop() if self._idle_readers else None
+        if conn is None:
+            conn = self._open()
+        conn.row_factory = row_factory
+        file_id = self._file_id
+        return PooledConnection(conn, lambda c: self._release_reader(c, file_id))
+
+    def _release_reader(self, conn: sqlite3.Connection, file_id):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._pool_lock:
+            if file_id == self._file_id and len(self._idle_readers) < MAX_IDLE_READERS:
+                self._idle_readers.append(conn)
+                return
+        conn.close()
+
+    def writer(self, row_factory=sqlite3.Row) -> PooledConnection:
+        """Acquire the process-wide writer; blocks until other threads release it.
+
+        Uncommitted changes are rolled back when the outermost holder closes it.
+        """
+        self._write_lock.acquire()
+        try:
+            if self._write_depth == 0:
+                self._check_file()
+                if self._writer is not None and self._file_id != self._writer_file_id:
+                    self._writer.close()
+                    self._writer = None
+            if self._writer is None:
+                self._writer = self._open()
+                self._writer_file_id = self._current_file_id()
+            self._write_depth += 1
+            self._writer.row_factory = row_factory
+        except Exception:
+            self._write_lock.release()
+            raise
+        return PooledConnection(self._writer, self._release_writer)
+
+    def _release_writer(self, conn: sqlite3.Connection):
+        try:
+            self._write_depth -= 1
+            if self._write_depth == 0 and conn.in_transaction:
+                conn.rollback()
+        finally:
+            self._write_lock.release()
+
+    def close_all(self):
+        """Close idle readers and the writer"""
+        with self._pool_lock:
+            readers, self._idle_readers = self._idle_readers, []
+        for conn in readers:
+            conn.close()
+        with self._write_lock:
+            if self._writer is not None and self._write_depth == 0:
+                self._writer.close()
+                self._writer = None
+
+
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str) -> ConnectionManager:
+    """Get the shared manager for a database file"""
+    key = str(Path(db_path).resolve())
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = ConnectionManager(key)
+            _managers[key] = manager
+        return manager
+
+
+def read_connection(db_path: str, row_factory=sqlite3.Row) -> PooledConnection:
+    """Pooled read connection for db_path"""
+    return get_connection_manager(db_path).reader(row_factory)
+
+
+def write_connection(db_path: str, row_factory=sqlite3.Row) -> PooledConnection:
+    """Serialized writer connection for db_path"""
+    return get_connection_manager(db_path).writer(row_factory)
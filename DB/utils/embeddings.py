@@ -5,15 +5,24 @@ Stores embeddings in the dedicated embeddings table for semantic search.
 """
 
 import os
+import sys
 import json
 import sqlite3
 import numpy as np
 from typing import List, Optional, Tuple, Dict
+from pathlib import Path
 import logging
 from dotenv import load_dotenv
 from langchain_openai import OpenAIEmbeddings
 from pydantic import SecretStr
 
+# Add project root to path for imports
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from DB.utils.connection import read_connection, write_connection
+
 # Load environment variables
 load_dotenv()
 
@@ -39,11 +48,11 @@ class EmbeddingGenerator:
         )
         self.model_name = "text-embedding-3-large"
     
-    def get_connection(self) -> sqlite3.Connection:
-        """Get database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def get_connection(self, write: bool = False) -> sqlite3.Connection:
+        """Get a pooled database connection (the shared writer if write=True)."""
+        if write:
+            return write_connection(self.db_path)
+        return read_connection(self.db_path)
     
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for text."""
@@ -56,7 +65,7 @@ class EmbeddingGenerator:
     
     def store_embedding(self, entity_type: str, entity_id: str, embedding: List[float]):
         """Store embedding in the embeddings table."""
-        conn = self.get_connection()
+        conn = self.get_connection(write=True)
         cursor = conn.cursor()
         
         try:
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Ingest manifest for change detection
+Records path, mtime, size and content hash of every ingested metadata file
+(and the content file it was loaded from) so incremental updates can stat
+files instead of parsing them.
+"""
+
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Any
+
+
+# Mirrors metadata_tables.ingest_manifest in blueprints/core/database_schema.yaml,
+# so databases built before the manifest existed can be upgraded in place.
+MANIFEST_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS ingest_manifest (
+        path TEXT PRIMARY KEY,
+        doc_type TEXT NOT NULL,
+        document_id INTEGER,
+        mtime REAL NOT NULL,
+        size INTEGER NOT NULL,
+        content_hash TEXT NOT NULL,
+        source_path TEXT,
+        source_mtime REAL,
+        source_size INTEGER,
+        source_hash TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# File states reported by check_file
+NEW = 'new'
+MODIFIED = 'modified'
+UNCHANGED = 'unchanged'
+TOUCHED = 'touched'  # stat changed but content hash did not
+
+
+def manifest_key(path: Path) -> str:
+    """Canonical manifest key for a file path"""
+    return str(Path(path).resolve())
+
+
+def hash_file(path: Path) -> str:
+    """SHA-256 of file contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_signature(path: Optional[Path]) -> Tuple[Optional[float], Optional[int], Optional[str]]:
+    """Return (mtime, size, content hash) for a file, or Nones if it is missing"""
+    if path is None or not Path(path).exists():
+        return None, None, None
+    stat = Path(path).stat()
+    return stat.st_mtime, stat.st_size, hash_file(path)
+
+
+def ensure_manifest_table(cursor: sqlite3.Cursor):
+    """Create the manifest table if this database predates it"""
+    cursor.execute(MANIFEST_TABLE_SQL)
+
+
+def load_manifest(db_path: str) -> Dict[str, Dict[str, Any]]:
+    """Load all manifest rows keyed by metadata file path"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+
+    try:
+        ensure_manifest_table(cursor)
+        conn.commit()
+        cursor.execute("SELECT * FROM ingest_manifest")
+        return {row['path']: dict(row) for row in cursor.fetchall()}
+    finally:
+        conn.close()
+
+
+def record_ingest(cursor: sqlite3.Cursor, json_path: Path, doc_type: str,
+                  document_id: Optional[int], source_path: Optional[Path] = None):
+    """Record (or refresh) the manifest row for an ingested metadata file.
+
+    Runs on the caller's cursor so the row commits together with the document.
+    """
+    ensure_manifest_table(cursor)
+
+    mtime, size, content_hash = file_signature(json_path)
+    source_mtime, source_size, source_hash = file_signature(source_path)
+
+    cursor.execute("""
+        INSERT INTO ingest_manifest
+        (path, doc_type, document_id, mtime, size, content_hash,
+         source_path, source_mtime, source_size, source_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET
+            doc_type = excluded.doc_type,
+            document_id = excluded.document_id,
+            mtime = excluded.mtime,
+            size = excluded.size,
+            content_hash = excluded.content_hash,
+            source_path = excluded.source_path,
+            source_mtime = excluded.source_mtime,
+            source_size = excluded.source_size,
+            source_hash = excluded.source_hash,
+            updated_at = CURRENT_TIMESTAMP
+    """, (
+        manifest_key(json_path), doc_type, document_id, mtime, size, content_hash,
+        manifest_key(source_path) if source_path else None, source_mtime, source_size, source_hash
+    ))
+
+
+def _check_signature(path: Optional[str], mtime: Optional[float], size: Optional[int],
+                     content_hash: Optional[str]) -> str:
+    """Compare a file against its recorded signature, hashing only when stat differs"""
+    if not path:
+        return UNCHANGED
+
+    file_path = Path(path)
+    if not file_path.exists():
+        return MODIFIED if content_hash else UNCHANGED
+
+    stat = file_path.stat()
+    if stat.st_mtime == mtime and stat.st_size == size:
+        return UNCHANGED
+
+    if stat.st_size == size and hash_file(file_path) == content_hash:
+        return TOUCHED
+
+    return MODIFIED
+
+
+def check_file(json_path: Path, entry: Optional[Dict[str, Any]]) -> str:
+    """Classify a metadata file against its manifest entry.
+
+    Returns one of NEW, MODIFIED, TOUCHED or UNCHANGED. Files are only read
+    (hashed) when their mtime or size differs from the manifest.
+    """
+    if entry is None:
+        return NEW
+
+    states = (
+        _check_signature(manifest_key(json_path), entry['mtime'], entry['size'], entry['content_hash']),
+        _check_signature(entry['source_path'], entry['source_mtime'], entry['source_size'], entry['source_hash'])
+    )
+
+    if MODIFIED in states:
+        return MODIFIED
+    if TOUCHED in states:
+        return TOUCHED
+    return UNCHANGED
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Node metrics
+Centrality scores (degree, PageRank, sampled betweenness) computed by the
+knowledge graph export (KG/graph_metrics.py) and stored per node, keyed like
+the relationships table, so queries can rank neighbours with a join instead
+of computing anything at query time.
+"""
+
+import sqlite3
+from typing import Iterable, Tuple
+
+
+# Mirrors metadata_tables.node_metrics in blueprints/core/database_schema.yaml,
+# so databases built before the table existed can be upgraded in place.
+NODE_METRICS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS node_metrics (
+        node_type TEXT NOT NULL,
+        node_id TEXT NOT NULL,
+        degree INTEGER NOT NULL,
+        pagerank REAL NOT NULL,
+        betweenness REAL NOT NULL,
+        computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(node_type, node_id)
+    )
+"""
+
+# (node_type, node_id, degree, pagerank, betweenness); node_type/node_id follow
+# the relationships table: ('document', 'academic_3'), ('topic', '12').
+MetricsRow = Tuple[str, str, int, float, float]
+
+
+def ensure_node_metrics(cursor: sqlite3.Cursor):
+    """Create the node metrics table if this database predates it"""
+    cursor.execute(NODE_METRICS_TABLE_SQL)
+
+
+def has_node_metrics(cursor: sqlite3.Cursor) -> bool:
+    """Whether node metrics have been computed for this database"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'node_metrics'")
+    return cursor.fetchone() is not None
+
+
+def replace_node_metrics(cursor: sqlite3.Cursor, rows: Iterable[MetricsRow]):
+    """Replace all stored metrics (scores are relative to the whole graph).
+
+    Runs on the caller's cursor; the caller commits.
+    """
+    ensure_node_metrics(cursor)
+    cursor.execute("DELETE FROM node_metrics")
+    cursor.executemany("""
+        INSERT INTO node_metrics (node_type, node_id, degree, pagerank, betweenness)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Candidate blocking for fuzzy entity-name matching
+Finds all name pairs whose difflib.SequenceMatcher ratio reaches a threshold
+without scoring every pair: a prefix-filtered character q-gram index proposes
+candidates, cheap upper bounds discard most of them, and only the rest are
+scored with SequenceMatcher.
+
+Recall is exact. If SequenceMatcher matches M characters of two strings with
+total length T in B blocks, the strings share at least M - B(q - 1) q-gram
+occurrences, and B <= T - 2M + 1. Pairs with ratio >= r therefore share at
+least (2q - 1) * ceil(r * T / 2) - (q - 1) * (T + 1) q-grams. Names too short
+for that bound to guarantee a shared q-gram are compared against every name
+of compatible length instead.
+"""
+
+import difflib
+import math
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+def _qgrams(name: str, q: int) -> List[Tuple[str, int]]:
+    """Character q-gram occurrences of a name, padded with boundary markers.
+
+    Repeated q-grams are numbered so multiset overlap becomes set overlap.
+    """
+    padded = f"\x02{name}\x03"
+    seen = Counter()
+    grams = []
+    for i in range(len(padded) - q + 1):
+        gram = padded[i:i + q]
+        grams.append((gram, seen[gram]))
+        seen[gram] += 1
+    return grams
+
+
+def _length_range(length: int, threshold: float) -> Tuple[int, int]:
+    """Partner lengths that can reach threshold (ratio <= 2 * min / total)"""
+    low = math.ceil(length * threshold / (2 - threshold) - 1e-9)
+    high = math.floor(length * (2 - threshold) / threshold + 1e-9) if threshold > 0 else 10 ** 9
+    return low, high
+
+
+def _required_overlap(total: int, threshold: float, q: int) -> int:
+    """Minimum shared q-gram occurrences for a pair of total length total"""
+    matches = math.ceil(threshold * total / 2 - 1e-9)
+    return (2 * q - 1) * matches - (q - 1) * (total + 1)
+
+
+def _min_overlap(length: int, threshold: float, q: int, max_length: int, min_partner: int = 0) -> int:
+    """Smallest required overlap of a name over all compatible partner lengths"""
+    low, high = _length_range(length, threshold)
+    low = max(low, min_partner)
+    high = min(high, max_length)
+    if low > high:
+        return 1  # No possible partner
+    return min(_required_overlap(length + other, threshold, q) for other in range(max(low, 0), high + 1))
+
+
+def find_similar_pairs(names: List[str], threshold: float, q: Optional[int] = None) -> List[Tuple[int, int, float]]:
+    """Find all pairs (i, j, ratio) with i < j and SequenceMatcher ratio >= threshold.
+
+    Names are compared as given (normalize case first). The ratio is computed
+    as SequenceMatcher(None, names[i], names[j]).ratio(), so results match an
+    exhaustive pairwise scan in the same order.
+
+    q is the gram size; by default trigrams (more selective) for thresholds of
+    0.9 and above, where their overlap bound still covers short names, and
+    bigrams otherwise.
+    """
+    n = len(names)
+    if n < 2:
+        return []
+
+    if q is None:
+        q = 3 if threshold >= 0.9 else 2
+
+    grams = [frozenset(_qgrams(name, q)) for name in names]
+
+    # Global gram order: rarest first keeps prefixes selective
+    frequency = Counter(gram for name_grams in grams for gram in name_grams)
+    rank = {gram: r for r, gram in enumerate(sorted(frequency, key=lambda g: (frequency[g], g)))}
+
+    lengths = [len(name) for name in names]
+    sizes = [len(name_grams) for name_grams in grams]
+    max_length = max(lengths)
+    required = [_required_overlap(total, threshold, q) for total in range(2 * max_length + 1)]
+
+    by_length: Dict[int, List[int]] = defaultdict(list)
+    for i, length in enumerate(lengths):
+        by_length[length].append(i)
+
+    # Inverted index of (name, position) by gram. Names are processed shortest
+    # first, so every indexed name is at most as long as the probing one.
+    index: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    candidates = set()
+
+    for i in sorted(range(n), key=lambda k: (lengths[k], k)):
+        length = lengths[i]
+        low, high = _length_range(length, threshold)
+        probe_overlap = _min_overlap(length, threshold, q, max_length)
+
+        ordered = sorted(rank[gram] for gram in grams[i])
+        size = len(ordered)
+
+        if probe_overlap <= 0:
+            # Bound cannot guarantee a shared q-gram: compare by length instead
+            for other in range(max(low, 0), min(high, max_length) + 1):
+                for j in by_length.get(other, ()):
+                    if j != i:
+                        candidates.add((min(i, j), max(i, j)))
+
+        # Probe: count shared prefix grams, dropping names the positional
+        # bound rules out (shared so far + grams left cannot reach required)
+        counts: Dict[int, int] = {}
+        for position in range(size - max(probe_overlap, 1) + 1):
+            left = size - position
+            for j, j_position in index.get(ordered[position], ()):
+                count = counts.get(j, 0)
+                if count < 0 or lengths[j] < low:
+                    continue
+                remaining = sizes[j] - j_position
+                if left < remaining:
+                    remaining = left
+                counts[j] = count + 1 if count + remaining >= required[length + lengths[j]] else -1
+
+        for j, count in counts.items():
+            if count > 0:
+                candidates.add((min(i, j), max(i, j)))
+
+        # Index a prefix sized for partners at least as long as this name
+        index_overlap = max(1, _min_overlap(length, threshold, q, max_length, min_partner=length))
+        for position in range(size - index_overlap + 1):
+            index[ordered[position]].append((i, position))
+
+    # Group by second name: SequenceMatcher caches its analysis of seq2
+    by_second: Dict[int, List[int]] = defaultdict(list)
+    for i, j in candidates:
+        # Full q-gram overlap bound first; far cheaper than any difflib call
+        if len(grams[i] & grams[j]) >= required[lengths[i] + lengths[j]]:
+            by_second[j].append(i)
+
+    pairs = []
+    matcher = difflib.SequenceMatcher(None)
+    for j, firsts in by_second.items():
+        matcher.set_seq2(names[j])
+        for i in firsts:
+            matcher.set_seq1(names[i])
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= threshold:
+                pairs.append((i, j, ratio))
+
+    return sorted(pairs)
+
+
+def find_similar_pairs_for(names: List[str], queries: List[int], threshold: float,
+                           q: Optional[int] = None) -> List[Tuple[int, int, float]]:
+    """Find pairs (i, j, ratio) with i < j, ratio >= threshold and i or j in queries.
+
+    Compares only the query names (e.g. entities added since the last run)
+    against all names, with the same scoring and exactness as
+    find_similar_pairs. Every name is indexed, so the cost grows with the
+    number of queries rather than with the number of pairs.
+    """
+    n = len(names)
+    queries = sorted(set(queries))
+    if n < 2 or not queries:
+        return []
+
+    if q is None:
+        q = 3 if threshold >= 0.9 else 2
+
+    grams = [frozenset(_qgrams(name, q)) for name in names]
+
+    frequency = Counter(gram for name_grams in grams for gram in name_grams)
+    rank = {gram: r for r, gram in enumerate(sorted(frequency, key=lambda g: (frequency[g], g)))}
+
+    lengths = [len(name) for name in names]
+    max_length = max(lengths)
+    required = [_required_overlap(total, threshold, q) for total in range(2 * max_length + 1)]
+
+    by_length: Dict[int, List[int]] = defaultdict(list)
+    for i, length in enumerate(lengths):
+        by_length[length].append(i)
+
+    # Prefix of each name sized for its most permissive partner length: any
+    # pair that can reach the threshold shares a gram in both prefixes
+    overlaps = {}
+    prefixes = []
+    for i in range(n):
+        length = lengths[i]
+        if length not in overlaps:
+            overlaps[length] = _min_overlap(length, threshold, q, max_length)
+        ordered = sorted(rank[gram] for gram in grams[i])
+        prefixes.append(ordered[:len(ordered) - max(overlaps[length], 1) + 1])
+
+    index: Dict[int, List[int]] = defaultdict(list)
+    for i, prefix in enumerate(prefixes):
+        for gram in prefix:
+            index[gram].append(i)
+
+    candidates = set()
+    for i in queries:
+        low, high = _length_range(lengths[i], threshold)
+
+        if overlaps[lengths[i]] <= 0:
+            # Bound cannot guarantee a shared q-gram: compare by length instead
+            for other in range(max(low, 0), min(high, max_length) + 1):
+                for j in by_length.get(other, ()):
+                    if j != i:
+                        candidates.add((min(i, j), max(i, j)))
+
+        for gram in prefixes[i]:
+            for j in index[gram]:
+                if j != i and low <= lengths[j] <= high:
+                    candidates.add((min(i, j), max(i, j)))
+
+    by_second: Dict[int, List[int]] = defaultdict(list)
+    for i, j in candidates:
+        if len(grams[i] & grams[j]) >= required[lengths[i] + lengths[j]]:
+            by_second[j].append(i)
+
+    pairs = []
+    matcher = difflib.SequenceMatcher(None)
+    for j, firsts in by_second.items():
+        matcher.set_seq2(names[j])
+        for i in firsts:
+            matcher.set_seq1(names[i])
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= threshold:
+                pairs.append((i, j, ratio))
+
+    return sorted(pairs)
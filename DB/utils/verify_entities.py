@@ -5,11 +5,18 @@ Shows statistics, samples, and potential duplicates.
 """
 
 import sqlite3
+import sys
 from pathlib import Path
 from typing import Dict, List, Tuple
-import difflib
 from collections import defaultdict
 
+# Add project root to path for imports
+project_root = Path(__file__).parent.parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from DB.utils.string_similarity import find_similar_pairs
+
 
 def get_connection(db_path: str) -> sqlite3.Connection:
     """Get database connection."""
@@ -81,17 +88,13 @@ def find_similar_entities(db_path: str, table: str, threshold: float = 0.8) -> L
     
     similar = []
     
-    # Compare each pair
-    for i in range(len(entities)):
-        for j in range(i + 1, len(entities)):
-            id1, name1 = entities[i]
-            id2, name2 = entities[j]
-            
-            # Calculate similarity
-            ratio = difflib.SequenceMatcher(None, name1.lower(), name2.lower()).ratio()
-            
-            if ratio >= threshold and ratio < 1.0:  # Exclude exact matches
-                similar.append((f"{name1} (id:{id1})", f"{name2} (id:{id2})", ratio))
+    # Compare candidate pairs proposed by n-gram blocking
+    for i, j, ratio in find_similar_pairs([name.lower() for _, name in entities], threshold):
+        id1, name1 = entities[i]
+        id2, name2 = entities[j]
+        
+        if ratio < 1.0:  # Exclude exact matches
+            similar.append((f"{name1} (id:{id1})", f"{name2} (id:{id2})", ratio))
     
     conn.close()
     return sorted(similar, key=lambda x: x[2], reverse=True)
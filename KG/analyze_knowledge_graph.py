@@ -8,16 +8,24 @@ entities and relationships for comparison purposes.
 
 import json
 import argparse
-from collections import defaultdict, Counter
+from collections import Counter
 from pathlib import Path
 import sys
 
+# Project root for KG.* imports when run as a script
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from KG.graph_columns import GraphColumns
+from KG.graph_diff import diff_graphs, diff_delta, write_delta
+from KG.graph_metrics import compute_node_metrics
+
 
 def load_knowledge_graph(file_path):
-    """Load knowledge graph from JSON file."""
+    """Load knowledge graph from JSON file into columns."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return GraphColumns.from_file(file_path)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
@@ -26,88 +34,52 @@ def load_knowledge_graph(file_path):
         sys.exit(1)
 
 
-def analyze_entities(nodes):
+def analyze_entities(columns):
     """Analyze entities in the knowledge graph."""
-    entities = {
-        'total_count': len(nodes),
-        'by_type': defaultdict(list),
-        'types_count': Counter(),
-        'unique_types': set()
+    types_count = Counter(columns.node_type_counts(columns.all_nodes()))
+    return {
+        'total_count': columns.num_nodes,
+        'types_count': types_count,
+        'unique_types': set(types_count)
     }
-    
-    for node in nodes:
-        node_type = node.get('type', 'unknown')
-        entities['by_type'][node_type].append(node)
-        entities['types_count'][node_type] += 1
-        entities['unique_types'].add(node_type)
-    
-    return entities
 
 
-def analyze_relationships(links):
+def analyze_relationships(columns):
     """Analyze relationships in the knowledge graph."""
-    relationships = {
-        'total_count': len(links),
-        'by_type': defaultdict(list),
-        'types_count': Counter(),
-        'unique_types': set(),
-        'source_target_pairs': []
+    types_count = Counter(columns.link_type_counts(columns.all_links()))
+    return {
+        'total_count': columns.num_links,
+        'types_count': types_count,
+        'unique_types': set(types_count)
     }
-    
-    for link in links:
-        # Handle different possible field names for relationship type
-        rel_type = link.get('type', link.get('relationship', link.get('label', 'unknown')))
-        relationships['by_type'][rel_type].append(link)
-        relationships['types_count'][rel_type] += 1
-        relationships['unique_types'].add(rel_type)
-        
-        # Store source-target pairs for connection analysis
-        source = link.get('source', link.get('from'))
-        target = link.get('target', link.get('to'))
-        if source and target:
-            relationships['source_target_pairs'].append((source, target, rel_type))
-    
-    return relationships
 
 
-def find_common_entities(entities1, entities2):
-    """Find entities that appear in both knowledge graphs."""
-    # Extract entity identifiers (using id or title/label)
-    ids1 = set()
-    ids2 = set()
-    
-    for node in entities1['by_type'].values():
-        for entity in node:
-            ids1.add(entity.get('id', entity.get('title', entity.get('label', str(entity)))))
-    
-    for node in entities2['by_type'].values():
-        for entity in node:
-            ids2.add(entity.get('id', entity.get('title', entity.get('label', str(entity)))))
-    
-    common = ids1.intersection(ids2)
-    only_in_1 = ids1 - ids2
-    only_in_2 = ids2 - ids1
+def find_common_entities(diff, entities1, entities2):
+    """Count entities in both knowledge graphs, only in one, and changed (from a diff_graphs result)."""
+    only_in_first = len(diff['removed_nodes'])
+    only_in_second = len(diff['added_nodes'])
     
     return {
-        'common': common,
-        'only_in_first': only_in_1,
-        'only_in_second': only_in_2
+        'common': entities2['total_count'] - only_in_second,
+        'changed': len(diff['changed_nodes']),
+        'only_in_first': only_in_first,
+        'only_in_second': only_in_second
     }
 
 
-def find_common_relationships(relationships1, relationships2):
+def find_common_relationships(diff, relationships1, relationships2):
     """Find relationships that appear in both knowledge graphs."""
     types1 = relationships1['unique_types']
     types2 = relationships2['unique_types']
     
-    common_types = types1.intersection(types2)
-    only_in_1 = types1 - types2
-    only_in_2 = types2 - types1
-    
     return {
-        'common_types': common_types,
-        'only_in_first': only_in_1,
-        'only_in_second': only_in_2
+        'common_types': types1.intersection(types2),
+        'only_in_first': types1 - types2,
+        'only_in_second': types2 - types1,
+        'common_links': relationships2['total_count'] - len(diff['added_links']),
+        'changed_links': len(diff['changed_links']),
+        'links_only_in_first': len(diff['removed_links']),
+        'links_only_in_second': len(diff['added_links'])
     }
 
 
@@ -134,6 +106,19 @@ def print_analysis_report(file_path, entities, relationships):
         print(f"   • {rel_type}: {count}")
 
 
+def print_centrality_report(nodes, links, top=10):
+    """Print the most central nodes (metrics stored in the export, or computed here)."""
+    if not all('pagerank' in node and 'betweenness' in node for node in nodes):
+        compute_node_metrics(nodes, links)
+    
+    print(f"\n⭐ MOST CENTRAL NODES:")
+    for metric, title in (('pagerank', 'PageRank'), ('betweenness', 'Betweenness'), ('degree', 'Degree')):
+        print(f"\n   By {title}:")
+        for node in sorted(nodes, key=lambda n: n.get(metric, 0), reverse=True)[:top]:
+            label = node.get('label', node.get('id'))
+            print(f"   • {label} [{node.get('type', 'unknown')}]: {node.get(metric, 0):.4g}")
+
+
 def print_comparison_report(entities1, entities2, relationships1, relationships2, 
                           common_entities, common_relationships, file1_name, file2_name):
     """Print comparison report between two knowledge graphs."""
@@ -144,9 +129,9 @@ def print_comparison_report(entities1, entities2, relationships1, relationships2
     print(f"\n🔍 ENTITIES COMPARISON:")
     print(f"   {file1_name}: {entities1['total_count']} entities")
     print(f"   {file2_name}: {entities2['total_count']} entities")
-    print(f"   Common entities: {len(common_entities['common'])}")
-    print(f"   Only in {file1_name}: {len(common_entities['only_in_first'])}")
-    print(f"   Only in {file2_name}: {len(common_entities['only_in_second'])}")
+    print(f"   Common entities: {common_entities['common']} ({common_entities['changed']} changed)")
+    print(f"   Only in {file1_name}: {common_entities['only_in_first']}")
+    print(f"   Only in {file2_name}: {common_entities['only_in_second']}")
     
     print(f"\n📊 ENTITY TYPES COMPARISON:")
     all_types = entities1['unique_types'].union(entities2['unique_types'])
@@ -158,9 +143,12 @@ def print_comparison_report(entities1, entities2, relationships1, relationships2
     print(f"\n🔗 RELATIONSHIPS COMPARISON:")
     print(f"   {file1_name}: {relationships1['total_count']} relationships")
     print(f"   {file2_name}: {relationships2['total_count']} relationships")
+    print(f"   Common relationships: {common_relationships['common_links']} ({common_relationships['changed_links']} changed)")
+    print(f"   Only in {file1_name}: {common_relationships['links_only_in_first']}")
+    print(f"   Only in {file2_name}: {common_relationships['links_only_in_second']}")
     print(f"   Common types: {len(common_relationships['common_types'])}")
-    print(f"   Only in {file1_name}: {len(common_relationships['only_in_first'])}")
-    print(f"   Only in {file2_name}: {len(common_relationships['only_in_second'])}")
+    print(f"   Types only in {file1_name}: {len(common_relationships['only_in_first'])}")
+    print(f"   Types only in {file2_name}: {len(common_relationships['only_in_second'])}")
     
     print(f"\n📋 RELATIONSHIP TYPES COMPARISON:")
     all_rel_types = relationships1['unique_types'].union(relationships2['unique_types'])
@@ -190,6 +178,11 @@ def main():
     parser.add_argument('files', nargs='+', help='Knowledge graph JSON files to analyze')
     parser.add_argument('--compare', action='store_true', help='Compare two knowledge graphs')
     parser.add_argument('--output', help='Output results to file instead of stdout')
+    parser.add_argument('--delta', metavar='PATH',
+                        help='With --compare, write the added, removed and changed nodes and links as JSON')
+    parser.add_argument('--centrality', action='store_true',
+                        help='List the most central nodes (PageRank, betweenness, degree)')
+    parser.add_argument('--top', type=int, default=10, help='Nodes listed per centrality metric (default: 10)')
     
     args = parser.parse_args()
     
@@ -201,6 +194,10 @@ def main():
         print("Error: Exactly two files are required for comparison.")
         sys.exit(1)
     
+    if args.delta and not args.compare:
+        print("Error: --delta requires --compare.")
+        sys.exit(1)
+    
     # Redirect output if specified
     if args.output:
         sys.stdout = open(args.output, 'w', encoding='utf-8')
@@ -209,34 +206,39 @@ def main():
         # Load knowledge graphs
         graphs = []
         for file_path in args.files:
-            kg = load_knowledge_graph(file_path)
-            graphs.append((file_path, kg))
+            graphs.append((file_path, load_knowledge_graph(file_path)))
         
         # Analyze each graph
         analyses = []
-        for file_path, kg in graphs:
-            nodes = kg.get('nodes', [])
-            links = kg.get('links', [])
-            
-            entities = analyze_entities(nodes)
-            relationships = analyze_relationships(links)
+        for file_path, columns in graphs:
+            entities = analyze_entities(columns)
+            relationships = analyze_relationships(columns)
             
             analyses.append((file_path, entities, relationships))
             
             # Print individual analysis
             print_analysis_report(file_path, entities, relationships)
+            if args.centrality:
+                # Decoded copies: metrics computed here are stored on the node dicts
+                print_centrality_report(list(columns.nodes), list(columns.links), args.top)
         
         # Compare if requested
         if args.compare and len(analyses) == 2:
             file1, entities1, relationships1 = analyses[0]
             file2, entities2, relationships2 = analyses[1]
             
-            common_entities = find_common_entities(entities1, entities2)
-            common_relationships = find_common_relationships(relationships1, relationships2)
+            old, new = graphs[0][1], graphs[1][1]
+            diff = diff_graphs(old, new)
+            common_entities = find_common_entities(diff, entities1, entities2)
+            common_relationships = find_common_relationships(diff, relationships1, relationships2)
             
             print_comparison_report(entities1, entities2, relationships1, relationships2,
                                   common_entities, common_relationships, 
                                   Path(file1).name, Path(file2).name)
+            
+            if args.delta:
+                write_delta(diff_delta(old, new, diff), args.delta)
+                print(f"\n💾 Delta saved to: {args.delta}")
     
     finally:
         if args.output:
@@ -7,7 +7,8 @@ Uses visualization blueprints to determine node types, colors, and relationships
 import sqlite3
 import json
 import sys
-from typing import Dict, List, Any, Optional
+from collections import defaultdict
+from typing import Dict, List, Any, Iterable, Iterator, Optional
 from pathlib import Path
 import logging
 
@@ -23,6 +24,19 @@ except ImportError as e:
     print(f"Blueprint path: {blueprint_core_path}")
     raise
 
+# Project root for KG.* imports when run as a script
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from KG.graph_format import GraphWriter, BROTLI_AVAILABLE, load_graph
+from KG.graph_snapshot import SnapshotWriter, fresh_snapshot, snapshot_path, write_snapshot
+from KG.graph_layout import layout_graph, place_new_nodes, DEFAULT_ITERATIONS as DEFAULT_LAYOUT_ITERATIONS
+from KG.graph_communities import assign_communities, assign_new_nodes, summarize_communities
+from KG.graph_metrics import compute_node_metrics
+from DB.utils.change_log import current_change_seq, database_id, read_changes, graph_node_id
+from DB.utils.node_metrics import replace_node_metrics
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -88,150 +102,235 @@ class GraphBuilder:
             'style': edge_style.get('style', 'solid')
         }
     
+    # Node sources: (id prefix, table, columns); documents first, as exported
+    DOCUMENT_SOURCES = [
+        ('academic', 'academic_documents', ['id', 'title', 'date', 'domain', 'document_type']),
+        ('chronicle', 'chronicle_documents', ['id', 'title', 'date', 'note_type']),
+    ]
+    
+    ENTITY_SOURCES = [
+        ('topic', 'topics', ['name', 'category', 'description']),
+        ('person', 'people', ['name', 'role', 'affiliation']),
+        ('project', 'projects', ['name', 'description']),
+        ('institution', 'institutions', ['name', 'type', 'location']),
+        ('method', 'methods', ['name', 'category', 'description']),
+        ('application', 'applications', ['name', 'domain', 'description'])
+    ]
+    
+    # Maximum ids bound in one "IN (...)" list
+    SQL_BATCH_SIZE = 500
+    
+    def _select_rows(self, cursor: sqlite3.Cursor, sql: str, ids: Optional[List] = None) -> Iterator[sqlite3.Row]:
+        """Run a SELECT over a whole table, or only over the given ids (in batches)"""
+        if ids is None:
+            cursor.execute(sql)
+            yield from cursor
+            return
+        for start in range(0, len(ids), self.SQL_BATCH_SIZE):
+            batch = ids[start:start + self.SQL_BATCH_SIZE]
+            cursor.execute(f"{sql} WHERE id IN ({', '.join('?' * len(batch))})", batch)
+            yield from cursor.fetchall()
+    
+    def _document_node(self, prefix: str, row: sqlite3.Row) -> Dict[str, Any]:
+        """Graph node for an academic or chronicle document row"""
+        node_type = self._get_node_type_from_entity('document', None, f'{prefix}_document')
+        
+        if prefix == 'academic':
+            entity_data = {
+                'title': row['title'],
+                'date': row['date'],
+                'domain': row['domain'],
+                'document_type': row['document_type']
+            }
+            label = row['title'][:80] + '...' if len(row['title']) > 80 else row['title']
+        else:
+            entity_data = {
+                'title': row['title'],
+                'date': row['date'],
+                'note_type': row['note_type']
+            }
+            label = row['title']
+        
+        attributes = self._get_node_attributes(node_type, entity_data)
+        
+        return {
+            'id': f"{prefix}_{row['id']}",
+            'type': node_type,
+            'label': label,
+            **attributes
+        }
+    
+    def _entity_node(self, entity_type: str, fields: List[str], row: sqlite3.Row) -> Dict[str, Any]:
+        """Graph node for an entity row"""
+        
+        # Determine visualization node type using blueprint
+        category = row['category'] if 'category' in row.keys() else (row['type'] if 'type' in row.keys() else None)
+        node_type = self._get_node_type_from_entity(entity_type, category)
+        
+        # Prepare entity data
+        entity_data = {field: row[field] for field in fields if field in row.keys() and row[field]}
+        
+        # Get visual attributes from blueprint
+        attributes = self._get_node_attributes(node_type, entity_data)
+        
+        return {
+            'id': f"{entity_type}_{row['id']}",
+            'type': node_type,
+            'label': row['name'],
+            'original_category': category,
+            **attributes
+        }
+    
+    def iter_nodes(self, cursor: sqlite3.Cursor,
+                   node_ids: Optional[Dict[str, List[int]]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield graph nodes for all documents and entities.
+        
+        node_ids limits the nodes to the given row ids per id prefix
+        ('academic', 'topic', ...); prefixes missing from it are skipped.
+        """
+        
+        # Build nodes from documents
+        logger.info("Building document nodes...")
+        
+        for prefix, table, columns in self.DOCUMENT_SOURCES:
+            ids = None if node_ids is None else node_ids.get(prefix)
+            if node_ids is not None and not ids:
+                continue
+            
+            sql = f"""
+            SELECT {', '.join(columns)}
+            FROM {table}
+        """
+            for row in self._select_rows(cursor, sql, ids):
+                yield self._document_node(prefix, row)
+        
+        # Build nodes from entities
+        logger.info("Building entity nodes...")
+        
+        for entity_type, table, fields in self.ENTITY_SOURCES:
+            ids = None if node_ids is None else node_ids.get(entity_type)
+            if node_ids is not None and not ids:
+                continue
+            
+            for row in self._select_rows(cursor, f"SELECT {', '.join(fields)}, id FROM {table}", ids):
+                yield self._entity_node(entity_type, fields, row)
+    
+    def _link(self, row: sqlite3.Row) -> Dict[str, Any]:
+        """Graph link for a relationships row"""
+        
+        # Documents keep their prefixed ids (academic_1), entities become topic_12
+        source_id = graph_node_id(row['source_type'], row['source_id'])
+        target_id = graph_node_id(row['target_type'], row['target_id'])
+        
+        # Get edge attributes from blueprint
+        edge_attrs = self._get_edge_attributes(row['relationship_type'])
+        
+        link = {
+            'source': source_id,
+            'target': target_id,
+            'type': row['relationship_type'],
+            'confidence': row['confidence'] or 1.0,
+            **edge_attrs
+        }
+        
+        # Add metadata if available
+        if row['metadata']:
+            try:
+                metadata = json.loads(row['metadata'])
+                link['metadata'] = metadata
+            except:
+                pass
+        
+        return link
+    
+    def iter_links(self, cursor: sqlite3.Cursor,
+                   endpoints: Optional[Dict[str, List[str]]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield graph links for all relationships.
+        
+        endpoints limits the links to relationships touching the given
+        relationships-style ids per node type ('document': ['academic_1'],
+        'topic': ['12']), each link once.
+        """
+        
+        # Build edges from relationships
+        logger.info("Building relationship edges...")
+        
+        sql = """
+            SELECT source_type, source_id, target_type, target_id, 
+                   relationship_type, confidence, metadata
+            FROM relationships
+        """
+        
+        if endpoints is None:
+            cursor.execute(sql)
+            for row in cursor:
+                yield self._link(row)
+            return
+        
+        seen = set()
+        for node_type, ids in endpoints.items():
+            for start in range(0, len(ids), self.SQL_BATCH_SIZE):
+                batch = ids[start:start + self.SQL_BATCH_SIZE]
+                marks = ', '.join('?' * len(batch))
+                cursor.execute(f"""
+                    SELECT rowid AS row_key, source_type, source_id, target_type, target_id,
+                           relationship_type, confidence, metadata
+                    FROM relationships
+                    WHERE (source_type = ? AND source_id IN ({marks}))
+                       OR (target_type = ? AND target_id IN ({marks}))
+                """, [node_type] + batch + [node_type] + batch)
+                for row in cursor.fetchall():
+                    if row['row_key'] not in seen:
+                        seen.add(row['row_key'])
+                        yield self._link(row)
+    
+    def _graph_metadata(self, type_counts: Dict[str, int], relationship_counts: Dict[str, int],
+                        change_seq: Optional[int] = None, source_database: Optional[str] = None,
+                        extra_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Statistics and legend stored with the graph"""
+        total_nodes = sum(type_counts.values())
+        total_edges = sum(relationship_counts.values())
+        
+        logger.info(f"Built graph with {total_nodes} nodes and {total_edges} edges")
+        logger.info("Node type distribution:")
+        for node_type, count in sorted(type_counts.items(), key=lambda x: x[1], reverse=True):
+            logger.info(f"  {node_type}: {count}")
+        
+        metadata = {
+            'version': 'blueprint-v1.0',
+            'total_nodes': total_nodes,
+            'total_edges': total_edges,
+            'node_types': type_counts,
+            'relationship_types': relationship_counts,
+            'legend': self.viz_config.legend,
+            'node_groups': self.viz_config.node_groups
+        }
+        
+        # Last graph_changes entry reflected in an exported graph, and the
+        # database_id of the database whose log it refers to (see patch_graph)
+        if change_seq is not None:
+            metadata['change_seq'] = change_seq
+        if source_database is not None:
+            metadata['database_id'] = source_database
+        
+        # Optional analyses of the export: 'layout' (nodes carry x/y, see
+        # KG/graph_layout.py), 'communities' (cluster summary, see
+        # KG/graph_communities.py), 'metrics' (centrality, see KG/graph_metrics.py)
+        if extra_metadata:
+            metadata.update(extra_metadata)
+        
+        return metadata
+    
     def build_graph(self) -> Dict[str, Any]:
         """Build knowledge graph from database using blueprint visualization rules"""
         
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         
-        nodes = []
-        links = []
-        
         try:
             cursor = conn.cursor()
-            
-            # Build nodes from documents
-            logger.info("Building document nodes...")
-            
-            # Academic documents
-            cursor.execute("""
-                SELECT id, title, date, domain, document_type
-                FROM academic_documents
-            """)
-            
-            for row in cursor.fetchall():
-                node_id = f"academic_{row['id']}"
-                node_type = self._get_node_type_from_entity('document', None, 'academic_document')
-                
-                entity_data = {
-                    'title': row['title'],
-                    'date': row['date'],
-                    'domain': row['domain'],
-                    'document_type': row['document_type']
-                }
-                
-                attributes = self._get_node_attributes(node_type, entity_data)
-                
-                nodes.append({
-                    'id': node_id,
-                    'type': node_type,
-                    'label': row['title'][:80] + '...' if len(row['title']) > 80 else row['title'],
-                    **attributes
-                })
-            
-            # Chronicle documents
-            cursor.execute("""
-                SELECT id, title, date, note_type
-                FROM chronicle_documents
-            """)
-            
-            for row in cursor.fetchall():
-                node_id = f"chronicle_{row['id']}"
-                node_type = self._get_node_type_from_entity('document', None, 'chronicle_document')
-                
-                entity_data = {
-                    'title': row['title'],
-                    'date': row['date'],
-                    'note_type': row['note_type']
-                }
-                
-                attributes = self._get_node_attributes(node_type, entity_data)
-                
-                nodes.append({
-                    'id': node_id,
-                    'type': node_type,
-                    'label': row['title'],
-                    **attributes
-                })
-            
-            # Build nodes from entities
-            logger.info("Building entity nodes...")
-            
-            entity_tables = [
-                ('topics', 'topic', ['name', 'category', 'description']),
-                ('people', 'person', ['name', 'role', 'affiliation']),
-                ('projects', 'project', ['name', 'description']),
-                ('institutions', 'institution', ['name', 'type', 'location']),
-                ('methods', 'method', ['name', 'category', 'description']),
-                ('applications', 'application', ['name', 'domain', 'description'])
-            ]
-            
-            for table, entity_type, fields in entity_tables:
-                cursor.execute(f"SELECT {', '.join(fields)}, id FROM {table}")
-                
-                for row in cursor.fetchall():
-                    node_id = f"{entity_type}_{row['id']}"
-                    
-                    # Determine visualization node type using blueprint
-                    category = row['category'] if 'category' in row.keys() else (row['type'] if 'type' in row.keys() else None)
-                    node_type = self._get_node_type_from_entity(entity_type, category)
-                    
-                    # Prepare entity data
-                    entity_data = {field: row[field] for field in fields if field in row.keys() and row[field]}
-                    
-                    # Get visual attributes from blueprint
-                    attributes = self._get_node_attributes(node_type, entity_data)
-                    
-                    nodes.append({
-                        'id': node_id,
-                        'type': node_type,
-                        'label': row['name'],
-                        'original_category': category,
-                        **attributes
-                    })
-            
-            # Build edges from relationships
-            logger.info("Building relationship edges...")
-            
-            cursor.execute("""
-                SELECT source_type, source_id, target_type, target_id, 
-                       relationship_type, confidence, metadata
-                FROM relationships
-            """)
-            
-            for row in cursor.fetchall():
-                # Fix document ID mapping - remove duplicate prefixes
-                if row['source_type'] == 'document':
-                    source_id = row['source_id']  # Use academic_1, chronicle_2 directly
-                else:
-                    source_id = f"{row['source_type']}_{row['source_id']}"
-                    
-                if row['target_type'] == 'document':
-                    target_id = row['target_id']  # Use academic_1, chronicle_2 directly
-                else:
-                    target_id = f"{row['target_type']}_{row['target_id']}"
-                
-                # Get edge attributes from blueprint
-                edge_attrs = self._get_edge_attributes(row['relationship_type'])
-                
-                link = {
-                    'source': source_id,
-                    'target': target_id,
-                    'type': row['relationship_type'],
-                    'confidence': row['confidence'] or 1.0,
-                    **edge_attrs
-                }
-                
-                # Add metadata if available
-                if row['metadata']:
-                    try:
-                        metadata = json.loads(row['metadata'])
-                        link['metadata'] = metadata
-                    except:
-                        pass
-                
-                links.append(link)
-            
+            nodes = list(self.iter_nodes(cursor))
+            links = list(self.iter_links(cursor))
         finally:
             conn.close()
         
@@ -246,41 +345,279 @@ class GraphBuilder:
             rel_type = link['type']
             relationship_counts[rel_type] = relationship_counts.get(rel_type, 0) + 1
         
-        logger.info(f"Built graph with {len(nodes)} nodes and {len(links)} edges")
-        logger.info("Node type distribution:")
-        for node_type, count in sorted(type_counts.items(), key=lambda x: x[1], reverse=True):
-            logger.info(f"  {node_type}: {count}")
-        
         # Create graph data structure
         graph_data = {
             'nodes': nodes,
             'links': links,
-            'metadata': {
-                'version': 'blueprint-v1.0',
-                'total_nodes': len(nodes),
-                'total_edges': len(links),
-                'node_types': type_counts,
-                'relationship_types': relationship_counts,
-                'legend': self.viz_config.legend,
-                'node_groups': self.viz_config.node_groups
-            }
+            'metadata': self._graph_metadata(type_counts, relationship_counts)
         }
         
         return graph_data
     
-    def export_graph(self, output_path: str) -> Dict[str, Any]:
-        """Build and export knowledge graph to JSON file"""
+    def _write_graph(self, output_path: str, nodes: Iterable[Dict[str, Any]], links: Iterable[Dict[str, Any]],
+                     change_seq: int, source_database: Optional[str], compact: bool, compress: Optional[str],
+                     extra_metadata: Optional[Dict[str, Any]] = None, snapshot: bool = False) -> Dict[str, Any]:
+        """Stream nodes then links through a GraphWriter (and SnapshotWriter) and return the metadata"""
+        
+        type_counts = {}
+        relationship_counts = {}
+        snapshot_writer = SnapshotWriter(snapshot_path(output_path)) if snapshot else None
+        
+        with GraphWriter(output_path, compact=compact, compress=compress) as writer:
+            for node in nodes:
+                type_counts[node['type']] = type_counts.get(node['type'], 0) + 1
+                writer.write_node(node)
+                if snapshot_writer:
+                    snapshot_writer.write_node(node)
+            
+            for link in links:
+                relationship_counts[link['type']] = relationship_counts.get(link['type'], 0) + 1
+                writer.write_link(link)
+                if snapshot_writer:
+                    snapshot_writer.write_link(link)
+            
+            metadata = self._graph_metadata(type_counts, relationship_counts, change_seq, source_database,
+                                            extra_metadata)
+            writer.finish(metadata)
+        
+        # Written after the JSON, so loaders see it as up to date
+        if snapshot_writer:
+            snapshot_writer.finish(metadata)
+        
+        logger.info(f"Graph saved to {output_path}" +
+                    (f" (and {writer.compressed_path})" if writer.compressed_path else "") +
+                    (f", snapshot {snapshot_writer.output_path}" if snapshot_writer else ""))
+        
+        return metadata
+    
+    def export_graph(self, output_path: str, compact: bool = False, compress: Optional[str] = None,
+                     layout: bool = False, layout_iterations: int = DEFAULT_LAYOUT_ITERATIONS,
+                     communities: bool = False, metrics: bool = False, snapshot: bool = False) -> Dict[str, Any]:
+        """Stream the knowledge graph to a JSON file.
+        
+        Nodes and links are written as they are read, so memory does not grow
+        with the graph. compact drops indentation and stores node/edge styles
+        once per type (see KG/graph_format.py); compress ('gzip' or 'brotli')
+        also writes a pre-compressed copy next to the file. layout computes
+        x/y positions for every node so the UI can skip its force simulation;
+        communities groups nodes into clusters and stores the cluster summary
+        (super-nodes and aggregated links) in the metadata, so large graphs
+        can be shown cluster by cluster; metrics stores degree, PageRank and
+        sampled betweenness on every node and in the node_metrics table.
+        These options hold the graph in memory while they are computed.
+        snapshot also writes the binary snapshot (KG/graph_snapshot.py) that
+        the server and KG tools load instead of parsing the JSON.
+        
+        Returns {'metadata': ...}; the nodes and links are not kept.
+        """
         
         logger.info(f"Building blueprint-driven knowledge graph from {self.db_path}")
-        graph_data = self.build_graph()
         
-        # Save to file
-        with open(output_path, 'w') as f:
-            json.dump(graph_data, f, indent=2)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
         
-        logger.info(f"Graph saved to {output_path}")
+        try:
+            cursor = conn.cursor()
+            # Read first: changes logged while exporting are replayed by the next patch
+            change_seq = current_change_seq(cursor)
+            source_database = database_id(cursor, create=True)
+            conn.commit()
+            nodes = self.iter_nodes(cursor)
+            links = self.iter_links(cursor)
+            extra_metadata = {}
+            
+            if layout or communities or metrics:
+                nodes = list(nodes)
+                links = list(links)
+            
+            if layout:
+                logger.info(f"Computing layout for {len(nodes)} nodes ({layout_iterations} iterations)...")
+                layout_graph(nodes, links, iterations=layout_iterations)
+                extra_metadata['layout'] = {'algorithm': 'fruchterman-reingold', 'iterations': layout_iterations}
+            
+            if communities:
+                levels = assign_communities(nodes, links)
+                extra_metadata['communities'] = self._community_summary(nodes, links, levels)
+            
+            if metrics:
+                extra_metadata['metrics'] = self._node_metrics(conn, nodes, links)
+            
+            metadata = self._write_graph(output_path, nodes, links, change_seq, source_database, compact, compress,
+                                         extra_metadata, snapshot)
+        finally:
+            conn.close()
         
-        return graph_data
+        return {'metadata': metadata}
+    
+    def _community_summary(self, nodes: List[Dict[str, Any]], links: List[Dict[str, Any]],
+                           levels: int) -> Dict[str, Any]:
+        """Communities metadata: algorithm, hierarchy depth and cluster summary"""
+        summary = summarize_communities(nodes, links)
+        logger.info(f"Grouped {len(nodes)} nodes into {len(summary['clusters'])} clusters ({levels} levels)")
+        return {'algorithm': 'label-propagation', 'levels': levels, **summary}
+    
+    def _node_metrics(self, conn: sqlite3.Connection, nodes: List[Dict[str, Any]],
+                      links: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Compute centrality metrics on the nodes and store them in node_metrics"""
+        logger.info(f"Computing centrality metrics for {len(nodes)} nodes...")
+        info = compute_node_metrics(nodes, links)
+        
+        entity_types = {entity_type for entity_type, _, _ in self.ENTITY_SOURCES}
+        rows = []
+        for node in nodes:
+            # Graph ids back to relationships keys: topic_12 -> ('topic', '12'), academic_3 -> document
+            prefix, _, row_id = node['id'].rpartition('_')
+            key = (prefix, row_id) if prefix in entity_types else ('document', node['id'])
+            rows.append((*key, node['degree'], node['pagerank'], node['betweenness']))
+        
+        cursor = conn.cursor()
+        replace_node_metrics(cursor, rows)
+        conn.commit()
+        return info
+    
+    def patch_graph(self, output_path: str, compact: bool = False, compress: Optional[str] = None,
+                    delta_path: Optional[str] = None, layout: bool = False,
+                    communities: bool = False, metrics: bool = False, snapshot: bool = False) -> Dict[str, Any]:
+        """Bring a previously exported graph up to date from the graph_changes log.
+        
+        Only nodes and edges logged since the graph's change_seq are re-read
+        from the database; everything else is kept from the existing file.
+        Falls back to export_graph (with layout/communities/metrics as given)
+        when there is no previous graph, it predates the change log, or it was
+        exported from another database (database_id differs, e.g. after a
+        rebuild) or from further along the log than this database has. Updated
+        nodes keep their position and community; new nodes are placed next to
+        and join the community of their neighbours, and the cluster summary is
+        recomputed (communities are re-detected only by a full export).
+        Centrality metrics, being global, are recomputed for all nodes.
+        delta_path also writes just the changes
+        (upserted/removed nodes and links) as JSON; snapshot rewrites the
+        binary snapshot with the patched graph.
+        
+        Returns {'metadata': ..., 'changed_nodes': N, 'full_rebuild': bool}
+        """
+        
+        graph = load_graph(output_path) if Path(output_path).exists() else None
+        since = graph['metadata'].get('change_seq') if graph else None
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        
+        try:
+            cursor = conn.cursor()
+            source_database = database_id(cursor)
+            if since is None:
+                rebuild = f"No change log baseline in {output_path}"
+            elif source_database is None or graph['metadata'].get('database_id') != source_database:
+                rebuild = f"{output_path} was exported from another database"
+            elif since > current_change_seq(cursor):
+                rebuild = f"{output_path} is ahead of the change log (change {since})"
+            else:
+                rebuild = None
+            
+            if rebuild:
+                conn.close()
+                logger.info(f"{rebuild}, exporting the full graph")
+                result = self.export_graph(output_path, compact=compact, compress=compress,
+                                           layout=layout, communities=communities, metrics=metrics, snapshot=snapshot)
+                return {**result, 'changed_nodes': None, 'full_rebuild': True}
+            
+            last_seq, node_keys, edge_keys = read_changes(cursor, since)
+            if last_seq == since:
+                logger.info(f"{output_path} is up to date (change {since})")
+                if snapshot and fresh_snapshot(output_path) is None:
+                    write_snapshot(snapshot_path(output_path), graph['nodes'], graph['links'], graph['metadata'])
+                return {'metadata': graph['metadata'], 'changed_nodes': 0, 'full_rebuild': False}
+            
+            node_ids = defaultdict(list)
+            for node_type, node_id in node_keys:
+                prefix, row_id = graph_node_id(node_type, node_id).rsplit('_', 1)
+                if row_id.isdigit():
+                    node_ids[prefix].append(int(row_id))
+            
+            endpoints = defaultdict(list)
+            for node_type, node_id in edge_keys:
+                endpoints[node_type].append(node_id)
+            
+            fresh_nodes = {node['id']: node for node in self.iter_nodes(cursor, node_ids)}
+            fresh_links = list(self.iter_links(cursor, endpoints))
+        finally:
+            conn.close()
+        
+        upserted_nodes = list(fresh_nodes.values())
+        changed = {graph_node_id(*key) for key in node_keys}
+        rewired = {graph_node_id(*key) for key in edge_keys}
+        
+        # Changed nodes are replaced in place, or dropped if their row is gone
+        nodes = []
+        removed_nodes = []
+        for node in graph['nodes']:
+            if node['id'] in changed:
+                fresh = fresh_nodes.pop(node['id'], None)
+                if fresh is None:
+                    removed_nodes.append(node['id'])
+                    continue
+                if 'x' in node and 'y' in node:
+                    fresh['x'], fresh['y'] = node['x'], node['y']
+                if 'community' in node:
+                    fresh['community'] = node['community']
+                node = fresh
+            nodes.append(node)
+        nodes.extend(fresh_nodes.values())  # New nodes
+        
+        # Links touching rewired or removed nodes are replaced by the fresh ones
+        stale = rewired | set(removed_nodes)
+        fresh_keys = {(link['source'], link['target'], link['type']) for link in fresh_links}
+        links = []
+        removed_links = []
+        for link in graph['links']:
+            if link['source'] in stale or link['target'] in stale:
+                key = (link['source'], link['target'], link['type'])
+                if key not in fresh_keys:
+                    removed_links.append(list(key))
+                continue
+            links.append(link)
+        links.extend(fresh_links)
+        
+        extra_metadata = {}
+        
+        if 'layout' in graph['metadata']:
+            place_new_nodes(nodes, links)
+            extra_metadata['layout'] = graph['metadata']['layout']
+        
+        if 'communities' in graph['metadata']:
+            assign_new_nodes(nodes, links)
+            levels = graph['metadata']['communities'].get('levels', 1)
+            extra_metadata['communities'] = self._community_summary(nodes, links, levels)
+        
+        if 'metrics' in graph['metadata']:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                extra_metadata['metrics'] = self._node_metrics(conn, nodes, links)
+            finally:
+                conn.close()
+        
+        metadata = self._write_graph(output_path, nodes, links, last_seq, source_database, compact, compress,
+                                     extra_metadata, snapshot)
+        
+        logger.info(f"Patched {output_path} with changes {since + 1}-{last_seq}: "
+                    f"{len(upserted_nodes)} nodes upserted, {len(removed_nodes)} removed, "
+                    f"{len(fresh_links)} links refreshed, {len(removed_links)} removed")
+        
+        if delta_path:
+            delta = {
+                'from_change_seq': since,
+                'to_change_seq': last_seq,
+                'nodes': upserted_nodes,
+                'removed_nodes': removed_nodes,
+                'links': fresh_links,
+                'removed_links': removed_links
+            }
+            with open(delta_path, 'w', encoding='utf-8') as f:
+                json.dump(delta, f, separators=(',', ':'))
+            logger.info(f"Delta saved to {delta_path}")
+        
+        return {'metadata': metadata, 'changed_nodes': len(changed | rewired), 'full_rebuild': False}
 
 
 def main():
@@ -293,6 +630,25 @@ def main():
                        help='Output JSON file path')
     parser.add_argument('--validate-blueprints', action='store_true',
                        help='Validate blueprint configurations')
+    parser.add_argument('--pretty', action='store_true',
+                       help='Write the classic indented layout instead of the compact encoding')
+    parser.add_argument('--compress', choices=['gzip', 'brotli', 'none'],
+                       default='brotli' if BROTLI_AVAILABLE else 'gzip',
+                       help='Also write a pre-compressed copy (default: brotli if installed, else gzip)')
+    parser.add_argument('--layout', action='store_true',
+                       help='Precompute node x/y positions so the UI can render without physics')
+    parser.add_argument('--layout-iterations', type=int, default=DEFAULT_LAYOUT_ITERATIONS,
+                       help=f'Force-directed layout iterations (default: {DEFAULT_LAYOUT_ITERATIONS})')
+    parser.add_argument('--communities', action='store_true',
+                       help='Detect node communities and store the cluster summary for level-of-detail views')
+    parser.add_argument('--metrics', action='store_true',
+                       help='Compute degree, PageRank and betweenness (stored on nodes and in node_metrics)')
+    parser.add_argument('--snapshot', action='store_true',
+                       help='Also write a binary snapshot (.npz) that the server and KG tools load with memory mapping')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Patch the existing output from the graph change log instead of rebuilding it')
+    parser.add_argument('--delta', metavar='PATH',
+                       help='With --incremental, also write the applied changes to PATH')
     
     args = parser.parse_args()
     
@@ -310,7 +666,19 @@ def main():
     
     # Build graph
     builder = GraphBuilder(args.db_path)
-    graph_data = builder.export_graph(args.output)
+    compress = None if args.compress == 'none' else args.compress
+    if args.incremental:
+        graph_data = builder.patch_graph(args.output, compact=not args.pretty, compress=compress,
+                                         delta_path=args.delta, layout=args.layout,
+                                         communities=args.communities, metrics=args.metrics,
+                                         snapshot=args.snapshot)
+        if not graph_data['full_rebuild']:
+            print(f"\nPatched {graph_data['changed_nodes']} changed nodes from the change log")
+    else:
+        graph_data = builder.export_graph(args.output, compact=not args.pretty, compress=compress,
+                                          layout=args.layout, layout_iterations=args.layout_iterations,
+                                          communities=args.communities, metrics=args.metrics,
+                                          snapshot=args.snapshot)
     
     # Print statistics
     print(f"\nBlueprint-Driven Knowledge Graph Generated!")
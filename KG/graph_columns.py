@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Columnar knowledge graph
+Holds a loaded graph as NumPy columns (node type codes, link endpoint
+indices, link type codes) next to the original node and link dicts, so tools
+can select nodes and links with boolean masks instead of repeated passes over
+lists of dicts. Field fallbacks (source/from, target/to, type/relationship/
+label) are resolved once, when the columns are built.
+
+from_file() reads the binary snapshot (KG/graph_snapshot.py) instead of the
+JSON when one was written with the graph; nodes and links are then decoded
+only when accessed.
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from KG.graph_format import load_graph
+from KG.graph_snapshot import GraphSnapshot, adjacency, fresh_snapshot
+
+
+def _encode(values: Iterable[str]) -> Tuple[List[str], np.ndarray]:
+    """Dictionary-encode strings: (distinct values in first-seen order, code per value)"""
+    codes: Dict[str, int] = {}
+    encoded = [codes.setdefault(value, len(codes)) for value in values]
+    return list(codes), np.array(encoded, dtype=np.int32)
+
+
+def link_endpoints(link: Dict[str, Any]) -> Tuple[Any, Any]:
+    """Source and target id of a link (vis.js from/to accepted)"""
+    return link.get('source', link.get('from')), link.get('target', link.get('to'))
+
+
+def link_type(link: Dict[str, Any]) -> str:
+    """Relationship type of a link (older exports use relationship or label)"""
+    return link.get('type', link.get('relationship', link.get('label', 'unknown')))
+
+
+class GraphColumns:
+    """Column arrays over a graph's nodes and links.
+
+    source/target are node indices, or -1 for endpoints that are not nodes of
+    the graph; node_communities is -1 for nodes without a community. Masks
+    are boolean arrays over nodes or links.
+    """
+
+    def __init__(self, graph: Dict[str, Any]):
+        self.nodes: Sequence[Dict[str, Any]] = graph.get('nodes', [])
+        self.links: Sequence[Dict[str, Any]] = graph.get('links', [])
+        self.metadata: Dict[str, Any] = graph.get('metadata', {})
+
+        self.node_ids: List[Any] = [node.get('id') for node in self.nodes]
+        self.position: Dict[Any, int] = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        self.node_labels: List[str] = [str(node.get('label', '')) for node in self.nodes]
+        self.node_type_names, self.node_types = _encode(node.get('type', 'unknown') for node in self.nodes)
+        self.node_communities = np.fromiter((node.get('community', -1) for node in self.nodes),
+                                            dtype=np.int64, count=len(self.nodes))
+
+        endpoints = [link_endpoints(link) for link in self.links]
+        self.source = np.fromiter((self.position.get(source, -1) for source, _ in endpoints),
+                                  dtype=np.int64, count=len(endpoints))
+        self.target = np.fromiter((self.position.get(target, -1) for _, target in endpoints),
+                                  dtype=np.int64, count=len(endpoints))
+        self.link_type_names, self.link_types = _encode(link_type(link) for link in self.links)
+        self._adjacency: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @classmethod
+    def from_snapshot(cls, snapshot: GraphSnapshot) -> 'GraphColumns':
+        """Columns over a memory-mapped snapshot (no per-node work beyond the id index)"""
+        columns = cls.__new__(cls)
+        columns.nodes = snapshot.nodes
+        columns.links = snapshot.links
+        columns.metadata = snapshot.metadata
+        columns.node_ids = snapshot.node_ids
+        columns.position = {node_id: i for i, node_id in enumerate(snapshot.node_ids)}
+        columns.node_labels = snapshot.node_labels
+        columns.node_type_names, columns.node_types = snapshot.node_type_names, snapshot.node_types
+        columns.node_communities = snapshot.node_communities
+        columns.source, columns.target = snapshot.source, snapshot.target
+        columns.link_type_names, columns.link_types = snapshot.link_type_names, snapshot.link_types
+        columns._adjacency = snapshot.adjacency
+        return columns
+
+    @classmethod
+    def from_file(cls, path: str) -> 'GraphColumns':
+        """Load a graph file (any layout load_graph accepts, or a snapshot) into columns.
+
+        A snapshot written after the JSON file is loaded in its place.
+        """
+        snapshot = fresh_snapshot(path)
+        if snapshot is not None:
+            return cls.from_snapshot(GraphSnapshot(snapshot))
+        return cls(load_graph(path))
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def num_links(self) -> int:
+        return len(self.links)
+
+    def all_nodes(self) -> np.ndarray:
+        return np.ones(self.num_nodes, dtype=bool)
+
+    def all_links(self) -> np.ndarray:
+        return np.ones(self.num_links, dtype=bool)
+
+    def node_type_mask(self, types: Iterable[str]) -> np.ndarray:
+        """Nodes whose type is one of types"""
+        wanted = set(types)
+        codes = [i for i, name in enumerate(self.node_type_names) if name in wanted]
+        return np.isin(self.node_types, codes)
+
+    def link_type_mask(self, types: Iterable[str]) -> np.ndarray:
+        """Links whose relationship type is one of types"""
+        wanted = set(types)
+        codes = [i for i, name in enumerate(self.link_type_names) if name in wanted]
+        return np.isin(self.link_types, codes)
+
+    def endpoint_mask(self, node_mask: np.ndarray) -> np.ndarray:
+        """Links with no endpoint outside node_mask (endpoints that are not nodes do not count)"""
+        if self.num_nodes == 0:
+            return (self.source < 0) & (self.target < 0)
+        source_ok = (self.source < 0) | node_mask[np.maximum(self.source, 0)]
+        target_ok = (self.target < 0) | node_mask[np.maximum(self.target, 0)]
+        return source_ok & target_ok
+
+    def adjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        """CSR (offsets, link indices) of the links at each node (see graph_snapshot.adjacency)"""
+        if self._adjacency is None:
+            self._adjacency = adjacency(self.num_nodes, self.source, self.target)
+        return self._adjacency
+
+    def degree(self, link_mask: np.ndarray) -> np.ndarray:
+        """Number of selected links at each node"""
+        source = self.source[link_mask]
+        target = self.target[link_mask]
+        return (np.bincount(source[source >= 0], minlength=self.num_nodes)
+                + np.bincount(target[target >= 0], minlength=self.num_nodes))
+
+    def node_type_counts(self, node_mask: np.ndarray) -> Dict[str, int]:
+        counts = np.bincount(self.node_types[node_mask], minlength=len(self.node_type_names))
+        return {name: int(count) for name, count in zip(self.node_type_names, counts) if count}
+
+    def link_type_counts(self, link_mask: np.ndarray) -> Dict[str, int]:
+        counts = np.bincount(self.link_types[link_mask], minlength=len(self.link_type_names))
+        return {name: int(count) for name, count in zip(self.link_type_names, counts) if count}
+
+    def select_nodes(self, node_mask: np.ndarray) -> List[Dict[str, Any]]:
+        return [self.nodes[i] for i in np.flatnonzero(node_mask)]
+
+    def select_links(self, link_mask: np.ndarray) -> List[Dict[str, Any]]:
+        return [self.links[k] for k in np.flatnonzero(link_mask)]
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Graph communities
+Label propagation community detection with NumPy, repeated on the graph of
+communities (nodes merged, edge weights summed) until few enough clusters
+remain. The resulting cluster summary (super-nodes with aggregated edge
+weights) lets the web UI show graphs too large to draw node by node and
+expand one cluster at a time.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+
+
+# Stop coarsening once there are at most this many clusters
+MAX_CLUSTERS = 200
+
+# Label propagation rounds per level (it usually settles much sooner)
+MAX_PROPAGATION_ROUNDS = 100
+
+# Super-node ids in the cluster summary and the graph API
+CLUSTER_PREFIX = 'cluster_'
+
+
+def cluster_id(community: int) -> str:
+    """Super-node id of a community number"""
+    return f"{CLUSTER_PREFIX}{community}"
+
+
+def label_propagation(num_nodes: int, source: np.ndarray, target: np.ndarray, weights: np.ndarray,
+                      seed: int = 0, max_rounds: int = MAX_PROPAGATION_ROUNDS) -> np.ndarray:
+    """Community label per node by weighted label propagation.
+
+    Each round a random half of the nodes adopt the label with the largest
+    total edge weight among their neighbours (votes are scaled by
+    1/sqrt(neighbour degree) so hubs do not sweep the graph). A node keeps its
+    own label on ties, and updating only half the nodes per round avoids the
+    oscillation plain synchronous updates show on bipartite graphs.
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.arange(num_nodes)
+    if len(source) == 0:
+        return labels
+
+    # Both directions of every edge: node receives a vote from neighbour
+    node = np.concatenate([source, target])
+    neighbour = np.concatenate([target, source])
+    strength = np.bincount(node, weights=np.concatenate([weights, weights]), minlength=num_nodes)
+    vote = np.concatenate([weights, weights]) / np.sqrt(np.maximum(strength[neighbour], 1e-12))
+
+    for _ in range(max_rounds):
+        # Total vote per (node, label); own label gets a slight edge to settle ties
+        keys = np.concatenate([node * num_nodes + labels[neighbour], np.arange(num_nodes) * num_nodes + labels])
+        values = np.concatenate([vote, np.full(num_nodes, 1e-9)])
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse, weights=values)
+        key_node = unique_keys // num_nodes
+
+        # Best label per node: sort by node, then total (descending), then random priority
+        priority = rng.random(len(unique_keys))
+        order = np.lexsort((priority, -totals, key_node))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = key_node[order][1:] != key_node[order][:-1]
+        best = np.empty(num_nodes, dtype=np.int64)
+        best[key_node[order][first]] = unique_keys[order][first] % num_nodes
+
+        changing = best != labels
+        if not changing.any():
+            break
+        update = changing & (rng.random(num_nodes) < 0.5)
+        labels = np.where(update, best, labels)
+
+    return labels
+
+
+def detect_communities(num_nodes: int, edges: List[Tuple[int, int]], max_clusters: int = MAX_CLUSTERS,
+                       seed: int = 0) -> Tuple[np.ndarray, int]:
+    """Hierarchical label propagation over (i, j) edges.
+
+    Communities found at one level become the nodes of the next (edge weights
+    summed) until at most max_clusters remain or nothing merges further. Nodes
+    without edges share one community. Communities are numbered by size,
+    largest first. Returns (community per node, number of levels).
+    """
+    if num_nodes == 0:
+        return np.zeros(0, dtype=np.int64), 0
+
+    pairs = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    connected = np.zeros(num_nodes, dtype=bool)
+    connected[pairs.ravel()] = True
+
+    membership = np.arange(num_nodes)
+    size = num_nodes
+    source, target = pairs[:, 0], pairs[:, 1]
+    weights = np.ones(len(pairs))
+    levels = 0
+
+    while True:
+        labels = label_propagation(size, source, target, weights, seed=seed + levels)
+        _, labels = np.unique(labels, return_inverse=True)
+        count = int(labels.max()) + 1
+        levels += 1
+        membership = labels[membership]
+        if count == size or count <= max_clusters:
+            break
+
+        # Contract: one node per community, parallel edges summed
+        source, target = labels[source], labels[target]
+        keep = source != target
+        low = np.minimum(source[keep], target[keep])
+        high = np.maximum(source[keep], target[keep])
+        pair_keys, inverse = np.unique(low * count + high, return_inverse=True)
+        weights = np.bincount(inverse, weights=weights[keep])
+        source, target = pair_keys // count, pair_keys % count
+        size = count
+
+    # Unconnected nodes form a single community
+    if (~connected).any():
+        membership = np.where(connected, membership, membership.max() + 1)
+
+    # Renumber by size, largest first (ties by first member)
+    _, first, inverse, counts = np.unique(membership, return_index=True, return_inverse=True, return_counts=True)
+    rank = np.empty(len(counts), dtype=np.int64)
+    rank[np.lexsort((first, -counts))] = np.arange(len(counts))
+    return rank[inverse], levels
+
+
+def assign_communities(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]],
+                       max_clusters: int = MAX_CLUSTERS, seed: int = 0) -> int:
+    """Store a 'community' number on graph nodes (in place); returns the number of levels"""
+    position = {node['id']: i for i, node in enumerate(nodes)}
+    edges = [(position[link['source']], position[link['target']]) for link in links
+             if link['source'] in position and link['target'] in position]
+
+    membership, levels = detect_communities(len(nodes), edges, max_clusters=max_clusters, seed=seed)
+    for node, community in zip(nodes, membership):
+        node['community'] = int(community)
+    return levels
+
+
+def assign_new_nodes(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]]) -> int:
+    """Give nodes without a community the most common one among their neighbours.
+
+    Used when patching a graph with communities; nodes with no assigned
+    neighbours each start a new community. Returns the number of nodes assigned.
+    """
+    by_id = {node['id']: node for node in nodes}
+    missing = [node for node in nodes if 'community' not in node]
+    if not missing:
+        return 0
+
+    neighbours: Dict[str, List[str]] = {node['id']: [] for node in missing}
+    for link in links:
+        if link['source'] in neighbours:
+            neighbours[link['source']].append(link['target'])
+        if link['target'] in neighbours:
+            neighbours[link['target']].append(link['source'])
+
+    next_community = max((node['community'] for node in nodes if 'community' in node), default=-1) + 1
+    for node in missing:
+        votes = Counter(by_id[other]['community'] for other in neighbours[node['id']]
+                        if other in by_id and 'community' in by_id[other])
+        if votes:
+            node['community'] = min(votes, key=lambda community: (-votes[community], community))
+        else:
+            node['community'] = next_community
+            next_community += 1
+
+    return len(missing)
+
+
+def summarize_communities(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cluster super-nodes and the aggregated links between them.
+
+    Each cluster has an id, the label of its best-connected member, its size,
+    node type counts, internal link count and (for laid-out graphs) the
+    centroid of its members. Links carry the number of graph links between
+    two clusters as weight, heaviest first.
+    """
+    community_of = {node['id']: node['community'] for node in nodes if 'community' in node}
+    degree: Dict[str, int] = defaultdict(int)
+    internal: Dict[int, int] = defaultdict(int)
+    between: Dict[Tuple[int, int], int] = defaultdict(int)
+
+    for link in links:
+        source = community_of.get(link['source'])
+        target = community_of.get(link['target'])
+        if source is None or target is None:
+            continue
+        degree[link['source']] += 1
+        degree[link['target']] += 1
+        if source == target:
+            internal[source] += 1
+        else:
+            between[(min(source, target), max(source, target))] += 1
+
+    members: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    for node in nodes:
+        if 'community' in node:
+            members[node['community']].append(node)
+
+    clusters = []
+    for community in sorted(members):
+        group = members[community]
+        top = max(group, key=lambda node: degree[node['id']])
+        cluster = {
+            'id': cluster_id(community),
+            'community': community,
+            'label': top.get('label', top['id']),
+            'size': len(group),
+            'node_types': dict(Counter(node.get('type', 'default') for node in group)),
+            'internal_links': internal[community]
+        }
+        if all('x' in node and 'y' in node for node in group):
+            cluster['x'] = round(sum(node['x'] for node in group) / len(group), 1)
+            cluster['y'] = round(sum(node['y'] for node in group) / len(group), 1)
+        clusters.append(cluster)
+
+    cluster_links = [
+        {'source': cluster_id(source), 'target': cluster_id(target), 'weight': weight}
+        for (source, target), weight in sorted(between.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+    return {'clusters': clusters, 'links': cluster_links}
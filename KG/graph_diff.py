@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Knowledge graph diff
+Compares two graphs loaded as columns (KG/graph_columns.py). Node ids and
+links ((source, target, type) triples) are encoded as sorted integer keys
+shared by both graphs, so added, removed and kept items come from array
+set operations; only items kept on both sides are compared field by
+field. The result converts to the same delta layout that
+patch_graph() writes (nodes/removed_nodes, links/removed_links).
+"""
+
+import json
+from typing import Dict, List, Any, Iterable, Tuple
+
+import numpy as np
+
+from KG.graph_columns import GraphColumns, link_endpoints
+
+
+# Fields recomputed by every export (layout, communities, centrality); a node
+# whose other fields are unchanged is not reported as changed
+DERIVED_FIELDS = ('x', 'y', 'community', 'degree', 'pagerank', 'betweenness')
+
+
+def _changed(old_items: List[Dict[str, Any]], new_items: List[Dict[str, Any]],
+             old_index: np.ndarray, new_index: np.ndarray, ignore: frozenset) -> np.ndarray:
+    """Whether each matched (old, new) pair differs outside the ignored fields"""
+    def differs(old_item, new_item):
+        if old_item == new_item:  # Common case, compared in C
+            return False
+        return ({key: value for key, value in old_item.items() if key not in ignore}
+                != {key: value for key, value in new_item.items() if key not in ignore})
+
+    return np.fromiter((differs(old_items[i], new_items[j]) for i, j in zip(old_index.tolist(), new_index.tolist())),
+                       dtype=bool, count=len(old_index))
+
+
+class _KeyEncoder:
+    """Integer codes for node ids and relationship types shared by both graphs"""
+
+    def __init__(self):
+        self.node_codes: Dict[Any, int] = {}
+        self.type_codes: Dict[str, int] = {}
+
+    def nodes(self, columns: GraphColumns) -> np.ndarray:
+        codes = self.node_codes
+        return np.fromiter((codes.setdefault(node_id, len(codes)) for node_id in columns.node_ids),
+                           dtype=np.int64, count=columns.num_nodes)
+
+    def endpoints(self, columns: GraphColumns, node_keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Codes of link endpoints; endpoints that are not nodes are encoded by id"""
+        ends = []
+        for index, side in ((columns.source, 0), (columns.target, 1)):
+            codes = np.where(index >= 0, node_keys[np.maximum(index, 0)] if len(node_keys) else -1, -1)
+            for k in np.flatnonzero(index < 0).tolist():
+                codes[k] = self.node_codes.setdefault(link_endpoints(columns.links[k])[side], len(self.node_codes))
+            ends.append(codes)
+        return ends[0], ends[1]
+
+    def link_types(self, columns: GraphColumns) -> np.ndarray:
+        mapping = np.array([self.type_codes.setdefault(name, len(self.type_codes))
+                            for name in columns.link_type_names], dtype=np.int64)
+        return mapping[columns.link_types] if len(mapping) else np.zeros(0, dtype=np.int64)
+
+
+def _link_keys(sources: List[np.ndarray], targets: List[np.ndarray], types: List[np.ndarray],
+               num_codes: int, num_types: int) -> List[np.ndarray]:
+    """One int64 key per (source, target, type) link, comparable across graphs"""
+    if num_codes * num_codes * max(num_types, 1) < 2 ** 62:
+        return [(source * num_codes + target) * num_types + kind
+                for source, target, kind in zip(sources, targets, types)]
+
+    # Too many ids for arithmetic keys: rank the distinct triples instead
+    stacked = np.concatenate([np.stack([s, t, k], axis=1) for s, t, k in zip(sources, targets, types)])
+    _, dense = np.unique(stacked, axis=0, return_inverse=True)
+    splits = np.cumsum([len(s) for s in sources])[:-1]
+    return np.split(dense.reshape(-1).astype(np.int64), splits)
+
+
+def _match(old_keys: np.ndarray, new_keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Merge two key arrays (first occurrence of each key).
+
+    Returns (removed old indices, added new indices, matched old indices,
+    matched new indices), each in original order.
+    """
+    old_unique, old_first = np.unique(old_keys, return_index=True)
+    new_unique, new_first = np.unique(new_keys, return_index=True)
+    _, in_old, in_new = np.intersect1d(old_unique, new_unique, assume_unique=True, return_indices=True)
+
+    removed = np.delete(old_first, in_old)
+    added = np.delete(new_first, in_new)
+    matched_old, matched_new = old_first[in_old], new_first[in_new]
+    order = np.argsort(matched_new, kind='stable')
+    return np.sort(removed), np.sort(added), matched_old[order], matched_new[order]
+
+
+def diff_graphs(old: GraphColumns, new: GraphColumns,
+                ignore_fields: Iterable[str] = DERIVED_FIELDS) -> Dict[str, np.ndarray]:
+    """Differences between two graphs as index arrays.
+
+    Nodes are matched by id and links by (source, target, type); matched
+    items are changed when any field outside ignore_fields differs. Indices of
+    removed items refer to old, all others to new.
+    """
+    ignore = frozenset(ignore_fields)
+    encoder = _KeyEncoder()
+    old_nodes, new_nodes = encoder.nodes(old), encoder.nodes(new)
+    old_source, old_target = encoder.endpoints(old, old_nodes)
+    new_source, new_target = encoder.endpoints(new, new_nodes)
+    old_types, new_types = encoder.link_types(old), encoder.link_types(new)
+    old_links, new_links = _link_keys([old_source, new_source], [old_target, new_target], [old_types, new_types],
+                                      len(encoder.node_codes), len(encoder.type_codes))
+
+    diff = {}
+    for name, old_keys, new_keys, old_items, new_items in (('nodes', old_nodes, new_nodes, old.nodes, new.nodes),
+                                                           ('links', old_links, new_links, old.links, new.links)):
+        removed, added, kept_old, kept_new = _match(old_keys, new_keys)
+        changed = _changed(old_items, new_items, kept_old, kept_new, ignore)
+        diff[f'removed_{name}'] = removed
+        diff[f'added_{name}'] = added
+        diff[f'changed_{name}'] = kept_new[changed]
+    return diff
+
+
+def diff_counts(old: GraphColumns, new: GraphColumns, diff: Dict[str, np.ndarray]) -> Dict[str, Dict[str, int]]:
+    """Per-type counts of every change set ({'added_nodes': {'topic': 3}, ...})"""
+    counts = {}
+    for name, index in diff.items():
+        columns = old if name.startswith('removed') else new
+        if name.endswith('nodes'):
+            codes, names = columns.node_types[index], columns.node_type_names
+        else:
+            codes, names = columns.link_types[index], columns.link_type_names
+        totals = np.bincount(codes, minlength=len(names))
+        counts[name] = {type_name: int(total) for type_name, total in zip(names, totals) if total}
+    return counts
+
+
+def diff_delta(old: GraphColumns, new: GraphColumns, diff: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Machine-readable delta turning old into new.
+
+    Same layout as the patch_graph() delta: nodes holds added and changed
+    nodes in full, removed_nodes their ids, links the added and changed links,
+    removed_links [source, target, type] triples. added_/changed_nodes list
+    ids, and summary the per-type counts.
+    """
+    upserted_nodes = np.sort(np.concatenate([diff['added_nodes'], diff['changed_nodes']]))
+    upserted_links = np.sort(np.concatenate([diff['added_links'], diff['changed_links']]))
+
+    removed_links = []
+    for k in diff['removed_links'].tolist():
+        source, target = link_endpoints(old.links[k])
+        removed_links.append([source, target, old.link_type_names[old.link_types[k]]])
+
+    return {
+        'from_change_seq': old.metadata.get('change_seq'),
+        'to_change_seq': new.metadata.get('change_seq'),
+        'nodes': [new.nodes[i] for i in upserted_nodes.tolist()],
+        'removed_nodes': [old.node_ids[i] for i in diff['removed_nodes'].tolist()],
+        'links': [new.links[k] for k in upserted_links.tolist()],
+        'removed_links': removed_links,
+        'added_nodes': [new.node_ids[i] for i in diff['added_nodes'].tolist()],
+        'changed_nodes': [new.node_ids[i] for i in diff['changed_nodes'].tolist()],
+        'summary': diff_counts(old, new, diff)
+    }
+
+
+def write_delta(delta: Dict[str, Any], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(delta, f, separators=(',', ':'))
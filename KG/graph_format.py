@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Knowledge graph file format
+Streams graph JSON to disk node by node, in the classic indented layout or a
+compact encoding where node and edge styles (which only depend on the node or
+relationship type) are stored once in shared style tables. Optionally writes a
+pre-compressed copy (.gz, or .br when brotli is installed) alongside.
+"""
+
+import gzip
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+
+COMPACT_FORMAT = 'compact-v1'
+
+# Attributes determined by the node type / relationship type alone
+NODE_STYLE_FIELDS = ('color', 'size')
+EDGE_STYLE_FIELDS = ('color', 'width', 'style')
+
+COMPRESSED_SUFFIXES = {'gzip': '.gz', 'brotli': '.br'}
+
+# Bytes buffered before they are handed to the file and compressor
+WRITE_BUFFER_SIZE = 1 << 16
+
+
+class GraphWriter:
+    """Write a knowledge graph incrementally.
+
+    Call write_node() for every node, then write_link() for every link, then
+    finish(metadata). Files are written under a temporary name and moved into
+    place by finish(), so readers never see a partial graph.
+    """
+
+    def __init__(self, output_path: str, compact: bool = True, compress: Optional[str] = None):
+        if compress is not None and compress not in COMPRESSED_SUFFIXES:
+            raise ValueError(f"Unknown compression '{compress}' (use gzip or brotli)")
+        if compress == 'brotli' and not BROTLI_AVAILABLE:
+            raise ValueError("brotli compression requested but the brotli package is not installed")
+
+        self.output_path = Path(output_path)
+        self.compact = compact
+        self.compress = compress
+
+        self.compressed_path = None
+        if compress:
+            self.compressed_path = self.output_path.with_name(self.output_path.name + COMPRESSED_SUFFIXES[compress])
+
+        self._temp_paths = [self.output_path.with_name(self.output_path.name + '.tmp')]
+        self._file = open(self._temp_paths[0], 'wb')
+        self._gzip = None
+        self._brotli = None
+        self._compressed_file = None
+        if compress:
+            self._temp_paths.append(self.compressed_path.with_name(self.compressed_path.name + '.tmp'))
+            self._compressed_file = open(self._temp_paths[1], 'wb')
+            if compress == 'gzip':
+                self._gzip = gzip.GzipFile(fileobj=self._compressed_file, mode='wb', compresslevel=9)
+            else:
+                self._brotli = brotli.Compressor(quality=11)
+
+        self._buffer = []
+        self._buffered = 0
+        self._section = None
+        self._sections = []
+        self._count = 0
+
+        self.node_styles: Dict[str, Dict[str, Any]] = {}
+        self.edge_styles: Dict[str, Dict[str, Any]] = {}
+
+        self._write('{"format":' + json.dumps(COMPACT_FORMAT) if compact else '{')
+
+    # Output plumbing
+
+    def _write(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= WRITE_BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        data = ''.join(self._buffer).encode('utf-8')
+        self._buffer = []
+        self._buffered = 0
+        self._file.write(data)
+        if self._gzip:
+            self._gzip.write(data)
+        elif self._brotli:
+            self._compressed_file.write(self._brotli.process(data))
+
+    def _dumps(self, value: Any, depth: int) -> str:
+        """Serialize a value nested depth levels deep, like json.dump(indent=2)"""
+        if self.compact:
+            return json.dumps(value, separators=(',', ':'))
+        return json.dumps(value, indent=2).replace('\n', '\n' + '  ' * depth)
+
+    def _key(self, key: str, first: bool = False) -> str:
+        if self.compact:
+            return ('' if first else ',') + json.dumps(key) + ':'
+        return ('\n' if first else ',\n') + '  ' + json.dumps(key) + ': '
+
+    def _open_section(self, section: str):
+        if self._section == section:
+            return
+        self._close_section()
+        self._write(self._key(section, first=not self.compact and section == 'nodes'))
+        self._section = section
+        self._sections.append(section)
+        self._count = 0
+
+    def _close_section(self):
+        if self._section is None:
+            return
+        if self._count == 0:
+            self._write('[]')
+        else:
+            self._write(']' if self.compact else '\n  ]')
+        self._section = None
+
+    def _item(self, section: str, item: Dict[str, Any]):
+        self._open_section(section)
+        if self.compact:
+            self._write(('[' if self._count == 0 else ',') + self._dumps(item, 2))
+        else:
+            self._write(('[\n' if self._count == 0 else ',\n') + '    ' + self._dumps(item, 2))
+        self._count += 1
+
+    @staticmethod
+    def _intern_style(item: Dict[str, Any], fields, styles: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Move style fields into the shared table (kept inline if they differ from it)"""
+        style = {field: item[field] for field in fields if field in item}
+        if styles.setdefault(item.get('type'), style) != style:
+            return item
+        return {key: value for key, value in item.items() if key not in style}
+
+    # Graph content
+
+    def write_node(self, node: Dict[str, Any]):
+        if self.compact:
+            node = self._intern_style(node, NODE_STYLE_FIELDS, self.node_styles)
+        self._item('nodes', node)
+
+    def write_link(self, link: Dict[str, Any]):
+        if 'nodes' not in self._sections:
+            self._open_section('nodes')
+        if self.compact:
+            link = self._intern_style(link, EDGE_STYLE_FIELDS, self.edge_styles)
+        self._item('links', link)
+
+    def finish(self, metadata: Dict[str, Any]):
+        """Write styles and metadata, close the files and move them into place"""
+        for section in ('nodes', 'links'):
+            if section not in self._sections:
+                self._open_section(section)
+        self._close_section()
+
+        if self.compact:
+            self._write(self._key('node_styles') + self._dumps(self.node_styles, 1))
+            self._write(self._key('edge_styles') + self._dumps(self.edge_styles, 1))
+        self._write(self._key('metadata') + self._dumps(metadata, 1))
+        self._write('}' if self.compact else '\n}')
+        self._flush()
+
+        self._close_files()
+        os.replace(self._temp_paths[0], self.output_path)
+        if self.compressed_path:
+            os.replace(self._temp_paths[1], self.compressed_path)
+
+    def _close_files(self):
+        if self._gzip:
+            self._gzip.close()
+            self._gzip = None
+        if self._brotli:
+            self._compressed_file.write(self._brotli.finish())
+            self._brotli = None
+        if self._compressed_file:
+            self._compressed_file.close()
+        self._file.close()
+
+    def abort(self):
+        """Discard a partially written graph"""
+        self._close_files()
+        for path in self._temp_paths:
+            if path.exists():
+                path.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        return False
+
+
+def expand_graph(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a compact graph to the classic layout (styles inlined per node/link).
+
+    Graphs already in the classic layout are returned unchanged.
+    """
+    if data.get('format') != COMPACT_FORMAT:
+        return data
+
+    node_styles = data.get('node_styles', {})
+    edge_styles = data.get('edge_styles', {})
+
+    nodes = []
+    for node in data.get('nodes', []):
+        expanded = dict(node)
+        # Style fields follow type/label/(original_category) as in the classic export
+        style = node_styles.get(node.get('type'), {})
+        ordered = {key: expanded.pop(key) for key in ('id', 'type', 'label', 'original_category') if key in expanded}
+        nodes.append({**ordered, **style, **expanded})  # Inline styles override the table
+
+    links = []
+    for link in data.get('links', []):
+        expanded = dict(link)
+        style = edge_styles.get(link.get('type'), {})
+        ordered = {key: expanded.pop(key) for key in ('source', 'target', 'type', 'confidence') if key in expanded}
+        links.append({**ordered, **style, **expanded})
+
+    return {'nodes': nodes, 'links': links, 'metadata': data.get('metadata', {})}
+
+
+def load_graph(file_path: str) -> Dict[str, Any]:
+    """Load a knowledge graph file (plain, .gz or .br; classic or compact layout)"""
+    path = Path(file_path)
+    if path.suffix == '.gz':
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+    elif path.suffix == '.br':
+        if not BROTLI_AVAILABLE:
+            raise ValueError("Reading .br graphs requires the brotli package")
+        data = json.loads(brotli.decompress(path.read_bytes()).decode('utf-8'))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    return expand_graph(data)
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+In-memory knowledge graph index
+Loads an exported graph once and indexes it by node id, node type, community
+and adjacency, so the web server can answer neighbourhood, type-filtered
+subgraph, cluster and node-list queries without scanning (or re-parsing) the
+whole graph. Built on the graph's columns (KG/graph_columns.py), so a binary
+snapshot loads without decoding any node until a query returns it.
+"""
+
+from collections import defaultdict, deque
+from typing import Dict, List, Any, Optional, Iterable, Set
+
+import numpy as np
+
+from KG.graph_columns import GraphColumns
+from KG.graph_communities import cluster_id
+
+
+class GraphIndex:
+    """Adjacency-indexed view of a knowledge graph.
+
+    Nodes returned by the query methods carry an extra 'degree' field (links
+    in the full graph) so clients can size nodes without the whole graph.
+    Links to missing nodes cannot be drawn and are left out.
+    """
+
+    def __init__(self, graph: Dict[str, Any]):
+        self._build(GraphColumns(graph))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'GraphIndex':
+        """Build an index from a graph file (any layout load_graph accepts, or its snapshot)"""
+        index = cls.__new__(cls)
+        index._build(GraphColumns.from_file(path))
+        return index
+
+    def _build(self, columns: GraphColumns):
+        self.columns = columns
+        self.nodes = columns.nodes
+        self.links = columns.links
+        self.metadata: Dict[str, Any] = columns.metadata
+        self.position: Dict[str, int] = columns.position
+
+        # Per node: indices of its links (as source or target), in CSR form
+        self.adjacency_offsets, self.adjacency_links = columns.adjacency()
+        self.degree = np.diff(self.adjacency_offsets)
+        drawable = (columns.source >= 0) & (columns.target >= 0)
+        self.num_links = int(drawable.sum())
+
+        order = np.argsort(columns.node_types, kind='stable')
+        bounds = np.cumsum(np.bincount(columns.node_types, minlength=len(columns.node_type_names)))
+        self.by_type: Dict[str, np.ndarray] = {
+            name: indices for name, indices in zip(columns.node_type_names, np.split(order, bounds[:-1]))
+            if len(indices)
+        }
+        self.relationship_counts: Dict[str, int] = columns.link_type_counts(drawable)
+
+        # Cluster summary exported with the graph (GraphBuilder communities option)
+        self.communities: Optional[Dict[str, Any]] = self.metadata.get('communities')
+        self.by_cluster: Dict[str, List[int]] = defaultdict(list)
+        if self.communities is not None:
+            for i in np.flatnonzero(columns.node_communities >= 0).tolist():
+                self.by_cluster[cluster_id(int(columns.node_communities[i]))].append(i)
+
+    def _node(self, i: int) -> Dict[str, Any]:
+        return {**self.nodes[i], 'degree': int(self.degree[i])}
+
+    def _adjacent(self, i: int) -> List[int]:
+        return self.adjacency_links[self.adjacency_offsets[i]:self.adjacency_offsets[i + 1]].tolist()
+
+    def _other_end(self, k: int, i: int) -> int:
+        source = int(self.columns.source[k])
+        return int(self.columns.target[k]) if source == i else source
+
+    def _best_connected(self, indices: List[int], limit: int) -> List[int]:
+        """The limit highest-degree nodes of indices (ties by position)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        return indices[np.lexsort((indices, -self.degree[indices]))[:limit]].tolist()
+
+    def _type_codes(self, names: Optional[Iterable[str]], all_names: List[str]) -> Optional[Set[int]]:
+        if names is None:
+            return None
+        names = set(names)
+        return {code for code, name in enumerate(all_names) if name in names}
+
+    def _links_between(self, selected: Set[int], relationship_types: Optional[Set[str]] = None) -> List[Dict[str, Any]]:
+        """Links with both ends in selected, each once, in graph order"""
+        if not selected:
+            return []
+        members = np.fromiter(selected, dtype=np.int64, count=len(selected))
+        starts, ends = self.adjacency_offsets[members], self.adjacency_offsets[members + 1]
+        candidates = np.concatenate([self.adjacency_links[start:end] for start, end in zip(starts, ends)])
+
+        in_selection = np.zeros(len(self.nodes), dtype=bool)
+        in_selection[members] = True
+        keep = in_selection[self.columns.source[candidates]] & in_selection[self.columns.target[candidates]]
+        if relationship_types is not None:
+            codes = self._type_codes(relationship_types, self.columns.link_type_names)
+            keep &= np.isin(self.columns.link_types[candidates], list(codes))
+        return [self.links[k] for k in np.unique(candidates[keep]).tolist()]
+
+    def summary(self) -> Dict[str, Any]:
+        """Node and relationship type counts for building filters"""
+        return {
+            'total_nodes': len(self.nodes),
+            'total_edges': self.num_links,
+            'node_types': {node_type: len(indices) for node_type, indices in self.by_type.items()},
+            'relationship_types': dict(self.relationship_counts),
+            'clusters': len(self.communities['clusters']) if self.communities is not None else 0,
+        }
+
+    def node_page(self, offset: int = 0, limit: int = 100, node_types: Optional[Iterable[str]] = None,
+                  query: Optional[str] = None) -> Dict[str, Any]:
+        """Paginated node list, optionally restricted to types and a label substring"""
+        if node_types is not None:
+            indices = sorted(i for node_type in set(node_types) for i in self.by_type.get(node_type, ()).tolist())
+        else:
+            indices = range(len(self.nodes))
+
+        if query:
+            query = query.lower()
+            labels = self.columns.node_labels
+            indices = [i for i in indices if query in labels[i].lower()]
+
+        indices = list(indices)
+        return {
+            'nodes': [self._node(i) for i in indices[offset:offset + limit]],
+            'total': len(indices),
+            'offset': offset,
+            'limit': limit,
+        }
+
+    def subgraph(self, node_types: Optional[Iterable[str]] = None, relationship_types: Optional[Iterable[str]] = None,
+                 limit: Optional[int] = None) -> Dict[str, Any]:
+        """Nodes of the given types and the links of the given types between them.
+
+        With limit, only the best-connected nodes are kept (truncated is set).
+        """
+        if node_types is not None:
+            indices = [i for node_type in set(node_types) for i in self.by_type.get(node_type, ()).tolist()]
+        else:
+            indices = list(range(len(self.nodes)))
+
+        total = len(indices)
+        if limit is not None and total > limit:
+            indices = self._best_connected(indices, limit)
+        selected = set(indices)
+
+        relationship_types = set(relationship_types) if relationship_types is not None else None
+        return {
+            'nodes': [self._node(i) for i in sorted(selected)],
+            'links': self._links_between(selected, relationship_types),
+            'total': total,
+            'truncated': len(selected) < total,
+        }
+
+    def neighbourhood(self, node_id: str, hops: int = 1, node_types: Optional[Iterable[str]] = None,
+                      relationship_types: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Nodes within hops links of node_id (breadth-first) and the links between them.
+
+        Traversal only follows links of relationship_types and only enters
+        nodes of node_types (the centre is always included). With limit, the
+        search stops once that many nodes are found. Raises KeyError for an
+        unknown node.
+        """
+        center = self.position[node_id]
+        node_codes = self._type_codes(node_types, self.columns.node_type_names)
+        link_codes = self._type_codes(relationship_types, self.columns.link_type_names)
+        relationship_types = set(relationship_types) if relationship_types is not None else None
+
+        selected = {center}
+        frontier = deque([(center, 0)])
+        truncated = False
+
+        while frontier and not truncated:
+            i, depth = frontier.popleft()
+            if depth >= hops:
+                continue
+            for k in self._adjacent(i):
+                if link_codes is not None and self.columns.link_types[k] not in link_codes:
+                    continue
+                other = self._other_end(k, i)
+                if other in selected:
+                    continue
+                if node_codes is not None and self.columns.node_types[other] not in node_codes:
+                    continue
+                if limit is not None and len(selected) >= limit:
+                    truncated = True
+                    break
+                selected.add(other)
+                frontier.append((other, depth + 1))
+
+        return {
+            'center': node_id,
+            'hops': hops,
+            'nodes': [self._node(i) for i in sorted(selected)],
+            'links': self._links_between(selected, relationship_types),
+            'truncated': truncated,
+        }
+
+    def cluster_summary(self) -> Dict[str, Any]:
+        """Cluster super-nodes and the weighted links between them.
+
+        Raises KeyError when the graph was exported without communities.
+        """
+        if self.communities is None:
+            raise KeyError('communities')
+        return {
+            'clusters': self.communities['clusters'],
+            'links': self.communities['links'],
+            'total_nodes': len(self.nodes),
+        }
+
+    def expand_cluster(self, cluster: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Members of a cluster, the links among them and their links outward.
+
+        external_links are graph links from members to nodes in other
+        clusters; cluster_links aggregate them per (member, other cluster)
+        with a weight, for views where the other cluster is still collapsed.
+        With limit, only the best-connected members are returned (truncated
+        is set). Raises KeyError for an unknown cluster.
+        """
+        if cluster not in self.by_cluster:
+            raise KeyError(cluster)
+        members = self.by_cluster[cluster]
+
+        total = len(members)
+        if limit is not None and total > limit:
+            members = self._best_connected(members, limit)
+        selected = set(members)
+
+        communities = self.columns.node_communities
+        external = []
+        weights: Dict[tuple, int] = defaultdict(int)
+        for i in sorted(selected):
+            for k in self._adjacent(i):
+                other = self._other_end(k, i)
+                other_cluster = cluster_id(int(communities[other])) if communities[other] >= 0 else None
+                if other_cluster == cluster:
+                    continue
+                external.append(self.links[k])
+                if other_cluster is not None:
+                    weights[(self.columns.node_ids[i], other_cluster)] += 1
+
+        return {
+            'cluster': cluster,
+            'nodes': [self._node(i) for i in sorted(selected)],
+            'links': self._links_between(selected),
+            'external_links': external,
+            'cluster_links': [
+                {'source': source, 'target': target, 'weight': weight}
+                for (source, target), weight in weights.items()
+            ],
+            'total': total,
+            'truncated': len(selected) < total,
+        }
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Offline graph layout
+Computes node positions with NumPy so the web UI can draw the graph without
+running its force simulation: a spectral embedding as the starting point,
+refined by Fruchterman-Reingold iterations. Repulsion is exact for small
+graphs; larger graphs use a Barnes-Hut approximation on a hierarchy of grids
+(nearby nodes repel exactly, farther cells act through their centre of mass),
+which keeps each iteration close to linear in the number of nodes.
+"""
+
+import math
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+
+# Above this many nodes repulsion uses the Barnes-Hut approximation
+EXACT_REPULSION_MAX_NODES = 1000
+
+# Barnes-Hut grids are refined until nodes have at most this many exact
+# (near-field) partners on average, or the grid reaches 2^MAX_GRID_LEVEL cells a side
+NEAR_PAIRS_PER_NODE = 64
+MAX_GRID_LEVEL = 10
+
+# Pairwise interactions evaluated per block (bounds temporary memory)
+BLOCK_PAIRS = 4_000_000
+
+# Target median edge length in output coordinates (vis.js springLength)
+EDGE_LENGTH = 150.0
+
+DEFAULT_ITERATIONS = 100
+
+
+def _edge_arrays(num_nodes: int, edges: List[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Edge endpoints as index arrays, without self-loops"""
+    if not edges:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    pairs = np.asarray(edges, dtype=np.int64)
+    keep = pairs[:, 0] != pairs[:, 1]
+    return pairs[keep, 0], pairs[keep, 1]
+
+
+def _scatter_add(target: np.ndarray, index: np.ndarray, values: np.ndarray):
+    """target[index] += values for repeated indices (bincount is much faster than np.add.at)"""
+    for axis in range(target.shape[1]):
+        target[:, axis] += np.bincount(index, weights=values[:, axis], minlength=len(target))
+
+
+def spectral_positions(num_nodes: int, source: np.ndarray, target: np.ndarray,
+                       rng: np.random.Generator, iterations: int = 50) -> np.ndarray:
+    """Approximate 2-D spectral embedding by power iteration.
+
+    Uses the two leading non-trivial eigenvectors of the lazy random-walk
+    operator (I + D^-1/2 A D^-1/2) / 2, so only sparse products are needed.
+    """
+    degree = np.bincount(source, minlength=num_nodes) + np.bincount(target, minlength=num_nodes)
+    inv_sqrt = 1.0 / np.sqrt(np.maximum(degree, 1))
+    trivial = np.sqrt(degree.astype(float))
+    norm = np.linalg.norm(trivial)
+    trivial = trivial / norm if norm > 0 else trivial
+
+    vectors = rng.standard_normal((num_nodes, 2))
+    for _ in range(iterations):
+        scaled = vectors * inv_sqrt[:, None]
+        product = np.zeros_like(vectors)
+        _scatter_add(product, source, scaled[target])
+        _scatter_add(product, target, scaled[source])
+        vectors = 0.5 * (vectors + product * inv_sqrt[:, None])
+        # Project out the trivial eigenvector and re-orthonormalize
+        vectors -= np.outer(trivial, trivial @ vectors)
+        vectors, _ = np.linalg.qr(vectors)
+
+    return vectors * inv_sqrt[:, None]
+
+
+def _pair_repulsion(points: np.ndarray, others: np.ndarray, k2: float) -> np.ndarray:
+    """Sum of k^2 / d repulsion on each point from others"""
+    force = np.zeros_like(points)
+    block = max(1, BLOCK_PAIRS // max(len(others), 1))
+    for start in range(0, len(points), block):
+        dx = points[start:start + block, 0, None] - others[None, :, 0]
+        dy = points[start:start + block, 1, None] - others[None, :, 1]
+        dist2 = dx * dx + dy * dy
+        dist2[dist2 == 0] = np.inf  # A point does not repel itself
+        scale = k2 / dist2
+        force[start:start + block, 0] = (scale * dx).sum(axis=1)
+        force[start:start + block, 1] = (scale * dy).sum(axis=1)
+    return force
+
+
+def _tree_repulsion(pos: np.ndarray, k2: float) -> np.ndarray:
+    """Repulsion with a Barnes-Hut approximation on a hierarchy of square grids.
+
+    At every level a node interacts with the cells that are children of its
+    parent cell's neighbours but not its own neighbours (at most 27), through
+    their node count at their centre of mass; only nodes in the 3x3 block
+    around its finest-level cell repel it exactly.
+    """
+    n = len(pos)
+
+    low = pos.min(axis=0)
+    span = max(float((pos.max(axis=0) - low).max()), 1e-9)
+    unit = (pos - low) / span
+
+    # Finer grids in crowded layouts keep the exact near field small
+    finest = max(2, min(MAX_GRID_LEVEL, math.ceil(math.log2(math.sqrt(n / 8)))))
+    while finest < MAX_GRID_LEVEL:
+        side = 1 << finest
+        cell_x, cell_y = np.minimum((unit * side).astype(np.int64), side - 1).T
+        grid = np.bincount(cell_x * side + cell_y, minlength=side * side).reshape(side, side).astype(float)
+        padded = np.pad(grid, 1)
+        block = sum(padded[i:i + side, j:j + side] for i in range(3) for j in range(3))
+        if (grid * block).sum() <= NEAR_PAIRS_PER_NODE * n:
+            break
+        finest += 1
+
+    force = np.zeros_like(pos)
+    for level in range(2, finest + 1):
+        side = 1 << level
+        cell_x, cell_y = np.minimum((unit * side).astype(np.int64), side - 1).T
+        cell = cell_x * side + cell_y
+
+        counts = np.bincount(cell, minlength=side * side).astype(float)
+        occupied = np.maximum(counts, 1)
+        centre_x = np.bincount(cell, weights=pos[:, 0], minlength=side * side) / occupied
+        centre_y = np.bincount(cell, weights=pos[:, 1], minlength=side * side) / occupied
+
+        # 6x6 children of the parent's 3x3 neighbourhood
+        base_x = (cell_x // 2) * 2 - 2
+        base_y = (cell_y // 2) * 2 - 2
+        for offset_x in range(6):
+            x = base_x + offset_x
+            for offset_y in range(6):
+                y = base_y + offset_y
+                valid = ((x >= 0) & (x < side) & (y >= 0) & (y < side)
+                         & ((np.abs(x - cell_x) > 1) | (np.abs(y - cell_y) > 1)))
+                other = np.where(valid, x * side + y, 0)
+                dx = pos[:, 0] - centre_x[other]
+                dy = pos[:, 1] - centre_y[other]
+                scale = k2 * np.where(valid, counts[other], 0.0) / np.maximum(dx * dx + dy * dy, 1e-12)
+                force[:, 0] += scale * dx
+                force[:, 1] += scale * dy
+
+    # Near field: exact within the 3x3 block of finest cells, one cell at a time
+    order = np.argsort(cell, kind='stable')
+    bounds = np.searchsorted(cell[order], np.arange(side * side + 1))
+    for c in np.unique(cell):
+        members = order[bounds[c]:bounds[c + 1]]
+        x, y = divmod(int(c), side)
+        neighbours = np.concatenate([
+            order[bounds[nx * side + ny]:bounds[nx * side + ny + 1]]
+            for nx in range(max(x - 1, 0), min(x + 2, side))
+            for ny in range(max(y - 1, 0), min(y + 2, side))
+        ])
+        force[members] += _pair_repulsion(pos[members], pos[neighbours], k2)
+
+    return force
+
+
+def force_layout(num_nodes: int, edges: List[Tuple[int, int]], iterations: int = DEFAULT_ITERATIONS,
+                 seed: int = 0, initial: Optional[np.ndarray] = None) -> np.ndarray:
+    """Fruchterman-Reingold layout of a graph given as node count and (i, j) edges.
+
+    Returns an (num_nodes, 2) array scaled so the median edge is EDGE_LENGTH
+    long and centred on the origin. Deterministic for a given seed.
+    """
+    if num_nodes == 0:
+        return np.zeros((0, 2))
+
+    rng = np.random.default_rng(seed)
+    source, target = _edge_arrays(num_nodes, edges)
+
+    if initial is not None:
+        pos = np.array(initial, dtype=float)
+    else:
+        pos = spectral_positions(num_nodes, source, target, rng)
+    # Spread to the unit square; jitter separates nodes the embedding merged
+    pos = pos - pos.mean(axis=0)
+    pos /= max(np.abs(pos).max(), 1e-9)
+    pos += rng.uniform(-0.05, 0.05, pos.shape)
+
+    k = 2.0 / math.sqrt(num_nodes)  # Ideal distance in a 2x2 frame
+    k2 = k * k
+    gravity = 0.5 * k
+    temperature = 0.2
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        if num_nodes <= EXACT_REPULSION_MAX_NODES:
+            displacement = _pair_repulsion(pos, pos, k2)
+        else:
+            displacement = _tree_repulsion(pos, k2)
+
+        # Attraction d^2 / k along edges
+        delta = pos[source] - pos[target]
+        pull = delta * (np.linalg.norm(delta, axis=1) / k)[:, None]
+        _scatter_add(displacement, source, -pull)
+        _scatter_add(displacement, target, pull)
+
+        # Weak pull to the centre keeps disconnected parts together
+        displacement -= gravity * pos * np.linalg.norm(pos, axis=1, keepdims=True) / k
+
+        length = np.maximum(np.linalg.norm(displacement, axis=1, keepdims=True), 1e-9)
+        pos += displacement / length * np.minimum(length, temperature)
+        temperature -= cooling
+
+    pos -= pos.mean(axis=0)
+    if len(source):
+        median = float(np.median(np.linalg.norm(pos[source] - pos[target], axis=1)))
+    else:
+        median = k
+    return pos * (EDGE_LENGTH / max(median, 1e-9))
+
+
+def layout_graph(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]],
+                 iterations: int = DEFAULT_ITERATIONS, seed: int = 0):
+    """Store x/y positions on graph nodes (in place)"""
+    position = {node['id']: i for i, node in enumerate(nodes)}
+    edges = [(position[link['source']], position[link['target']]) for link in links
+             if link['source'] in position and link['target'] in position]
+
+    coordinates = force_layout(len(nodes), edges, iterations=iterations, seed=seed)
+    for node, (x, y) in zip(nodes, coordinates):
+        node['x'] = round(float(x), 1)
+        node['y'] = round(float(y), 1)
+
+
+def place_new_nodes(nodes: List[Dict[str, Any]], links: List[Dict[str, Any]], seed: int = 0) -> int:
+    """Give nodes without x/y a position next to their positioned neighbours.
+
+    Used when patching a laid-out graph; unconnected new nodes go near the
+    centre. Returns the number of nodes placed.
+    """
+    rng = np.random.default_rng(seed)
+    by_id = {node['id']: node for node in nodes}
+    missing = [node for node in nodes if 'x' not in node or 'y' not in node]
+    if not missing:
+        return 0
+
+    neighbours: Dict[str, List[str]] = {node['id']: [] for node in missing}
+    for link in links:
+        if link['source'] in neighbours:
+            neighbours[link['source']].append(link['target'])
+        if link['target'] in neighbours:
+            neighbours[link['target']].append(link['source'])
+
+    for node in missing:
+        anchors = [by_id[other] for other in neighbours[node['id']]
+                   if other in by_id and 'x' in by_id[other] and 'y' in by_id[other]]
+        if anchors:
+            x = sum(anchor['x'] for anchor in anchors) / len(anchors)
+            y = sum(anchor['y'] for anchor in anchors) / len(anchors)
+        else:
+            x = y = 0.0
+        angle = rng.uniform(0, 2 * math.pi)
+        node['x'] = round(x + EDGE_LENGTH * 0.5 * math.cos(angle), 1)
+        node['y'] = round(y + EDGE_LENGTH * 0.5 * math.sin(angle), 1)
+
+    return len(missing)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Binary knowledge graph snapshot
+A NumPy .npz written next to the JSON export (knowledge_graph.json ->
+knowledge_graph.npz) holding what loaders otherwise rebuild by parsing the
+whole file: node ids and labels as string tables, node and relationship type
+codes, communities, link endpoint indices and a CSR adjacency. Every node and
+link is also stored as its own compact JSON record, decoded only when it is
+accessed.
+
+The archive is uncompressed, so load_snapshot() memory-maps its arrays in
+place; opening a graph costs a few string splits instead of a full parse.
+"""
+
+import io
+import json
+import mmap
+import os
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+SNAPSHOT_FORMAT = 'snapshot-v1'
+SNAPSHOT_SUFFIX = '.npz'
+
+# Separator of the id and label string tables
+STRING_SEPARATOR = '\x00'
+
+
+def snapshot_path(graph_path) -> Path:
+    """Snapshot file belonging to a graph JSON file"""
+    return Path(graph_path).with_suffix(SNAPSHOT_SUFFIX)
+
+
+def fresh_snapshot(graph_path) -> Optional[Path]:
+    """Snapshot to load instead of graph_path: the path itself if it is a
+    snapshot, or its snapshot if that was written after the JSON file"""
+    path = Path(graph_path)
+    if path.suffix == SNAPSHOT_SUFFIX:
+        return path
+    snapshot = snapshot_path(path)
+    if snapshot.exists() and path.exists() and snapshot.stat().st_mtime >= path.stat().st_mtime:
+        return snapshot
+    return None
+
+
+def adjacency(num_nodes: int, source: np.ndarray, target: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR adjacency of links whose endpoints are both nodes.
+
+    Returns (offsets, link indices): the links at node i (as source or
+    target, self-loops once) are indices[offsets[i]:offsets[i + 1]], in link
+    order.
+    """
+    links = np.flatnonzero((source >= 0) & (target >= 0))
+    reverse = links[target[links] != source[links]]
+    nodes = np.concatenate([source[links], target[reverse]])
+    indices = np.concatenate([links, reverse])
+    order = np.lexsort((indices, nodes))
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(nodes, minlength=num_nodes))])
+    return offsets.astype(np.int64), indices[order].astype(np.int64)
+
+
+def _string_table(values: List[str]) -> np.ndarray:
+    return np.frombuffer(STRING_SEPARATOR.join(values).encode('utf-8'), dtype=np.uint8)
+
+
+def _read_strings(table: np.ndarray, count: int) -> List[str]:
+    if count == 0:
+        return []
+    return table.tobytes().decode('utf-8').split(STRING_SEPARATOR)
+
+
+class RecordList(Sequence):
+    """Read-only list of JSON records stored back to back in one byte array"""
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return json.loads(self._data[self._offsets[i]:self._offsets[i + 1]].tobytes())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+class SnapshotWriter:
+    """Collect a graph's nodes and links and write them as a snapshot.
+
+    Same protocol as GraphWriter: write_node() for every node, then
+    write_link() for every link, then finish(metadata). Items are serialized
+    as they arrive, so only their JSON bytes are kept until finish().
+    """
+
+    def __init__(self, output_path):
+        self.output_path = Path(output_path)
+        self._node_ids: List[str] = []
+        self._labels: List[str] = []
+        self._node_types: Dict[str, int] = {}
+        self._node_type_codes: List[int] = []
+        self._communities: List[int] = []
+        self._link_ends: List[Tuple[Any, Any]] = []
+        self._link_types: Dict[str, int] = {}
+        self._link_type_codes: List[int] = []
+        self._records = {'node': [], 'link': []}
+
+    def _record(self, kind: str, item: Dict[str, Any]):
+        self._records[kind].append(json.dumps(item, separators=(',', ':')).encode('utf-8'))
+
+    def write_node(self, node: Dict[str, Any]):
+        self._node_ids.append(str(node.get('id')))
+        self._labels.append(str(node.get('label', '')).replace(STRING_SEPARATOR, ' '))
+        self._node_type_codes.append(self._node_types.setdefault(node.get('type', 'unknown'), len(self._node_types)))
+        self._communities.append(node.get('community', -1))
+        self._record('node', node)
+
+    def write_link(self, link: Dict[str, Any]):
+        self._link_ends.append((link.get('source', link.get('from')), link.get('target', link.get('to'))))
+        link_type = link.get('type', link.get('relationship', link.get('label', 'unknown')))
+        self._link_type_codes.append(self._link_types.setdefault(link_type, len(self._link_types)))
+        self._record('link', link)
+
+    def _blob(self, kind: str) -> Tuple[np.ndarray, np.ndarray]:
+        records = self._records[kind]
+        offsets = np.concatenate([[0], np.cumsum([len(record) for record in records], dtype=np.int64)])
+        return np.frombuffer(b''.join(records), dtype=np.uint8), offsets.astype(np.int64)
+
+    def finish(self, metadata: Dict[str, Any]):
+        """Write the snapshot under a temporary name and move it into place"""
+        position = {node_id: i for i, node_id in enumerate(self._node_ids)}
+        source = np.array([position.get(str(s), -1) if s is not None else -1 for s, _ in self._link_ends], dtype=np.int64)
+        target = np.array([position.get(str(t), -1) if t is not None else -1 for _, t in self._link_ends], dtype=np.int64)
+        offsets, indices = adjacency(len(self._node_ids), source, target)
+        node_data, node_offsets = self._blob('node')
+        link_data, link_offsets = self._blob('link')
+
+        header = {
+            'format': SNAPSHOT_FORMAT,
+            'num_nodes': len(self._node_ids),
+            'num_links': len(self._link_ends),
+            'node_type_names': list(self._node_types),
+            'link_type_names': list(self._link_types),
+            'metadata': metadata
+        }
+
+        temp_path = self.output_path.with_name(self.output_path.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            np.savez(f,
+                     header=np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8),
+                     node_ids=_string_table(self._node_ids),
+                     node_labels=_string_table(self._labels),
+                     node_types=np.array(self._node_type_codes, dtype=np.int32),
+                     node_communities=np.array(self._communities, dtype=np.int64),
+                     node_data=node_data, node_offsets=node_offsets,
+                     link_source=source, link_target=target,
+                     link_types=np.array(self._link_type_codes, dtype=np.int32),
+                     link_data=link_data, link_offsets=link_offsets,
+                     adjacency_offsets=offsets, adjacency_links=indices)
+        os.replace(temp_path, self.output_path)
+
+
+def write_snapshot(output_path, nodes, links, metadata: Dict[str, Any]):
+    """Write a snapshot of a graph held in memory"""
+    writer = SnapshotWriter(output_path)
+    for node in nodes:
+        writer.write_node(node)
+    for link in links:
+        writer.write_link(link)
+    writer.finish(metadata)
+
+
+def _map_npz(path) -> Dict[str, np.ndarray]:
+    """Arrays of an uncompressed .npz as read-only views of one memory map"""
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    arrays = {}
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed and cannot be memory-mapped")
+            # Local file header: 30 fixed bytes, then name and extra field
+            name_length, extra_length = np.frombuffer(mapped, dtype='<u2', count=2, offset=info.header_offset + 26)
+            start = info.header_offset + 30 + int(name_length) + int(extra_length)
+
+            member = io.BytesIO(mapped[start:start + 4096])
+            if np.lib.format.read_magic(member) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(member)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(member)
+            count = int(np.prod(shape))
+            array = np.frombuffer(mapped, dtype=dtype, count=count, offset=start + member.tell())
+            arrays[info.filename[:-len('.npy')]] = array.reshape(shape, order='F' if fortran_order else 'C')
+    return arrays
+
+
+class GraphSnapshot:
+    """A memory-mapped snapshot: metadata, columns and lazily decoded records"""
+
+    def __init__(self, path):
+        arrays = _map_npz(path)
+        header = json.loads(arrays['header'].tobytes())
+        if header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path}: unknown snapshot format {header.get('format')!r}")
+
+        self.path = Path(path)
+        self.metadata: Dict[str, Any] = header['metadata']
+        self.node_type_names: List[str] = header['node_type_names']
+        self.link_type_names: List[str] = header['link_type_names']
+        self.node_ids = _read_strings(arrays['node_ids'], header['num_nodes'])
+        self.node_labels = _read_strings(arrays['node_labels'], header['num_nodes'])
+        self.node_types = arrays['node_types']
+        self.node_communities = arrays['node_communities']
+        self.source = arrays['link_source']
+        self.target = arrays['link_target']
+        self.link_types = arrays['link_types']
+        self.adjacency = (arrays['adjacency_offsets'], arrays['adjacency_links'])
+        self.nodes = RecordList(arrays['node_data'], arrays['node_offsets'])
+        self.links = RecordList(arrays['link_data'], arrays['link_offsets'])
+
+
+def load_snapshot(path) -> GraphSnapshot:
+    return GraphSnapshot(path)
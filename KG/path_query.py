@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Multi-hop path queries over the relationships table
+Loads relationships once into an in-memory CSR adjacency (both directions of
+every relationship, with its type and stored direction) and answers
+connection questions in one call: shortest paths between two nodes by
+bidirectional breadth-first search, and typed multi-hop patterns such as
+"person <authored_by document >affiliated_with institution". The loaded
+graph is cached per database and reloaded when relationships change.
+
+Nodes are (node_type, node_id) keys as in the relationships table:
+('document', 'academic_3'), ('topic', '12').
+"""
+
+import threading
+from itertools import islice
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+
+import numpy as np
+
+from DB.utils.connection import read_connection
+from DB.utils.change_log import current_change_seq
+
+
+NodeKey = Tuple[str, str]
+
+# Longest path or pattern a query may ask for
+MAX_HOPS = 6
+
+# Tables holding display labels for path nodes
+LABEL_SOURCES = {
+    'academic': ('academic_documents', 'title'),
+    'chronicle': ('chronicle_documents', 'title'),
+    'topic': ('topics', 'name'),
+    'person': ('people', 'name'),
+    'project': ('projects', 'name'),
+    'institution': ('institutions', 'name'),
+    'method': ('methods', 'name'),
+    'application': ('applications', 'name'),
+}
+
+
+class PathStep:
+    """One hop of a pattern: relationship type, direction and target node type.
+
+    Written as [>|<]relationship[:node_type]: '>' follows relationships from
+    the current node (stored direction), '<' follows them backwards, no
+    prefix either way; '*' matches any relationship type.
+    """
+
+    def __init__(self, relationship_type: Optional[str] = None, direction: str = 'any',
+                 node_type: Optional[str] = None):
+        if direction not in ('forward', 'reverse', 'any'):
+            raise ValueError(f"Unknown direction '{direction}'")
+        self.relationship_type = relationship_type
+        self.direction = direction
+        self.node_type = node_type
+
+    @classmethod
+    def parse(cls, text: str) -> 'PathStep':
+        text = text.strip()
+        direction = 'any'
+        if text[:1] in '><':
+            direction = 'forward' if text[0] == '>' else 'reverse'
+            text = text[1:]
+        relationship_type, _, node_type = text.partition(':')
+        relationship_type = relationship_type.strip()
+        if relationship_type in ('', '*'):
+            relationship_type = None
+        return cls(relationship_type, direction, node_type.strip() or None)
+
+    def __repr__(self):
+        prefix = {'forward': '>', 'reverse': '<', 'any': ''}[self.direction]
+        suffix = f":{self.node_type}" if self.node_type else ''
+        return f"{prefix}{self.relationship_type or '*'}{suffix}"
+
+
+class RelationshipGraph:
+    """CSR adjacency over relationships rows.
+
+    Every relationship is stored as two arcs (one per endpoint); arc_forward
+    tells whether an arc follows the stored source -> target direction.
+    """
+
+    def __init__(self, rows: Iterable[Tuple[str, str, str, str, str]]):
+        self.keys: List[NodeKey] = []
+        self.position: Dict[NodeKey, int] = {}
+        relationship_codes: Dict[str, int] = {}
+        node_type_codes: Dict[str, int] = {}
+        node_types = []
+        source, target, relationship = [], [], []
+
+        for source_type, source_id, target_type, target_id, relationship_type in rows:
+            endpoints = []
+            for key in ((source_type, str(source_id)), (target_type, str(target_id))):
+                index = self.position.get(key)
+                if index is None:
+                    index = self.position[key] = len(self.keys)
+                    self.keys.append(key)
+                    node_types.append(node_type_codes.setdefault(key[0], len(node_type_codes)))
+                endpoints.append(index)
+            source.append(endpoints[0])
+            target.append(endpoints[1])
+            relationship.append(relationship_codes.setdefault(relationship_type, len(relationship_codes)))
+
+        self.relationship_types = relationship_codes
+        self.relationship_names = list(relationship_codes)
+        self.node_type_codes = node_type_codes
+        self.node_types = np.array(node_types, dtype=np.int32)
+
+        num_nodes = len(self.keys)
+        source = np.array(source, dtype=np.int64)
+        target = np.array(target, dtype=np.int64)
+        relationship = np.array(relationship, dtype=np.int32)
+
+        tail = np.concatenate([source, target])
+        order = np.argsort(tail, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(tail, minlength=num_nodes))])
+        self.heads = np.concatenate([target, source])[order]
+        self.arc_types = np.concatenate([relationship, relationship])[order]
+        self.arc_forward = np.concatenate([np.ones(len(source), dtype=bool), np.zeros(len(source), dtype=bool)])[order]
+        self.arc_tails = tail[order]
+
+    @classmethod
+    def from_database(cls, db_path: str) -> 'RelationshipGraph':
+        conn = read_connection(db_path, row_factory=None)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT source_type, source_id, target_type, target_id, relationship_type
+                FROM relationships
+            """)
+            return cls(cursor.fetchall())
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _arc_mask(self, relationship_types: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        """Arcs of the given relationship types (None: all arcs)"""
+        if relationship_types is None:
+            return None
+        codes = [self.relationship_types[name] for name in relationship_types if name in self.relationship_types]
+        return np.isin(self.arc_types, codes)
+
+    def _expand(self, frontier: np.ndarray) -> np.ndarray:
+        """Indices of all arcs leaving the frontier nodes"""
+        starts, ends = self.offsets[frontier], self.offsets[frontier + 1]
+        counts = ends - starts
+        return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+    def _search_level(self, frontier: np.ndarray, distance: np.ndarray,
+                      allowed: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance a breadth-first search by one level.
+
+        Returns the new frontier and the arcs from the old frontier onto it
+        (the shortest-path DAG edges of this level).
+        """
+        arcs = self._expand(frontier)
+        if allowed is not None:
+            arcs = arcs[allowed[arcs]]
+        depth = distance[frontier[0]] + 1
+        heads = self.heads[arcs]
+        distance[np.unique(heads[distance[heads] < 0])] = depth
+        arcs = arcs[distance[heads] == depth]
+        return np.unique(self.heads[arcs]), arcs
+
+    def shortest_paths(self, source: NodeKey, target: NodeKey, max_hops: int = 4,
+                       relationship_types: Optional[Iterable[str]] = None,
+                       limit: int = 5) -> List[List[Tuple[int, int]]]:
+        """Up to limit shortest paths (at most max_hops long) between two nodes.
+
+        Bidirectional breadth-first search, always growing the smaller
+        frontier. A path is a list of (node, arc) pairs: the start node with
+        arc -1, then each node with the arc that reached it. Raises KeyError
+        for nodes without relationships.
+        """
+        start, goal = self.position[source], self.position[target]
+        if start == goal:
+            return [[(start, -1)]]
+
+        allowed = self._arc_mask(relationship_types)
+        distance = [np.full(len(self), -1), np.full(len(self), -1)]
+        distance[0][start] = 0
+        distance[1][goal] = 0
+        frontier = [np.array([start]), np.array([goal])]
+        levels: List[List[np.ndarray]] = [[], []]
+
+        side = 0
+        meeting = np.zeros(0, dtype=np.int64)
+        for _ in range(max_hops):
+            side = 0 if len(frontier[0]) <= len(frontier[1]) else 1
+            frontier[side], arcs = self._search_level(frontier[side], distance[side], allowed)
+            levels[side].append(arcs)
+            meeting = frontier[side][distance[1 - side][frontier[side]] >= 0]
+            if len(meeting) or not len(frontier[side]):
+                break
+
+        # Meeting nodes lie on the last level of both searches, so every
+        # shortest path is a forward half ending there plus a backward half
+        meeting = meeting[distance[1 - side][meeting] == len(levels[1 - side])]
+        paths = []
+        for middle in meeting:
+            tails = list(islice(self._paths_to(middle, levels[1]), limit))
+            for head in self._paths_to(middle, levels[0]):
+                for tail in tails:
+                    # tail runs goal -> middle; reverse it, re-attributing each arc to its other end
+                    reversed_tail = [(tail[k - 1][0], self._reverse_arc(tail[k][1]))
+                                     for k in range(len(tail) - 1, 0, -1)]
+                    paths.append(head + reversed_tail)
+                    if len(paths) >= limit:
+                        return paths
+        return paths
+
+    def _paths_to(self, node: int, levels: List[np.ndarray]) -> Iterator[List[Tuple[int, int]]]:
+        """All paths from a search's root to node along its level arcs (root first)"""
+        if not levels:
+            yield [(node, -1)]
+            return
+        arcs = levels[-1]
+        for arc in arcs[self.heads[arcs] == node]:
+            for prefix in self._paths_to(int(self.arc_tails[arc]), levels[:-1]):
+                yield prefix + [(node, int(arc))]
+
+    def _reverse_arc(self, arc: int) -> int:
+        """The twin arc of the same relationship, seen from its other end"""
+        tail, head = self.arc_tails[arc], self.heads[arc]
+        candidates = np.arange(self.offsets[head], self.offsets[head + 1])
+        twin = candidates[(self.heads[candidates] == tail) & (self.arc_types[candidates] == self.arc_types[arc])
+                          & (self.arc_forward[candidates] != self.arc_forward[arc])]
+        return int(twin[0])
+
+    def follow(self, start: NodeKey, steps: List[PathStep], limit: int = 20) -> List[Dict[str, Any]]:
+        """Nodes reached from start by a typed multi-hop pattern.
+
+        Returns up to limit results, most paths first, each with the number of
+        distinct paths that reach it and one example path (as in
+        shortest_paths). The start node itself is left out. Raises KeyError
+        for a start node without relationships.
+        """
+        origin = self.position[start]
+        frontier = np.array([origin])
+        counts = np.ones(1)
+        # Per step: for each reached node, one arc that reached it
+        example_arcs: List[Dict[int, int]] = []
+
+        for step in steps:
+            arcs = self._expand(frontier)
+            keep = np.ones(len(arcs), dtype=bool)
+            if step.relationship_type is not None:
+                code = self.relationship_types.get(step.relationship_type, -1)
+                keep &= self.arc_types[arcs] == code
+            if step.direction != 'any':
+                keep &= self.arc_forward[arcs] == (step.direction == 'forward')
+            if step.node_type is not None:
+                code = self.node_type_codes.get(step.node_type, -1)
+                keep &= self.node_types[self.heads[arcs]] == code
+            arcs = arcs[keep]
+
+            # Paths into each reached node: sum over the arcs reaching it
+            weights = counts[np.searchsorted(frontier, self.arc_tails[arcs])]
+            reached, first, inverse = np.unique(self.heads[arcs], return_index=True, return_inverse=True)
+            counts = np.bincount(inverse, weights=weights, minlength=len(reached))
+            example_arcs.append(dict(zip(reached.tolist(), arcs[first].tolist())))
+            frontier = reached
+            if not len(frontier):
+                return []
+
+        order = np.lexsort((frontier, -counts))
+        results = []
+        for i in order:
+            node = int(frontier[i])
+            if node == origin:
+                continue
+            path = [(node, example_arcs[-1][node])]
+            for step_arcs in reversed(example_arcs[:-1]):
+                previous = int(self.arc_tails[path[0][1]])
+                path.insert(0, (previous, step_arcs[previous]))
+            path.insert(0, (origin, -1))
+            results.append({'node': node, 'paths': int(counts[i]), 'example': path})
+            if len(results) >= limit:
+                break
+        return results
+
+    def arc_description(self, arc: int) -> Tuple[str, bool]:
+        """(relationship type, follows stored direction) of an arc"""
+        return self.relationship_names[self.arc_types[arc]], bool(self.arc_forward[arc])
+
+
+def node_labels(db_path: str, keys: Iterable[NodeKey]) -> Dict[NodeKey, str]:
+    """Display labels (titles, names) for relationship node keys"""
+    by_table: Dict[Tuple[str, str], Dict[str, NodeKey]] = {}
+    for key in set(keys):
+        node_type, node_id = key
+        prefix, row_id = node_id.rsplit('_', 1) if node_type == 'document' and '_' in node_id else (node_type, node_id)
+        if prefix in LABEL_SOURCES:
+            by_table.setdefault(LABEL_SOURCES[prefix], {})[row_id] = key
+
+    labels = {}
+    conn = read_connection(db_path, row_factory=None)
+    try:
+        cursor = conn.cursor()
+        for (table, column), ids in by_table.items():
+            id_list = list(ids)
+            for start in range(0, len(id_list), 500):
+                batch = id_list[start:start + 500]
+                cursor.execute(f"SELECT id, {column} FROM {table} WHERE id IN ({','.join('?' * len(batch))})", batch)
+                for row_id, label in cursor.fetchall():
+                    labels[ids[str(row_id)]] = label
+    finally:
+        conn.close()
+    return labels
+
+
+# Loaded graphs per database, with the relationships version they reflect
+_graphs: Dict[str, Tuple[Tuple, RelationshipGraph]] = {}
+_graphs_lock = threading.Lock()
+
+
+def _relationships_version(db_path: str) -> Tuple:
+    conn = read_connection(db_path, row_factory=None)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*), MAX(rowid) FROM relationships")
+        return tuple(cursor.fetchone()) + (current_change_seq(cursor),)
+    finally:
+        conn.close()
+
+
+def get_relationship_graph(db_path: str) -> RelationshipGraph:
+    """Relationship graph of a database, reloaded only when relationships change"""
+    version = _relationships_version(db_path)
+    with _graphs_lock:
+        cached = _graphs.get(db_path)
+        if cached is None or cached[0] != version:
+            cached = (version, RelationshipGraph.from_database(db_path))
+            _graphs[db_path] = cached
+        return cached[1]
@@ -4,20 +4,87 @@ Knowledge Graph Pruning Tool
 
 This script takes a knowledge graph and excludes specified entity types and relationship types,
 creating a new pruned knowledge graph.
+
+The graph is loaded once into columns (KG/graph_columns.py) and every pruning step is a
+boolean mask operation over them; several steps (command-line options and --config files
+such as config_style_pruning_params.txt) can be chained in one run.
 """
 
 import json
 import argparse
+import shlex
 from pathlib import Path
 import sys
-from collections import defaultdict, Counter
+
+# Project root for KG.* imports when run as a script
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from KG.graph_format import GraphWriter
+from KG.graph_columns import GraphColumns
+from KG.graph_communities import summarize_communities
+from KG.graph_snapshot import SnapshotWriter, snapshot_path
+
+
+def add_pruning_arguments(parser):
+    """Options that make up one pruning step (shared by the CLI and --config files)."""
+    parser.add_argument('--exclude-entities', nargs='+', help='Entity types to exclude', default=[])
+    parser.add_argument('--exclude-relationships', nargs='+', help='Relationship types to exclude', default=[])
+    parser.add_argument('--min-degree', type=int, default=0,
+                        help='Remove nodes with fewer remaining connections than this')
+    parser.add_argument('--remove-isolated', action='store_true', help='Remove nodes with no connections')
+
+
+def pruning_step(args, name):
+    """Pruning step dict from parsed pruning arguments."""
+    return {
+        'name': name,
+        'exclude_entities': list(args.exclude_entities),
+        'exclude_relationships': list(args.exclude_relationships),
+        'min_degree': args.min_degree,
+        'remove_isolated': args.remove_isolated
+    }
+
+
+def is_empty_step(step):
+    return not (step['exclude_entities'] or step['exclude_relationships']
+                or step['min_degree'] > 0 or step['remove_isolated'])
+
+
+def load_pruning_config(file_path):
+    """Read a pruning step from a config file.
+
+    The file holds pruning options as on the command line, either alone or as part of a
+    documented prune_knowledge_graph.py command (see config_style_pruning_params.txt);
+    comment lines and surrounding notes are ignored.
+    """
+    try:
+        text = Path(file_path).read_text(encoding='utf-8')
+    except FileNotFoundError:
+        print(f"Error: Config file '{file_path}' not found.")
+        sys.exit(1)
+
+    # Join shell line continuations, keep only command lines
+    lines = text.replace('\\\n', ' ').splitlines()
+    command = ' '.join(line for line in lines
+                       if line.strip().startswith('--') or 'prune_knowledge_graph.py' in line)
+
+    parser = argparse.ArgumentParser(prog=str(file_path), add_help=False)
+    add_pruning_arguments(parser)
+    args, _ = parser.parse_known_args(shlex.split(command))
+
+    step = pruning_step(args, str(file_path))
+    if is_empty_step(step):
+        print(f"Error: No pruning options found in '{file_path}'.")
+        sys.exit(1)
+    return step
 
 
 def load_knowledge_graph(file_path):
-    """Load knowledge graph from JSON file."""
+    """Load knowledge graph from JSON file into columns."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return GraphColumns.from_file(file_path)
     except FileNotFoundError:
         print(f"Error: File '{file_path}' not found.")
         sys.exit(1)
@@ -26,197 +93,172 @@ def load_knowledge_graph(file_path):
         sys.exit(1)
 
 
-def save_knowledge_graph(kg, file_path):
-    """Save knowledge graph to JSON file."""
+def save_knowledge_graph(columns, node_mask, link_mask, metadata, file_path, compact=False, snapshot=False):
+    """Stream the selected nodes and links to a JSON file (and optionally a binary snapshot)."""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(kg, f, indent=2, ensure_ascii=False)
+        snapshot_writer = SnapshotWriter(snapshot_path(file_path)) if snapshot else None
+        with GraphWriter(file_path, compact=compact) as writer:
+            for node in columns.select_nodes(node_mask):
+                writer.write_node(node)
+                if snapshot_writer:
+                    snapshot_writer.write_node(node)
+            for link in columns.select_links(link_mask):
+                writer.write_link(link)
+                if snapshot_writer:
+                    snapshot_writer.write_link(link)
+            writer.finish(metadata)
         print(f"✅ Pruned knowledge graph saved to: {file_path}")
+        if snapshot_writer:
+            snapshot_writer.finish(metadata)
+            print(f"✅ Snapshot saved to: {snapshot_writer.output_path}")
     except Exception as e:
         print(f"Error saving file '{file_path}': {e}")
         sys.exit(1)
 
 
-def prune_entities(nodes, exclude_types):
-    """Remove entities with specified types."""
-    if not exclude_types:
-        return nodes, set()
-    
-    exclude_types = set(exclude_types)
-    pruned_nodes = []
-    removed_node_ids = set()
-    
-    for node in nodes:
-        node_type = node.get('type', 'unknown')
-        if node_type in exclude_types:
-            removed_node_ids.add(node.get('id'))
-        else:
-            pruned_nodes.append(node)
-    
-    return pruned_nodes, removed_node_ids
-
-
-def prune_relationships(links, exclude_types, removed_node_ids):
-    """Remove relationships with specified types and relationships connected to removed nodes."""
-    if not exclude_types:
-        exclude_types = set()
-    else:
-        exclude_types = set(exclude_types)
-    
-    pruned_links = []
-    
-    for link in links:
-        # Check relationship type
-        rel_type = link.get('type', link.get('relationship', link.get('label', 'unknown')))
-        if rel_type in exclude_types:
-            continue
-        
-        # Check if source or target nodes were removed
-        source = link.get('source', link.get('from'))
-        target = link.get('target', link.get('to'))
-        
-        if source in removed_node_ids or target in removed_node_ids:
-            continue
-        
-        pruned_links.append(link)
-    
-    return pruned_links
-
-
-def remove_isolated_nodes(nodes, links):
-    """Remove nodes that have no connections (isolated nodes)."""
-    # Get all node IDs that appear in links
-    connected_node_ids = set()
-    for link in links:
-        source = link.get('source', link.get('from'))
-        target = link.get('target', link.get('to'))
-        if source:
-            connected_node_ids.add(source)
-        if target:
-            connected_node_ids.add(target)
-    
-    # Keep only nodes that are connected
-    connected_nodes = []
-    isolated_nodes = []
-    
-    for node in nodes:
-        node_id = node.get('id')
-        if node_id in connected_node_ids:
-            connected_nodes.append(node)
-        else:
-            isolated_nodes.append(node)
-    
-    return connected_nodes, isolated_nodes
-
-
-def update_metadata(metadata, original_nodes, original_links, pruned_nodes, pruned_links):
+def prune_graph(columns, steps):
+    """Apply pruning steps in order; returns (node mask, link mask, per-step report).
+
+    Within a step: excluded entity types are removed, then excluded relationship types and
+    links to removed nodes, then nodes below min_degree (and their links), then nodes left
+    without connections if remove_isolated is set.
+    """
+    node_mask = columns.all_nodes()
+    link_mask = columns.all_links()
+    report = []
+
+    for step in steps:
+        nodes_before = int(node_mask.sum())
+        links_before = int(link_mask.sum())
+
+        if step['exclude_entities']:
+            node_mask &= ~columns.node_type_mask(step['exclude_entities'])
+        if step['exclude_relationships']:
+            link_mask &= ~columns.link_type_mask(step['exclude_relationships'])
+        link_mask &= columns.endpoint_mask(node_mask)
+
+        if step['min_degree'] > 0:
+            node_mask &= columns.degree(link_mask) >= step['min_degree']
+            link_mask &= columns.endpoint_mask(node_mask)
+
+        isolated = 0
+        if step['remove_isolated']:
+            isolated_mask = node_mask & (columns.degree(link_mask) == 0)
+            isolated = int(isolated_mask.sum())
+            node_mask &= ~isolated_mask
+
+        report.append({
+            'step': step['name'],
+            'nodes_removed': nodes_before - int(node_mask.sum()),
+            'links_removed': links_before - int(link_mask.sum()),
+            'isolated_nodes_removed': isolated
+        })
+
+    return node_mask, link_mask, report
+
+
+def update_metadata(metadata, columns, node_mask, link_mask, report):
     """Update metadata with new counts and statistics."""
-    if not metadata:
-        metadata = {}
-    
+    metadata = dict(metadata) if metadata else {}
+    pruned_nodes = int(node_mask.sum())
+    pruned_links = int(link_mask.sum())
+
     # Update basic counts
-    metadata['total_nodes'] = len(pruned_nodes)
-    metadata['total_edges'] = len(pruned_links)
-    
-    # Update node type counts
+    metadata['total_nodes'] = pruned_nodes
+    metadata['total_edges'] = pruned_links
+
+    # Update node and relationship type counts
     if 'node_types' in metadata:
-        node_types = Counter()
-        for node in pruned_nodes:
-            node_type = node.get('type', 'unknown')
-            node_types[node_type] += 1
-        metadata['node_types'] = dict(node_types)
-    
-    # Update relationship type counts
+        metadata['node_types'] = columns.node_type_counts(node_mask)
     if 'relationship_types' in metadata:
-        rel_types = Counter()
-        for link in pruned_links:
-            rel_type = link.get('type', link.get('relationship', link.get('label', 'unknown')))
-            rel_types[rel_type] += 1
-        metadata['relationship_types'] = dict(rel_types)
-    
+        metadata['relationship_types'] = columns.link_type_counts(link_mask)
+
+    # Cluster summary must describe the remaining nodes
+    if 'communities' in metadata:
+        summary = summarize_communities(columns.select_nodes(node_mask), columns.select_links(link_mask))
+        metadata['communities'] = {**metadata['communities'], **summary}
+
     # Add pruning information
     metadata['pruning_info'] = {
-        'original_nodes': len(original_nodes),
-        'original_links': len(original_links),
-        'pruned_nodes': len(pruned_nodes),
-        'pruned_links': len(pruned_links),
-        'nodes_removed': len(original_nodes) - len(pruned_nodes),
-        'links_removed': len(original_links) - len(pruned_links)
+        'original_nodes': columns.num_nodes,
+        'original_links': columns.num_links,
+        'pruned_nodes': pruned_nodes,
+        'pruned_links': pruned_links,
+        'nodes_removed': columns.num_nodes - pruned_nodes,
+        'links_removed': columns.num_links - pruned_links,
+        'steps': report
     }
-    
+
     return metadata
 
 
-def print_pruning_summary(original_kg, pruned_kg, exclude_entity_types, exclude_relationship_types, isolated_nodes_removed=None):
+def print_pruning_summary(columns, node_mask, link_mask, steps, report):
     """Print a summary of the pruning operation."""
-    original_nodes = len(original_kg.get('nodes', []))
-    original_links = len(original_kg.get('links', []))
-    pruned_nodes = len(pruned_kg.get('nodes', []))
-    pruned_links = len(pruned_kg.get('links', []))
-    
+    original_nodes = columns.num_nodes
+    original_links = columns.num_links
+    pruned_nodes = int(node_mask.sum())
+    pruned_links = int(link_mask.sum())
+
     print(f"\n{'='*60}")
     print(f"PRUNING SUMMARY")
     print(f"{'='*60}")
-    
+
     print(f"\n📊 BEFORE PRUNING:")
     print(f"   Nodes: {original_nodes}")
     print(f"   Links: {original_links}")
-    
+
     print(f"\n📊 AFTER PRUNING:")
     print(f"   Nodes: {pruned_nodes}")
     print(f"   Links: {pruned_links}")
-    
+
     print(f"\n🗑️  REMOVED:")
     print(f"   Nodes: {original_nodes - pruned_nodes}")
     print(f"   Links: {original_links - pruned_links}")
-    
+
+    isolated_nodes_removed = sum(entry['isolated_nodes_removed'] for entry in report)
     if isolated_nodes_removed:
-        print(f"   Isolated nodes: {len(isolated_nodes_removed)}")
-    
+        print(f"   Isolated nodes: {isolated_nodes_removed}")
+
+    if len(steps) > 1:
+        print(f"\n🔗 STEPS:")
+        for entry in report:
+            print(f"   • {entry['step']}: -{entry['nodes_removed']} nodes, -{entry['links_removed']} links")
+
+    exclude_entity_types = [t for step in steps for t in step['exclude_entities']]
+    exclude_relationship_types = [t for step in steps for t in step['exclude_relationships']]
+
     if exclude_entity_types:
         print(f"\n🚫 EXCLUDED ENTITY TYPES:")
-        for entity_type in exclude_entity_types:
+        for entity_type in dict.fromkeys(exclude_entity_types):
             print(f"   • {entity_type}")
-    
+
     if exclude_relationship_types:
         print(f"\n🚫 EXCLUDED RELATIONSHIP TYPES:")
-        for rel_type in exclude_relationship_types:
+        for rel_type in dict.fromkeys(exclude_relationship_types):
             print(f"   • {rel_type}")
-    
+
     # Calculate percentages
     if original_nodes > 0:
         nodes_kept_pct = (pruned_nodes / original_nodes) * 100
         print(f"\n📈 RETENTION RATE:")
         print(f"   Nodes: {nodes_kept_pct:.1f}% retained")
-    
+
     if original_links > 0:
         links_kept_pct = (pruned_links / original_links) * 100
         print(f"   Links: {links_kept_pct:.1f}% retained")
 
 
-def list_available_types(kg):
+def list_available_types(columns):
     """List all available entity and relationship types in the knowledge graph."""
-    nodes = kg.get('nodes', [])
-    links = kg.get('links', [])
-    
-    # Count entity types
-    entity_types = Counter()
-    for node in nodes:
-        node_type = node.get('type', 'unknown')
-        entity_types[node_type] += 1
-    
-    # Count relationship types
-    rel_types = Counter()
-    for link in links:
-        rel_type = link.get('type', link.get('relationship', link.get('label', 'unknown')))
-        rel_types[rel_type] += 1
-    
+    entity_types = columns.node_type_counts(columns.all_nodes())
+    rel_types = columns.link_type_counts(columns.all_links())
+
     print(f"\n📋 AVAILABLE ENTITY TYPES:")
-    for entity_type, count in entity_types.most_common():
+    for entity_type, count in sorted(entity_types.items(), key=lambda x: x[1], reverse=True):
         print(f"   • {entity_type}: {count}")
-    
+
     print(f"\n📋 AVAILABLE RELATIONSHIP TYPES:")
-    for rel_type, count in rel_types.most_common():
+    for rel_type, count in sorted(rel_types.items(), key=lambda x: x[1], reverse=True):
         print(f"   • {rel_type}: {count}")
 
 
@@ -224,66 +266,55 @@ def main():
     parser = argparse.ArgumentParser(description='Prune knowledge graph by excluding specified entity and relationship types')
     parser.add_argument('input_file', help='Input knowledge graph JSON file')
     parser.add_argument('output_file', help='Output pruned knowledge graph JSON file')
-    parser.add_argument('--exclude-entities', nargs='+', help='Entity types to exclude', default=[])
-    parser.add_argument('--exclude-relationships', nargs='+', help='Relationship types to exclude', default=[])
-    parser.add_argument('--remove-isolated', action='store_true', help='Remove nodes with no connections')
+    add_pruning_arguments(parser)
+    parser.add_argument('--config', action='append', default=[], metavar='FILE',
+                        help='Pruning step read from a config file; repeat to chain steps '
+                             '(applied after the command-line options)')
+    parser.add_argument('--compact', action='store_true',
+                        help='Write the compact encoding instead of the classic indented layout')
+    parser.add_argument('--snapshot', action='store_true',
+                        help='Also write a binary snapshot (.npz) for fast loading by the server and KG tools')
     parser.add_argument('--list-types', action='store_true', help='List all available types and exit')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be pruned without saving')
-    
+
     args = parser.parse_args()
-    
+
     # Load knowledge graph
-    kg = load_knowledge_graph(args.input_file)
-    
+    columns = load_knowledge_graph(args.input_file)
+
     # List types if requested
     if args.list_types:
-        list_available_types(kg)
+        list_available_types(columns)
         return
-    
-    # Validate that we have something to exclude
-    if not args.exclude_entities and not args.exclude_relationships:
+
+    # Command-line options first, then config files in order
+    steps = []
+    command_line = pruning_step(args, 'command line')
+    if not is_empty_step(command_line):
+        steps.append(command_line)
+    steps.extend(load_pruning_config(path) for path in args.config)
+
+    # Validate that we have something to prune
+    if not steps:
         print("Error: You must specify at least one entity type or relationship type to exclude.")
         print("Use --list-types to see available types.")
         sys.exit(1)
-    
-    # Extract components
-    original_nodes = kg.get('nodes', [])
-    original_links = kg.get('links', [])
-    original_metadata = kg.get('metadata', {})
-    
-    # Prune entities
-    pruned_nodes, removed_node_ids = prune_entities(original_nodes, args.exclude_entities)
-    
-    # Prune relationships
-    pruned_links = prune_relationships(original_links, args.exclude_relationships, removed_node_ids)
-    
-    # Remove isolated nodes if requested
-    isolated_nodes_removed = []
-    if args.remove_isolated:
-        pruned_nodes, isolated_nodes_removed = remove_isolated_nodes(pruned_nodes, pruned_links)
-    
-    # Create pruned knowledge graph
-    pruned_kg = {
-        'nodes': pruned_nodes,
-        'links': pruned_links
-    }
-    
+
+    node_mask, link_mask, report = prune_graph(columns, steps)
+
     # Update metadata
-    if original_metadata:
-        pruned_metadata = update_metadata(original_metadata, original_nodes, original_links, 
-                                        pruned_nodes, pruned_links)
-        pruned_kg['metadata'] = pruned_metadata
-    
+    metadata = update_metadata(columns.metadata, columns, node_mask, link_mask, report)
+
     # Print summary
-    print_pruning_summary(kg, pruned_kg, args.exclude_entities, args.exclude_relationships, isolated_nodes_removed)
-    
+    print_pruning_summary(columns, node_mask, link_mask, steps, report)
+
     # Save or show dry run
     if args.dry_run:
         print(f"\n🔍 DRY RUN: Would save pruned graph to '{args.output_file}'")
         print("   Use without --dry-run to actually save the file.")
     else:
-        save_knowledge_graph(pruned_kg, args.output_file)
+        save_knowledge_graph(columns, node_mask, link_mask, metadata, args.output_file, args.compact, args.snapshot)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -11,9 +11,17 @@ import numpy as np
 import logging
 from typing import List, Dict, Any, Tuple, Optional, Union
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+# Add project root to path for imports
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from DB.utils.connection import read_connection
+
 load_dotenv()
 
 # Configure logging
@@ -244,21 +252,19 @@ def load_embedding_from_blob(blob: bytes) -> Optional[np.ndarray]:
 
 def get_db_connection(db_path: str) -> sqlite3.Connection:
     """
-    Get database connection with proper configuration.
+    Get a pooled read connection with proper configuration.
     
     Args:
         db_path: Path to SQLite database
         
     Returns:
-        SQLite connection with row factory
+        SQLite connection with row factory (close() returns it to the pool)
     """
     try:
         if not Path(db_path).exists():
             raise FileNotFoundError(f"Database not found at {db_path}")
             
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row  # Enable column access by name
-        return conn
+        return read_connection(db_path)  # Row factory enables column access by name
     except Exception as e:
         logger.error(f"Error connecting to database: {e}")
         raise
@@ -5,12 +5,14 @@ Finds and merges duplicate entities in the knowledge graph.
 """
 
 import sqlite3
+import sys
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Set, Tuple, Optional
 import numpy as np
-import difflib
 from datetime import datetime
 import json
+import hashlib
 from collections import defaultdict
 
 from langchain_openai import ChatOpenAI
@@ -21,10 +23,74 @@ from dotenv import load_dotenv
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
+import random
+import threading
+
+# Add project root to path for imports
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+from DB.utils.connection import read_connection, write_connection
+from DB.utils.string_similarity import find_similar_pairs, find_similar_pairs_for
+from DB.utils.change_log import log_graph_changes, NODE, EDGES
 
 # Load environment variables
 load_dotenv()
 
+# LLM verdict cache, kept in its own file next to the metadata database so it
+# survives full rebuilds (build_database.py deletes metadata.db)
+VERDICT_CACHE_FILE = "dedup_verdicts.db"
+
+VERDICT_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS dedup_verdicts (
+        entity_type TEXT NOT NULL,
+        name_a TEXT NOT NULL,
+        name_b TEXT NOT NULL,
+        context_hash TEXT NOT NULL,
+        are_same BOOLEAN NOT NULL,
+        canonical_name TEXT,
+        explanation TEXT,
+        model TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (entity_type, name_a, name_b, context_hash)
+    )
+"""
+
+
+VERIFY_SYSTEM_PROMPT = """You are helping deduplicate entities in an Interactive CV knowledge graph system.
+
+Context: This database contains entities extracted from academic papers and personal notes by Vaios Laschos,
+a mathematician transitioning to ML/AI. The system tracks research topics, collaborators, methods, and projects.
+
+Entity type: {entity_type}
+{categories_section}
+
+Your task: Determine if these two {entity_type} entities refer to the same thing.
+Consider variations in naming, abbreviations, and context.
+
+{format_instructions}"""
+
+
+# Mirrors metadata_tables.dedup_state in blueprints/core/database_schema.yaml,
+# so databases built before incremental deduplication can be upgraded in place.
+DEDUP_STATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS dedup_state (
+        entity_type TEXT PRIMARY KEY,
+        last_entity_id INTEGER NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+# Maximum ids bound in one "IN (...)" list
+SQL_BATCH_SIZE = 500
+
+
+def normalize_name(name: str) -> str:
+    """Normalize an entity name for verdict cache keys."""
+    return ' '.join(name.lower().split())
+
 
 class DuplicateVerification(BaseModel):
     """Schema for duplicate verification response."""
@@ -36,22 +102,134 @@ class DuplicateVerification(BaseModel):
     )
 
 
+class PairVerification(DuplicateVerification):
+    """Verdict for one pair inside a batch request."""
+    pair_number: int = Field(description="Number of the pair this verdict is for")
+
+
+class BatchVerification(BaseModel):
+    """Schema for batch duplicate verification response."""
+    verdicts: List[PairVerification] = Field(description="One verdict per pair, in any order")
+
+
+class AdaptiveConcurrency:
+    """Limit concurrent LLM requests, backing off when the provider rate-limits.
+    
+    Additive increase / multiplicative decrease: every success lets one more
+    request run (up to max_workers), every rate-limit response halves the limit.
+    """
+    
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self.limit = self.max_workers
+        self.active = 0
+        self._condition = threading.Condition()
+    
+    def __enter__(self):
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active += 1
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+        return False
+    
+    def succeeded(self):
+        with self._condition:
+            if self.limit < self.max_workers:
+                self.limit += 1
+                self._condition.notify_all()
+    
+    def rate_limited(self):
+        with self._condition:
+            self.limit = max(1, self.limit // 2)
+
+
+# Retries for a rate-limited LLM request before giving up on it
+MAX_RATE_LIMIT_RETRIES = 5
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an LLM error is a provider rate limit (HTTP 429)."""
+    text = f"{type(error).__name__} {error}".lower()
+    return 'ratelimit' in text or 'rate limit' in text or '429' in text
+
+
+class UnionFind:
+    """Disjoint sets with path compression and union by rank."""
+    
+    def __init__(self):
+        self.parent = {}
+        self.rank = {}
+    
+    def find(self, node):
+        parent = self.parent
+        if node not in parent:
+            parent[node] = node
+            self.rank[node] = 0
+            return node
+        
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        
+        # Point every node on the path straight at the root
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+    
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+
+
 class EntityDeduplicator:
     """Deduplicate entities using string matching, embeddings, and LLM verification."""
     
-    def __init__(self, db_path: str = "DB/metadata.db", similarity_threshold: float = 0.85):
+    # Rows per block when computing embedding similarities (block x n matrix in memory)
+    SIMILARITY_BLOCK_SIZE = 512
+    
+    def __init__(self, db_path: str = "DB/metadata.db", similarity_threshold: float = 0.85,
+                 use_verdict_cache: bool = True):
         self.db_path = db_path
         self.similarity_threshold = similarity_threshold
         
+        # Verdict cache: pairs judged on earlier runs are not sent to the LLM again
+        self.verdict_cache_path = str(Path(db_path).parent / VERDICT_CACHE_FILE) if use_verdict_cache else None
+        self.cache_hits = 0
+        
+        # Run statistics (counters are shared by verification threads)
+        self.llm_calls = 0
+        self.run_stats = {}
+        self._counter_lock = threading.Lock()
+        if self.verdict_cache_path:
+            conn = write_connection(self.verdict_cache_path)
+            try:
+                conn.execute(VERDICT_TABLE_SQL)
+                conn.commit()
+            finally:
+                conn.close()
+        
         # Initialize Gemini 2.5 Flash
         api_key = os.getenv("OPENROUTER_API_KEY")
         if not api_key:
             raise ValueError("OPENROUTER_API_KEY not found in environment")
             
+        self.model_name = "google/gemini-2.5-flash"
         self.llm = ChatOpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=SecretStr(api_key),
-            model="google/gemini-2.5-flash",
+            model=self.model_name,
             default_headers={
                 "HTTP-Referer": "http://localhost:3000",
                 "X-Title": "Entity Deduplicator",
@@ -60,22 +238,32 @@ class EntityDeduplicator:
         )
         
         self.parser = PydanticOutputParser(pydantic_object=DuplicateVerification)
+        self.batch_parser = PydanticOutputParser(pydantic_object=BatchVerification)
         
         # Audit log
         self.audit_log = []
     
-    def get_connection(self) -> sqlite3.Connection:
-        """Get database connection."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def get_connection(self, write: bool = False) -> sqlite3.Connection:
+        """Get a pooled database connection (the shared writer if write=True)."""
+        if write:
+            return write_connection(self.db_path)
+        return read_connection(self.db_path)
+    
+    def _count(self, counter: str):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
     
     def get_entity_context(self, entity_type: str, entity_id: int) -> Dict:
         """Get context for an entity including related documents."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        return self.load_entity_contexts(entity_type, [entity_id])[entity_id]
+    
+    def load_entity_contexts(self, entity_type: str, entity_ids: List[int]) -> Mapping[int, Dict]:
+        """Get contexts for many entities with a few grouped queries.
         
-        # Get entity details
+        Each context holds the entity's attributes, up to 5 related document
+        titles and its relationship count. The returned map is read-only, so
+        verification threads can share it.
+        """
         table_map = {
             'topic': 'topics',
             'person': 'people',
@@ -84,45 +272,73 @@ class EntityDeduplicator:
             'method': 'methods',
             'application': 'applications'
         }
-        
         table = table_map[entity_type]
-        cursor.execute(f"SELECT * FROM {table} WHERE id = ?", (entity_id,))
-        entity = dict(cursor.fetchone())
         
-        # Get related documents
-        cursor.execute("""
-            SELECT r.source_id, r.relationship_type
-            FROM relationships r
-            WHERE r.target_type = ? AND r.target_id = ?
-            AND r.source_type = 'document'
-            LIMIT 5
-        """, (entity_type, str(entity_id)))
-        
-        docs = []
-        for rel in cursor.fetchall():
-            doc_type, doc_id = rel['source_id'].split('_')
-            table = f"{doc_type}_documents"
-            cursor.execute(f"SELECT title FROM {table} WHERE id = ?", (doc_id,))
-            doc = cursor.fetchone()
-            if doc:
-                docs.append(doc['title'])
-        
-        entity['related_documents'] = docs
-        
-        # Get relationship count
-        cursor.execute("""
-            SELECT COUNT(*) as cnt FROM relationships
-            WHERE (target_type = ? AND target_id = ?)
-            OR (source_type = ? AND source_id = ?)
-        """, (entity_type, str(entity_id), entity_type, str(entity_id)))
+        ids = list(dict.fromkeys(entity_ids))
+        batches = [ids[i:i + SQL_BATCH_SIZE] for i in range(0, len(ids), SQL_BATCH_SIZE)]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
-        entity['relationship_count'] = cursor.fetchone()['cnt']
+        # Get entity details
+        contexts = {}
+        for batch in batches:
+            cursor.execute(f"SELECT * FROM {table} WHERE id IN ({', '.join('?' * len(batch))})", batch)
+            for row in cursor.fetchall():
+                contexts[row['id']] = dict(row)
+        
+        # Get related documents (first 5 document relationships per entity, in
+        # unique-index order so verdict cache keys stay stable)
+        related = defaultdict(list)
+        for batch in batches:
+            cursor.execute(f"""
+                SELECT target_id, source_id FROM (
+                    SELECT target_id, source_id,
+                           ROW_NUMBER() OVER (PARTITION BY target_id ORDER BY source_id, relationship_type) AS position
+                    FROM relationships
+                    WHERE target_type = ? AND target_id IN ({', '.join('?' * len(batch))})
+                    AND source_type = 'document'
+                ) WHERE position <= 5
+                ORDER BY target_id, position
+            """, [entity_type] + [str(entity_id) for entity_id in batch])
+            for row in cursor.fetchall():
+                related[int(row['target_id'])].append(row['source_id'])
+        
+        doc_ids_by_type = defaultdict(set)
+        for source_ids in related.values():
+            for source_id in source_ids:
+                doc_type, doc_id = source_id.split('_')
+                doc_ids_by_type[doc_type].add(int(doc_id))
+        
+        titles = {}
+        for doc_type, doc_ids in doc_ids_by_type.items():
+            doc_ids = sorted(doc_ids)
+            for i in range(0, len(doc_ids), SQL_BATCH_SIZE):
+                batch = doc_ids[i:i + SQL_BATCH_SIZE]
+                cursor.execute(f"SELECT id, title FROM {doc_type}_documents WHERE id IN ({', '.join('?' * len(batch))})",
+                               batch)
+                for row in cursor.fetchall():
+                    titles[f"{doc_type}_{row['id']}"] = row['title']
         
         conn.close()
-        return entity
+        
+        # Get relationship counts
+        degrees = self.get_relationship_degrees(entity_type, ids)
+        
+        for entity_id, entity in contexts.items():
+            entity['related_documents'] = [titles[source_id] for source_id in related.get(entity_id, [])
+                                           if source_id in titles]
+            entity['relationship_count'] = degrees.get(entity_id, 0)
+        
+        return MappingProxyType(contexts)
     
-    def find_string_duplicates(self, entity_type: str) -> List[Tuple[int, int, float]]:
-        """Find potential duplicates using string similarity."""
+    def find_string_duplicates(self, entity_type: str,
+                               new_ids: Optional[Set[int]] = None) -> List[Tuple[int, int, float]]:
+        """Find potential duplicates using string similarity.
+        
+        With new_ids, only pairs involving at least one of those entities are
+        returned (new entities compared against the full set).
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -153,39 +369,39 @@ class EntityDeduplicator:
                 # Add all pairs of exact matches
                 for i in range(len(items)):
                     for j in range(i + 1, len(items)):
-                        candidates.append((items[i][0], items[j][0], 1.0))
+                        if new_ids is None or items[i][0] in new_ids or items[j][0] in new_ids:
+                            candidates.append((items[i][0], items[j][0], 1.0))
+        
+        # Entity-specific thresholds
+        threshold = {
+            'person': 0.9,      # Names need high similarity
+            'institution': 0.9,  # Organizations too
+            'topic': 0.85,      # Some variation expected
+            'method': 0.85,
+            'project': 0.8,
+            'application': 0.8
+        }.get(entity_type, 0.85)
+        
+        # Find fuzzy matches (n-gram blocking proposes pairs, difflib scores them)
+        lower_names = [name.lower() for _, name in entities]
+        if new_ids is None:
+            similar_pairs = find_similar_pairs(lower_names, threshold)
+        else:
+            queries = [i for i, (entity_id, _) in enumerate(entities) if entity_id in new_ids]
+            similar_pairs = find_similar_pairs_for(lower_names, queries, threshold)
         
-        # Find fuzzy matches
-        for i in range(len(entities)):
-            for j in range(i + 1, len(entities)):
-                id1, name1 = entities[i]
-                id2, name2 = entities[j]
-                
-                # Skip if already added as exact match
-                if name1.lower() == name2.lower():
-                    continue
-                
-                # Calculate similarity
-                ratio = difflib.SequenceMatcher(None, name1.lower(), name2.lower()).ratio()
-                
-                # Entity-specific thresholds
-                threshold = {
-                    'person': 0.9,      # Names need high similarity
-                    'institution': 0.9,  # Organizations too
-                    'topic': 0.85,      # Some variation expected
-                    'method': 0.85,
-                    'project': 0.8,
-                    'application': 0.8
-                }.get(entity_type, 0.85)
-                
-                if ratio >= threshold:
-                    candidates.append((id1, id2, ratio))
+        for i, j, ratio in similar_pairs:
+            # Skip if already added as exact match
+            if lower_names[i] == lower_names[j]:
+                continue
+            
+            candidates.append((entities[i][0], entities[j][0], ratio))
         
         conn.close()
         return sorted(candidates, key=lambda x: x[2], reverse=True)
     
-    def find_embedding_duplicates(self, entity_type: str) -> List[Tuple[int, int, float]]:
-        """Find potential duplicates using embedding similarity."""
+    def load_embedding_matrix(self, entity_type: str) -> Tuple[List[int], np.ndarray]:
+        """Load embeddings for an entity type as a row-normalized matrix."""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -208,64 +424,236 @@ class EntityDeduplicator:
             embedding = np.frombuffer(row['embedding'], dtype=np.float32)
             embeddings.append(embedding)
         
+        conn.close()
+        
+        if not embeddings:
+            return entity_ids, np.zeros((0, 0), dtype=np.float32)
+        
+        matrix = np.vstack(embeddings)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0  # Zero vectors stay zero (similarity 0)
+        return entity_ids, matrix / norms
+    
+    def find_embedding_duplicates(self, entity_type: str,
+                                  new_ids: Optional[Set[int]] = None) -> List[Tuple[int, int, float]]:
+        """Find potential duplicates using embedding similarity.
+        
+        With new_ids, only the rows of those entities are compared against
+        the full matrix.
+        """
+        entity_ids, matrix = self.load_embedding_matrix(entity_type)
+        
         candidates = []
         
-        # Calculate pairwise cosine similarities
-        for i in range(len(embeddings)):
-            for j in range(i + 1, len(embeddings)):
-                # Cosine similarity
-                similarity = np.dot(embeddings[i], embeddings[j]) / (
-                    np.linalg.norm(embeddings[i]) * np.linalg.norm(embeddings[j])
-                )
+        if new_ids is not None:
+            rows = np.array([i for i, entity_id in enumerate(entity_ids) if entity_id in new_ids], dtype=np.int64)
+            is_new = np.zeros(len(entity_ids), dtype=bool)
+            is_new[rows] = True
+            
+            for start in range(0, len(rows), self.SIMILARITY_BLOCK_SIZE):
+                block = rows[start:start + self.SIMILARITY_BLOCK_SIZE]
+                similarities = matrix[block] @ matrix.T
                 
-                if similarity >= self.similarity_threshold:
-                    candidates.append((entity_ids[i], entity_ids[j], float(similarity)))
+                hits, cols = np.nonzero(similarities >= self.similarity_threshold)
+                # Pairs of two new entities are found from both sides; keep one
+                keep = (cols != block[hits]) & (~is_new[cols] | (cols > block[hits]))
+                for hit, col in zip(hits[keep], cols[keep]):
+                    candidates.append((entity_ids[block[hit]], entity_ids[col],
+                                       float(similarities[hit, col])))
+            
+            return sorted(candidates, key=lambda x: x[2], reverse=True)
+        
+        # Cosine similarities block by block; each block is compared only with
+        # itself and later rows, so every pair is scored once (upper triangle)
+        n = len(entity_ids)
+        for start in range(0, n, self.SIMILARITY_BLOCK_SIZE):
+            end = min(start + self.SIMILARITY_BLOCK_SIZE, n)
+            similarities = matrix[start:end] @ matrix[start:].T
+            
+            rows, cols = np.nonzero(similarities >= self.similarity_threshold)
+            upper = cols > rows
+            for row, col in zip(rows[upper], cols[upper]):
+                candidates.append((entity_ids[start + row], entity_ids[start + col],
+                                   float(similarities[row, col])))
         
-        conn.close()
         return sorted(candidates, key=lambda x: x[2], reverse=True)
     
+    def get_high_water_mark(self, entity_type: str) -> Optional[int]:
+        """Highest entity id covered by an earlier deduplication run, if any."""
+        conn = self.get_connection()
+        try:
+            row = conn.execute("SELECT last_entity_id FROM dedup_state WHERE entity_type = ?",
+                               (entity_type,)).fetchone()
+        except sqlite3.OperationalError:
+            # Database predates incremental deduplication
+            row = None
+        finally:
+            conn.close()
+        return row['last_entity_id'] if row else None
+    
+    def set_high_water_mark(self, entity_type: str, last_entity_id: int):
+        """Record that entities up to last_entity_id have been deduplicated."""
+        conn = self.get_connection(write=True)
+        try:
+            conn.execute(DEDUP_STATE_TABLE_SQL)
+            conn.execute("""
+                INSERT INTO dedup_state (entity_type, last_entity_id, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(entity_type) DO UPDATE SET
+                    last_entity_id = excluded.last_entity_id,
+                    updated_at = CURRENT_TIMESTAMP
+            """, (entity_type, last_entity_id))
+            conn.commit()
+        finally:
+            conn.close()
+    
     def find_duplicate_clusters(self, candidates: List[Tuple[int, int, float]]) -> List[Dict]:
-        """Group transitively connected duplicates into clusters."""
-        # Build adjacency list
-        graph = defaultdict(set)
-        scores = {}
+        """Group transitively connected duplicates into clusters.
         
+        Each cluster keeps only its candidate edges as 'pairs' (not every pair
+        of members), so clustering is linear in the number of candidates.
+        """
+        # Keep one edge per pair (last score wins)
+        scores = {}
         for id1, id2, score in candidates:
-            graph[id1].add(id2)
-            graph[id2].add(id1)
-            key = (min(id1, id2), max(id1, id2))
-            scores[key] = score
-        
-        # Find connected components using DFS
-        visited = set()
-        clusters = []
-        
-        def dfs(node, cluster):
-            visited.add(node)
-            cluster.add(node)
-            for neighbor in graph[node]:
-                if neighbor not in visited:
-                    dfs(neighbor, cluster)
-        
-        for node in graph:
-            if node not in visited:
-                cluster = set()
-                dfs(node, cluster)
-                if len(cluster) > 1:  # Only keep actual duplicates
-                    clusters.append({
-                        'ids': sorted(list(cluster)),
-                        'pairs': [(a, b, scores.get((min(a,b), max(a,b)), 0)) 
-                                 for i, a in enumerate(cluster) 
-                                 for b in list(cluster)[i+1:]]
-                    })
+            if id1 != id2:
+                scores[(min(id1, id2), max(id1, id2))] = score
+        
+        # Find connected components
+        components = UnionFind()
+        for id1, id2 in scores:
+            components.union(id1, id2)
+        
+        members = defaultdict(list)
+        for node in components.parent:
+            members[components.find(node)].append(node)
+        
+        edges = defaultdict(list)
+        for (id1, id2), score in scores.items():
+            edges[components.find(id1)].append((id1, id2, score))
+        
+        clusters = [{'ids': sorted(members[root]), 'pairs': edges[root]} for root in members]
         
         return sorted(clusters, key=lambda x: len(x['ids']), reverse=True)
     
-    def choose_canonical_entity(self, entity_type: str, entity_ids: List[int]) -> Tuple[int, str]:
-        """Choose the best entity from a cluster to keep."""
+    def split_partial_cluster(self, cluster: Dict, verified_pairs: List[Dict]) -> List[Dict]:
+        """Break a partly verified cluster into fully verified sub-clusters.
+        
+        Sub-clusters are the connected components of the verified pairs; one
+        is kept only if every candidate pair inside it was verified as a
+        duplicate (none judged different or failed).
+        """
+        components = UnionFind()
+        verified = set()
+        for pair in verified_pairs:
+            components.union(pair['keeper_id'], pair['duplicate_id'])
+            verified.add((min(pair['keeper_id'], pair['duplicate_id']), max(pair['keeper_id'], pair['duplicate_id'])))
+        
+        members = defaultdict(list)
+        for node in components.parent:
+            members[components.find(node)].append(node)
+        
+        rejected = {components.find(id1) for id1, id2, _ in cluster['pairs']
+                    if id1 in components.parent and id2 in components.parent
+                    and components.find(id1) == components.find(id2)
+                    and (min(id1, id2), max(id1, id2)) not in verified}
+        
+        return [{
+            'cluster_ids': sorted(ids),
+            'verified_pairs': [pair for pair in verified_pairs if components.find(pair['keeper_id']) == root]
+        } for root, ids in members.items() if root not in rejected]
+    
+    def get_relationship_degrees(self, entity_type: str,
+                                 entity_ids: Optional[List[int]] = None) -> Dict[int, int]:
+        """Relationship count (as source or target) per entity, from one grouped query.
+        
+        Covers all entities of the type, or only entity_ids. Entities without
+        relationships are left out.
+        """
+        if entity_ids is None:
+            batches = [None]
+        else:
+            ids = [str(entity_id) for entity_id in dict.fromkeys(entity_ids)]
+            batches = [ids[i:i + SQL_BATCH_SIZE] for i in range(0, len(ids), SQL_BATCH_SIZE)]
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        degrees = {}
+        for batch in batches:
+            if batch is None:
+                target_filter = source_filter = ""
+                params = []
+            else:
+                marks = ', '.join('?' * len(batch))
+                target_filter = f"AND target_id IN ({marks})"
+                source_filter = f"AND source_id IN ({marks})"
+                params = batch
+            
+            # Each branch uses one of the (type, id) indexes; self-relationships
+            # are counted from both sides, so they are subtracted once
+            cursor.execute(f"""
+                SELECT entity_id, SUM(cnt) AS degree FROM (
+                    SELECT target_id AS entity_id, COUNT(*) AS cnt FROM relationships
+                    WHERE target_type = ? {target_filter} GROUP BY target_id
+                    UNION ALL
+                    SELECT source_id, COUNT(*) FROM relationships
+                    WHERE source_type = ? {source_filter} GROUP BY source_id
+                    UNION ALL
+                    SELECT source_id, -COUNT(*) FROM relationships
+                    WHERE source_type = ? AND target_type = ? AND source_id = target_id {source_filter}
+                    GROUP BY source_id
+                ) GROUP BY entity_id
+            """, [entity_type] + params + [entity_type] + params + [entity_type, entity_type] + params)
+            
+            for row in cursor.fetchall():
+                if row['degree'] and str(row['entity_id']).isdigit():
+                    degrees[int(row['entity_id'])] = row['degree']
+        
+        conn.close()
+        return degrees
+    
+    @staticmethod
+    def canonical_score(entity: Dict) -> float:
+        """How suitable an entity (with relationship_count) is as the one to keep."""
+        score = 0
+        name = entity['name']
+        
+        # 1. Relationship count (most important)
+        score += entity['relationship_count'] * 100
+        
+        # 2. Proper capitalization
+        if name[0].isupper():
+            score += 50
+        
+        # 3. No kebab-case or underscores
+        if '-' not in name and '_' not in name:
+            score += 30
+        
+        # 4. Proper spacing after punctuation
+        if '. ' in name:
+            score += 20
+        elif '.' in name and not name.endswith('.'):
+            score -= 10
+        
+        # 5. Length (prefer more complete names)
+        score += len(name) * 0.1
+        
+        # 6. Has additional metadata
+        if entity.get('description'):
+            score += 10
+        if entity.get('category') or entity.get('role') or entity.get('affiliation'):
+            score += 10
+        
+        return score
+    
+    def choose_canonical_entities(self, entity_type: str,
+                                  clusters: List[List[int]]) -> List[Tuple[int, str]]:
+        """Choose the entity to keep for each cluster.
+        
+        Attributes and relationship degrees of all clusters are loaded in bulk;
+        the choice itself is scored in memory.
+        """
         table_map = {
             'topic': 'topics',
             'person': 'people',
@@ -276,70 +664,42 @@ class EntityDeduplicator:
         }
         table = table_map[entity_type]
         
-        # Get all entities
-        entities = []
-        for entity_id in entity_ids:
-            cursor.execute(f"SELECT * FROM {table} WHERE id = ?", (entity_id,))
-            entity = dict(cursor.fetchone())
-            
-            # Get relationship count
-            cursor.execute("""
-                SELECT COUNT(*) as cnt FROM relationships
-                WHERE (target_type = ? AND target_id = ?)
-                OR (source_type = ? AND source_id = ?)
-            """, (entity_type, str(entity_id), entity_type, str(entity_id)))
-            entity['relationship_count'] = cursor.fetchone()['cnt']
-            
-            entities.append(entity)
+        all_ids = list(dict.fromkeys(entity_id for cluster in clusters for entity_id in cluster))
         
+        # Get all entities
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        entities = {}
+        for i in range(0, len(all_ids), SQL_BATCH_SIZE):
+            batch = all_ids[i:i + SQL_BATCH_SIZE]
+            cursor.execute(f"SELECT * FROM {table} WHERE id IN ({', '.join('?' * len(batch))})", batch)
+            for row in cursor.fetchall():
+                entities[row['id']] = dict(row)
         conn.close()
         
-        # Score each entity
-        scored_entities = []
-        for entity in entities:
-            score = 0
-            name = entity['name']
-            
-            # 1. Relationship count (most important)
-            score += entity['relationship_count'] * 100
-            
-            # 2. Proper capitalization
-            if name[0].isupper():
-                score += 50
-            
-            # 3. No kebab-case or underscores
-            if '-' not in name and '_' not in name:
-                score += 30
-            
-            # 4. Proper spacing after punctuation
-            if '. ' in name:
-                score += 20
-            elif '.' in name and not name.endswith('.'):
-                score -= 10
-            
-            # 5. Length (prefer more complete names)
-            score += len(name) * 0.1
-            
-            # 6. Has additional metadata
-            if entity.get('description'):
-                score += 10
-            if entity.get('category') or entity.get('role') or entity.get('affiliation'):
-                score += 10
-            
-            scored_entities.append((entity['id'], entity['name'], score))
+        degrees = self.get_relationship_degrees(entity_type, all_ids)
         
-        # Sort by score (highest first), then by name for consistency
-        scored_entities.sort(key=lambda x: (-x[2], x[1]))
+        keepers = []
+        for cluster in clusters:
+            # Score each entity
+            scored_entities = []
+            for entity_id in cluster:
+                entity = entities[entity_id]
+                entity['relationship_count'] = degrees.get(entity_id, 0)
+                scored_entities.append((entity['id'], entity['name'], self.canonical_score(entity)))
+            
+            # Sort by score (highest first), then by name for consistency
+            scored_entities.sort(key=lambda x: (-x[2], x[1]))
+            keepers.append((scored_entities[0][0], scored_entities[0][1]))
         
-        return scored_entities[0][0], scored_entities[0][1]
+        return keepers
     
-    def verify_duplicate(self, entity_type: str, id1: int, id2: int) -> DuplicateVerification:
-        """Use LLM to verify if two entities are duplicates."""
-        # Get entity contexts
-        entity1 = self.get_entity_context(entity_type, id1)
-        entity2 = self.get_entity_context(entity_type, id2)
-        
-        # Get entity categories for context
+    def choose_canonical_entity(self, entity_type: str, entity_ids: List[int]) -> Tuple[int, str]:
+        """Choose the best entity from a cluster to keep."""
+        return self.choose_canonical_entities(entity_type, [entity_ids])[0]
+    
+    def get_categories_section(self, entity_type: str) -> str:
+        """Common categories shown to the LLM for context."""
         conn = self.get_connection()
         cursor = conn.cursor()
         table = {'topic': 'topics'}.get(entity_type)
@@ -349,20 +709,54 @@ class EntityDeduplicator:
             categories = [row['category'] for row in cursor.fetchall()]
         conn.close()
         
+        if categories:
+            return f"Common categories: {', '.join(categories)}"
+        return ""
+    
+    def pair_inputs(self, entity_type: str, entity1: Dict, entity2: Dict,
+                    categories_section: str) -> Dict:
+        """Prompt variables describing a pair of entities."""
+        # Format attributes
+        def format_attrs(entity):
+            attrs = []
+            for key, val in entity.items():
+                if key not in ['id', 'name', 'related_documents', 'relationship_count', 'created_at'] and val:
+                    attrs.append(f"{key}: {val}")
+            return '\n'.join(attrs) if attrs else "No additional attributes"
+        
+        return {
+            'entity_type': entity_type,
+            'categories_section': categories_section,
+            'name1': entity1['name'],
+            'attrs1': format_attrs(entity1),
+            'docs1': ', '.join(entity1['related_documents'][:3]) if entity1['related_documents'] else "No documents",
+            'rel_count1': entity1['relationship_count'],
+            'name2': entity2['name'],
+            'attrs2': format_attrs(entity2),
+            'docs2': ', '.join(entity2['related_documents'][:3]) if entity2['related_documents'] else "No documents",
+            'rel_count2': entity2['relationship_count'],
+            'format_instructions': self.parser.get_format_instructions()
+        }
+    
+    def verify_duplicate(self, entity_type: str, id1: int, id2: int,
+                         entity1: Optional[Dict] = None, entity2: Optional[Dict] = None,
+                         categories_section: Optional[str] = None) -> DuplicateVerification:
+        """Use LLM to verify if two entities are duplicates.
+        
+        Entity contexts and the categories section can be passed in when the
+        caller has already fetched them.
+        """
+        # Get entity contexts
+        entity1 = entity1 or self.get_entity_context(entity_type, id1)
+        entity2 = entity2 or self.get_entity_context(entity_type, id2)
+        
+        # Get entity categories for context
+        if categories_section is None:
+            categories_section = self.get_categories_section(entity_type)
+        
         # Build prompt
         prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are helping deduplicate entities in an Interactive CV knowledge graph system.
-
-Context: This database contains entities extracted from academic papers and personal notes by Vaios Laschos,
-a mathematician transitioning to ML/AI. The system tracks research topics, collaborators, methods, and projects.
-
-Entity type: {entity_type}
-{categories_section}
-
-Your task: Determine if these two {entity_type} entities refer to the same thing.
-Consider variations in naming, abbreviations, and context.
-
-{format_instructions}"""),
+            ("system", VERIFY_SYSTEM_PROMPT),
             ("user", """Are these two {entity_type} entities the same?
 
 Entity 1: "{name1}"
@@ -380,237 +774,409 @@ If YES, provide the canonical_name (the best name to keep).
 Brief explanation (1 line).""")
         ])
         
-        # Format attributes
-        def format_attrs(entity):
-            attrs = []
-            for key, val in entity.items():
-                if key not in ['id', 'name', 'related_documents', 'relationship_count', 'created_at'] and val:
-                    attrs.append(f"{key}: {val}")
-            return '\n'.join(attrs) if attrs else "No additional attributes"
+        inputs = self.pair_inputs(entity_type, entity1, entity2, categories_section)
         
-        # Prepare categories section
-        categories_section = ""
-        if categories:
-            categories_section = f"Common categories: {', '.join(categories)}"
+        # Reuse an earlier verdict for the same pair in the same context
+        key = self._verdict_key(entity_type, inputs)
+        cached = self.get_cached_verdict(key)
+        if cached:
+            return cached
         
         # Execute chain
         chain = prompt | self.llm | self.parser
         
-        result = chain.invoke({
+        self._count('llm_calls')
+        result = chain.invoke(inputs)
+        
+        self.store_verdict(key, result)
+        return result
+    
+    def verify_duplicates_batch(self, entity_type: str, pairs: List[Tuple[int, int]],
+                                contexts: Dict[int, Dict],
+                                categories_section: str) -> List[Optional[DuplicateVerification]]:
+        """Verify several pairs with a single structured-output LLM request.
+        
+        Returns one verdict per pair (None where the response had no usable
+        verdict, so the caller can fall back to single-pair verification).
+        """
+        results: List[Optional[DuplicateVerification]] = [None] * len(pairs)
+        pending = []  # (index, inputs, cache key)
+        
+        for index, (id1, id2) in enumerate(pairs):
+            inputs = self.pair_inputs(entity_type, contexts[id1], contexts[id2], categories_section)
+            key = self._verdict_key(entity_type, inputs)
+            cached = self.get_cached_verdict(key)
+            if cached:
+                results[index] = cached
+            else:
+                pending.append((index, inputs, key))
+        
+        if not pending:
+            return results
+        
+        blocks = []
+        for number, (_, inputs, _) in enumerate(pending, start=1):
+            blocks.append(f"""Pair {number}:
+Entity 1: "{inputs['name1']}"
+{inputs['attrs1']}
+Appears in: {inputs['docs1']}
+Relationships: {inputs['rel_count1']}
+
+Entity 2: "{inputs['name2']}"
+{inputs['attrs2']}
+Appears in: {inputs['docs2']}
+Relationships: {inputs['rel_count2']}""")
+        
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", VERIFY_SYSTEM_PROMPT),
+            ("user", """For each numbered pair below, are the two {entity_type} entities the same?
+
+{pairs}
+
+Return one verdict per pair with its pair_number.
+are_same: true if same entity, false if different.
+If same, provide the canonical_name (the best name to keep).
+Brief explanation (1 line).""")
+        ])
+        
+        chain = prompt | self.llm | self.batch_parser
+        self._count('llm_calls')
+        response = chain.invoke({
             'entity_type': entity_type,
             'categories_section': categories_section,
-            'name1': entity1['name'],
-            'attrs1': format_attrs(entity1),
-            'docs1': ', '.join(entity1['related_documents'][:3]) if entity1['related_documents'] else "No documents",
-            'rel_count1': entity1['relationship_count'],
-            'name2': entity2['name'],
-            'attrs2': format_attrs(entity2),
-            'docs2': ', '.join(entity2['related_documents'][:3]) if entity2['related_documents'] else "No documents",
-            'rel_count2': entity2['relationship_count'],
-            'format_instructions': self.parser.get_format_instructions()
+            'pairs': '\n\n'.join(blocks),
+            'format_instructions': self.batch_parser.get_format_instructions()
         })
         
-        return result
+        for verdict in response.verdicts:
+            if 1 <= verdict.pair_number <= len(pending):
+                index, _, key = pending[verdict.pair_number - 1]
+                if results[index] is None:
+                    result = DuplicateVerification(
+                        are_same=verdict.are_same,
+                        explanation=verdict.explanation,
+                        canonical_name=verdict.canonical_name
+                    )
+                    self.store_verdict(key, result)
+                    results[index] = result
+        
+        return results
+    
+    def _verdict_key(self, entity_type: str, inputs: Dict) -> Tuple[str, str, str, str]:
+        """Cache key: (entity_type, normalized name A, normalized name B, context hash).
+        
+        The pair is ordered by normalized name so (A, B) and (B, A) share a verdict.
+        """
+        sides = sorted([
+            (normalize_name(inputs['name1']), inputs['attrs1'], inputs['docs1'], inputs['rel_count1']),
+            (normalize_name(inputs['name2']), inputs['attrs2'], inputs['docs2'], inputs['rel_count2'])
+        ])
+        context = json.dumps([entity_type, inputs['categories_section'], sides], default=str)
+        context_hash = hashlib.sha256(context.encode('utf-8')).hexdigest()
+        return entity_type, sides[0][0], sides[1][0], context_hash
+    
+    def get_cached_verdict(self, key: Tuple[str, str, str, str]) -> Optional[DuplicateVerification]:
+        """Look up a stored verdict for a pair."""
+        if not self.verdict_cache_path:
+            return None
+        
+        conn = read_connection(self.verdict_cache_path)
+        try:
+            row = conn.execute("""
+                SELECT are_same, canonical_name, explanation
+                FROM dedup_verdicts
+                WHERE entity_type = ? AND name_a = ? AND name_b = ? AND context_hash = ?
+            """, key).fetchone()
+        finally:
+            conn.close()
+        
+        if row is None:
+            return None
+        
+        self._count('cache_hits')
+        return DuplicateVerification(
+            are_same=bool(row['are_same']),
+            explanation=row['explanation'] or "",
+            canonical_name=row['canonical_name']
+        )
+    
+    def store_verdict(self, key: Tuple[str, str, str, str], verdict: DuplicateVerification):
+        """Persist an LLM verdict for later runs."""
+        if not self.verdict_cache_path:
+            return
+        
+        conn = write_connection(self.verdict_cache_path)
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO dedup_verdicts
+                (entity_type, name_a, name_b, context_hash, are_same, canonical_name, explanation, model)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (*key, verdict.are_same, verdict.canonical_name, verdict.explanation, self.model_name))
+            conn.commit()
+        finally:
+            conn.close()
     
     def verify_duplicates_parallel(self, entity_type: str, pairs: List[Tuple[int, int, float]], 
-                                  max_workers: int = 5) -> List[Dict]:
-        """Verify multiple duplicate pairs in parallel."""
+                                  max_workers: int = 5, batch_size: int = 10,
+                                  contexts: Optional[Mapping[int, Dict]] = None,
+                                  failed_pairs: Optional[List[Tuple[int, int, float]]] = None) -> List[Dict]:
+        """Verify multiple duplicate pairs in parallel.
+        
+        Entity contexts are fetched once per entity (or taken from contexts,
+        see load_entity_contexts), and pairs are sent to the
+        LLM in batches of batch_size per request (batch_size=1 verifies pairs
+        one by one). Concurrency starts at max_workers and is halved whenever
+        the provider rate-limits, then grows back as requests succeed.
+        Pairs whose verification failed are appended to failed_pairs.
+        """
         verified_duplicates = []
+        if not pairs:
+            return verified_duplicates
         
-        def verify_pair(pair_data):
+        # Fetch each entity's context once, shared by all pairs it appears in
+        if contexts is None:
+            entity_ids = [entity_id for id1, id2, _ in pairs for entity_id in (id1, id2)]
+            contexts = self.load_entity_contexts(entity_type, entity_ids)
+        categories_section = self.get_categories_section(entity_type)
+        
+        limiter = AdaptiveConcurrency(max_workers)
+        
+        def call_llm(request):
+            """Run one LLM request, retrying with backoff on rate limits."""
+            for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+                with limiter:
+                    try:
+                        result = request()
+                        limiter.succeeded()
+                        return result
+                    except Exception as e:
+                        if not is_rate_limit_error(e) or attempt == MAX_RATE_LIMIT_RETRIES:
+                            raise
+                        limiter.rate_limited()
+                time.sleep(min(60, 2 ** attempt) * (0.5 + random.random()))
+        
+        def pair_result(pair_data, result):
             id1, id2, score = pair_data
-            try:
-                result = self.verify_duplicate(entity_type, id1, id2)
-                if result.are_same:
-                    # Get contexts for canonical name selection
-                    entity1 = self.get_entity_context(entity_type, id1)
-                    entity2 = self.get_entity_context(entity_type, id2)
-                    
-                    if result.canonical_name:
-                        if entity1['name'] == result.canonical_name:
-                            keeper_id, duplicate_id = id1, id2
-                        else:
-                            keeper_id, duplicate_id = id2, id1
+            if result.are_same:
+                entity1 = contexts[id1]
+                entity2 = contexts[id2]
+                
+                if result.canonical_name:
+                    if entity1['name'] == result.canonical_name:
+                        keeper_id, duplicate_id = id1, id2
                     else:
-                        if entity1['relationship_count'] >= entity2['relationship_count']:
-                            keeper_id, duplicate_id = id1, id2
-                        else:
-                            keeper_id, duplicate_id = id2, id1
-                    
-                    return {
-                        'keeper_id': keeper_id,
-                        'duplicate_id': duplicate_id,
-                        'score': score,
-                        'explanation': result.explanation,
-                        'is_duplicate': True
-                    }
+                        keeper_id, duplicate_id = id2, id1
                 else:
-                    return {
-                        'id1': id1,
-                        'id2': id2,
-                        'score': score,
-                        'explanation': result.explanation,
-                        'is_duplicate': False
-                    }
-            except Exception as e:
+                    if entity1['relationship_count'] >= entity2['relationship_count']:
+                        keeper_id, duplicate_id = id1, id2
+                    else:
+                        keeper_id, duplicate_id = id2, id1
+                
                 return {
-                    'id1': id1,
-                    'id2': id2,
+                    'keeper_id': keeper_id,
+                    'duplicate_id': duplicate_id,
                     'score': score,
-                    'error': str(e),
-                    'is_duplicate': False
+                    'explanation': result.explanation,
+                    'is_duplicate': True
                 }
+            return {
+                'id1': id1,
+                'id2': id2,
+                'score': score,
+                'explanation': result.explanation,
+                'is_duplicate': False
+            }
+        
+        def error_result(pair_data, error):
+            id1, id2, score = pair_data
+            return {
+                'id1': id1,
+                'id2': id2,
+                'score': score,
+                'error': str(error),
+                'is_duplicate': False
+            }
+        
+        def verify_pair(pair_data):
+            id1, id2, _ = pair_data
+            try:
+                result = call_llm(lambda: self.verify_duplicate(
+                    entity_type, id1, id2, contexts[id1], contexts[id2], categories_section))
+                return pair_result(pair_data, result)
+            except Exception as e:
+                return error_result(pair_data, e)
+        
+        def verify_batch(batch):
+            if len(batch) == 1:
+                return [verify_pair(batch[0])]
+            try:
+                verdicts = call_llm(lambda: self.verify_duplicates_batch(
+                    entity_type, [(id1, id2) for id1, id2, _ in batch], contexts, categories_section))
+            except Exception:
+                # Malformed or failed batch response: fall back to one request per pair
+                verdicts = [None] * len(batch)
+            
+            results = []
+            for pair_data, verdict in zip(batch, verdicts):
+                if verdict is None:
+                    # Pair missing from the batch response
+                    results.append(verify_pair(pair_data))
+                else:
+                    results.append(pair_result(pair_data, verdict))
+            return results
+        
+        batch_size = max(1, batch_size)
+        batches = [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
         
         # Process in parallel
+        done = 0
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(verify_pair, pair) for pair in pairs]
+            futures = [executor.submit(verify_batch, batch) for batch in batches]
             
-            for i, future in enumerate(as_completed(futures)):
-                result = future.result()
-                print(f"   [{i+1}/{len(pairs)}] ", end='')
-                
-                if result.get('error'):
-                    print(f"ERROR: {result['error']}")
-                elif result['is_duplicate']:
-                    print(f"DUPLICATE! {result['explanation']}")
-                    verified_duplicates.append(result)
-                else:
-                    print(f"Different. {result['explanation']}")
+            for future in as_completed(futures):
+                for result in future.result():
+                    done += 1
+                    print(f"   [{done}/{len(pairs)}] ", end='')
+                    
+                    if result.get('error'):
+                        print(f"ERROR: {result['error']}")
+                        if failed_pairs is not None:
+                            failed_pairs.append((result['id1'], result['id2'], result['score']))
+                    elif result['is_duplicate']:
+                        print(f"DUPLICATE! {result['explanation']}")
+                        verified_duplicates.append(result)
+                    else:
+                        print(f"Different. {result['explanation']}")
         
         return verified_duplicates
     
-    def merge_entities(self, entity_type: str, keeper_id: int, duplicate_id: int, dry_run: bool = True):
-        """Merge duplicate entity into keeper."""
-        conn = self.get_connection()
+    def merge_into_keeper(self, entity_type: str, keeper_id: int, duplicate_ids: List[int],
+                          dry_run: bool = True) -> Dict:
+        """Merge duplicate entities into keeper with set-based statements in one transaction.
+        
+        Relationships and chunk mentions of every duplicate are re-pointed to the
+        keeper with UPDATE OR IGNORE; rows that would collide with one the keeper
+        already has are then deleted (chunk mention counts are added to the
+        keeper's row first). The statement count does not depend on how many
+        relationships the duplicates have.
+        """
+        table_map = {
+            'topic': 'topics',
+            'person': 'people',
+            'project': 'projects',
+            'institution': 'institutions',
+            'method': 'methods',
+            'application': 'applications'
+        }
+        table = table_map[entity_type]
+        
+        duplicate_ids = [dup_id for dup_id in dict.fromkeys(duplicate_ids) if dup_id != keeper_id]
+        marks = ', '.join('?' * len(duplicate_ids))
+        # relationships and embeddings store ids as text, chunk_entities as integers
+        dup_text_ids = [str(dup_id) for dup_id in duplicate_ids]
+        dup_embedding_ids = [f"{entity_type}_{dup_id}" for dup_id in duplicate_ids]
+        
+        conn = self.get_connection(write=True)
         cursor = conn.cursor()
         
         try:
-            # Get entity names for logging
-            table_map = {
-                'topic': 'topics',
-                'person': 'people',
-                'project': 'projects',
-                'institution': 'institutions',
-                'method': 'methods',
-                'application': 'applications'
-            }
-            table = table_map[entity_type]
-            
-            cursor.execute(f"SELECT name FROM {table} WHERE id = ?", (keeper_id,))
-            keeper_name = cursor.fetchone()['name']
+            if not dry_run:
+                # Hold the write lock from the first read so the merge is atomic
+                cursor.execute("BEGIN IMMEDIATE")
             
-            cursor.execute(f"SELECT name FROM {table} WHERE id = ?", (duplicate_id,))
-            duplicate_name = cursor.fetchone()['name']
+            # Get entity names for logging
+            cursor.execute(f"SELECT id, name FROM {table} WHERE id IN (?, {marks})",
+                           [keeper_id] + duplicate_ids)
+            names = {row['id']: row['name'] for row in cursor.fetchall()}
+            keeper_name = names[keeper_id]
+            duplicates = [{'id': dup_id, 'name': names.get(dup_id)} for dup_id in duplicate_ids]
             
             actions = []
             
-            # 1. Transfer relationships where duplicate is target
-            cursor.execute("""
+            # 1. Transfer relationships where duplicates are target
+            cursor.execute(f"""
                 SELECT COUNT(*) FROM relationships
-                WHERE target_type = ? AND target_id = ?
-            """, (entity_type, str(duplicate_id)))
+                WHERE target_type = ? AND target_id IN ({marks})
+            """, [entity_type] + dup_text_ids)
             target_count = cursor.fetchone()[0]
             
             if target_count > 0:
                 if not dry_run:
-                    # First, check for conflicts
-                    cursor.execute("""
-                        SELECT source_type, source_id, relationship_type 
-                        FROM relationships 
-                        WHERE target_type = ? AND target_id = ?
-                    """, (entity_type, str(duplicate_id)))
-                    
-                    duplicate_rels = cursor.fetchall()
-                    
-                    for rel in duplicate_rels:
-                        # Check if keeper already has this relationship
-                        cursor.execute("""
-                            SELECT 1 FROM relationships 
-                            WHERE source_type = ? AND source_id = ? 
-                            AND target_type = ? AND target_id = ? 
-                            AND relationship_type = ?
-                        """, (rel['source_type'], rel['source_id'], entity_type, str(keeper_id), rel['relationship_type']))
-                        
-                        if cursor.fetchone():
-                            # Delete duplicate relationship
-                            cursor.execute("""
-                                DELETE FROM relationships 
-                                WHERE source_type = ? AND source_id = ? 
-                                AND target_type = ? AND target_id = ? 
-                                AND relationship_type = ?
-                            """, (rel['source_type'], rel['source_id'], entity_type, str(duplicate_id), rel['relationship_type']))
-                        else:
-                            # Update to point to keeper
-                            cursor.execute("""
-                                UPDATE relationships 
-                                SET target_id = ?
-                                WHERE source_type = ? AND source_id = ? 
-                                AND target_type = ? AND target_id = ? 
-                                AND relationship_type = ?
-                            """, (str(keeper_id), rel['source_type'], rel['source_id'], entity_type, str(duplicate_id), rel['relationship_type']))
-                    
+                    cursor.execute(f"""
+                        UPDATE OR IGNORE relationships SET target_id = ?
+                        WHERE target_type = ? AND target_id IN ({marks})
+                    """, [str(keeper_id), entity_type] + dup_text_ids)
+                    # Left over: relationships the keeper already has
+                    cursor.execute(f"""
+                        DELETE FROM relationships
+                        WHERE target_type = ? AND target_id IN ({marks})
+                    """, [entity_type] + dup_text_ids)
                 actions.append(f"Transfer {target_count} relationships as target")
             
-            # 2. Transfer relationships where duplicate is source
-            cursor.execute("""
+            # 2. Transfer relationships where duplicates are source
+            cursor.execute(f"""
                 SELECT COUNT(*) FROM relationships
-                WHERE source_type = ? AND source_id = ?
-            """, (entity_type, str(duplicate_id)))
+                WHERE source_type = ? AND source_id IN ({marks})
+            """, [entity_type] + dup_text_ids)
             source_count = cursor.fetchone()[0]
             
             if source_count > 0:
                 if not dry_run:
-                    # First, check for conflicts
-                    cursor.execute("""
-                        SELECT target_type, target_id, relationship_type 
-                        FROM relationships 
-                        WHERE source_type = ? AND source_id = ?
-                    """, (entity_type, str(duplicate_id)))
-                    
-                    duplicate_rels = cursor.fetchall()
-                    
-                    for rel in duplicate_rels:
-                        # Check if keeper already has this relationship
-                        cursor.execute("""
-                            SELECT 1 FROM relationships 
-                            WHERE source_type = ? AND source_id = ? 
-                            AND target_type = ? AND target_id = ? 
-                            AND relationship_type = ?
-                        """, (entity_type, str(keeper_id), rel['target_type'], rel['target_id'], rel['relationship_type']))
-                        
-                        if cursor.fetchone():
-                            # Delete duplicate relationship
-                            cursor.execute("""
-                                DELETE FROM relationships 
-                                WHERE source_type = ? AND source_id = ? 
-                                AND target_type = ? AND target_id = ? 
-                                AND relationship_type = ?
-                            """, (entity_type, str(duplicate_id), rel['target_type'], rel['target_id'], rel['relationship_type']))
-                        else:
-                            # Update to point to keeper
-                            cursor.execute("""
-                                UPDATE relationships 
-                                SET source_id = ?
-                                WHERE source_type = ? AND source_id = ? 
-                                AND target_type = ? AND target_id = ? 
-                                AND relationship_type = ?
-                            """, (str(keeper_id), entity_type, str(duplicate_id), rel['target_type'], rel['target_id'], rel['relationship_type']))
-                    
+                    cursor.execute(f"""
+                        UPDATE OR IGNORE relationships SET source_id = ?
+                        WHERE source_type = ? AND source_id IN ({marks})
+                    """, [str(keeper_id), entity_type] + dup_text_ids)
+                    cursor.execute(f"""
+                        DELETE FROM relationships
+                        WHERE source_type = ? AND source_id IN ({marks})
+                    """, [entity_type] + dup_text_ids)
                 actions.append(f"Transfer {source_count} relationships as source")
             
-            # 3. Merge attributes (keep best of both)
-            cursor.execute(f"SELECT * FROM {table} WHERE id IN (?, ?)", (keeper_id, duplicate_id))
-            entities = cursor.fetchall()
-            # Convert Row objects to dicts first
-            entity_dicts = [dict(e) for e in entities]
-            keeper_data = entity_dicts[0] if entity_dicts[0]['id'] == keeper_id else entity_dicts[1]
-            duplicate_data = entity_dicts[1] if entity_dicts[0]['id'] == keeper_id else entity_dicts[0]
+            # 3. Transfer chunk mentions
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM chunk_entities
+                WHERE entity_type = ? AND entity_id IN ({marks})
+            """, [entity_type] + duplicate_ids)
+            chunk_count = cursor.fetchone()[0]
+            
+            if chunk_count > 0:
+                if not dry_run:
+                    cursor.execute(f"""
+                        UPDATE OR IGNORE chunk_entities SET entity_id = ?
+                        WHERE entity_type = ? AND entity_id IN ({marks})
+                    """, [keeper_id, entity_type] + duplicate_ids)
+                    # Remaining rows are in chunks that already mention the keeper
+                    cursor.execute(f"""
+                        UPDATE chunk_entities
+                        SET entity_mentions = entity_mentions + (
+                            SELECT SUM(d.entity_mentions) FROM chunk_entities d
+                            WHERE d.chunk_id = chunk_entities.chunk_id
+                            AND d.entity_type = ? AND d.entity_id IN ({marks})
+                        )
+                        WHERE entity_type = ? AND entity_id = ? AND chunk_id IN (
+                            SELECT chunk_id FROM chunk_entities
+                            WHERE entity_type = ? AND entity_id IN ({marks})
+                        )
+                    """, [entity_type] + duplicate_ids + [entity_type, keeper_id, entity_type] + duplicate_ids)
+                    cursor.execute(f"""
+                        DELETE FROM chunk_entities
+                        WHERE entity_type = ? AND entity_id IN ({marks})
+                    """, [entity_type] + duplicate_ids)
+                actions.append(f"Transfer {chunk_count} chunk mentions")
+            
+            # 4. Merge attributes (keeper's value wins, then duplicates in order)
+            cursor.execute(f"SELECT * FROM {table} WHERE id IN (?, {marks})", [keeper_id] + duplicate_ids)
+            entity_dicts = {row['id']: dict(row) for row in cursor.fetchall()}
+            keeper_data = entity_dicts[keeper_id]
             
             updates = {}
             for col in ['description', 'category', 'role', 'affiliation', 'domain', 'type', 'location']:
-                if col in keeper_data:
-                    if not keeper_data.get(col) and duplicate_data.get(col):
-                        updates[col] = duplicate_data[col]
+                if col in keeper_data and not keeper_data.get(col):
+                    for dup_id in duplicate_ids:
+                        value = entity_dicts.get(dup_id, {}).get(col)
+                        if value:
+                            updates[col] = value
+                            break
             
             if updates and not dry_run:
                 set_clause = ', '.join([f"{k} = ?" for k in updates.keys()])
@@ -620,28 +1186,32 @@ Brief explanation (1 line).""")
             elif updates:
                 actions.append(f"Would merge attributes: {list(updates.keys())}")
             
-            # 4. Delete duplicate
+            # 5. Delete duplicates
             if not dry_run:
-                cursor.execute(f"DELETE FROM {table} WHERE id = ?", (duplicate_id,))
-            actions.append("Delete duplicate entity")
+                cursor.execute(f"DELETE FROM {table} WHERE id IN ({marks})", duplicate_ids)
+            actions.append(f"Delete {len(duplicate_ids)} duplicate entities")
             
-            # 5. Delete duplicate embeddings
+            # 6. Delete duplicate embeddings
             if not dry_run:
-                cursor.execute("""
+                cursor.execute(f"""
                     DELETE FROM embeddings
-                    WHERE entity_type = ? AND entity_id = ?
-                """, (entity_type, f"{entity_type}_{duplicate_id}"))
+                    WHERE entity_type = ? AND entity_id IN ({marks})
+                """, [entity_type] + dup_embedding_ids)
             actions.append("Delete duplicate embeddings")
             
             # Commit or rollback
             if not dry_run:
+                # The keeper gains the duplicates' edges and attributes; the
+                # duplicates disappear from the graph
+                log_graph_changes(cursor, NODE, entity_type, [keeper_id] + duplicate_ids)
+                log_graph_changes(cursor, EDGES, entity_type, [keeper_id] + duplicate_ids)
                 conn.commit()
                 self.audit_log.append({
                     'timestamp': datetime.now().isoformat(),
                     'action': 'merge',
                     'entity_type': entity_type,
                     'keeper': {'id': keeper_id, 'name': keeper_name},
-                    'duplicate': {'id': duplicate_id, 'name': duplicate_name},
+                    'duplicates': duplicates,
                     'actions': actions
                 })
             else:
@@ -649,7 +1219,7 @@ Brief explanation (1 line).""")
             
             return {
                 'keeper': {'id': keeper_id, 'name': keeper_name},
-                'duplicate': {'id': duplicate_id, 'name': duplicate_name},
+                'duplicates': duplicates,
                 'actions': actions
             }
             
@@ -659,57 +1229,73 @@ Brief explanation (1 line).""")
         finally:
             conn.close()
     
-    def merge_cluster(self, entity_type: str, cluster_ids: List[int], dry_run: bool = True) -> Dict:
-        """Merge a cluster of duplicate entities into one canonical entity."""
+    def merge_entities(self, entity_type: str, keeper_id: int, duplicate_id: int, dry_run: bool = True):
+        """Merge duplicate entity into keeper."""
+        result = self.merge_into_keeper(entity_type, keeper_id, [duplicate_id], dry_run=dry_run)
+        return {
+            'keeper': result['keeper'],
+            'duplicate': result['duplicates'][0],
+            'actions': result['actions']
+        }
+    
+    def merge_cluster(self, entity_type: str, cluster_ids: List[int], dry_run: bool = True,
+                      keeper: Optional[Tuple[int, str]] = None) -> Dict:
+        """Merge a cluster of duplicate entities into one canonical entity.
+        
+        The whole cluster is merged in a single transaction. keeper is the
+        (id, name) to keep if already chosen (see choose_canonical_entities).
+        """
         if len(cluster_ids) < 2:
             return {'error': 'Cluster must have at least 2 entities'}
         
         # Choose canonical entity
-        keeper_id, keeper_name = self.choose_canonical_entity(entity_type, cluster_ids)
+        keeper_id, keeper_name = keeper or self.choose_canonical_entity(entity_type, cluster_ids)
         duplicate_ids = [id for id in cluster_ids if id != keeper_id]
         
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Get names for logging
-        table_map = {
-            'topic': 'topics',
-            'person': 'people',
-            'project': 'projects',
-            'institution': 'institutions',
-            'method': 'methods',
-            'application': 'applications'
-        }
-        table = table_map[entity_type]
-        
-        duplicate_names = []
-        for dup_id in duplicate_ids:
-            cursor.execute(f"SELECT name FROM {table} WHERE id = ?", (dup_id,))
-            duplicate_names.append(cursor.fetchone()['name'])
-        
-        conn.close()
-        
-        # Merge each duplicate into keeper
-        actions = []
-        for dup_id in duplicate_ids:
-            result = self.merge_entities(entity_type, keeper_id, dup_id, dry_run=dry_run)
-            actions.extend(result['actions'])
+        result = self.merge_into_keeper(entity_type, keeper_id, duplicate_ids, dry_run=dry_run)
         
         return {
             'keeper': {'id': keeper_id, 'name': keeper_name},
-            'duplicates': [{'id': did, 'name': dname} for did, dname in zip(duplicate_ids, duplicate_names)],
+            'duplicates': result['duplicates'],
             'cluster_size': len(cluster_ids),
-            'actions': actions
+            'actions': result['actions']
         }
     
     def deduplicate_entity_type(self, entity_type: str, dry_run: bool = True, 
                                 use_embeddings: bool = True, batch_size: int = 10,
-                                use_clustering: bool = True, parallel_workers: int = 5):
-        """Deduplicate all entities of a given type."""
+                                use_clustering: bool = True, parallel_workers: int = 5,
+                                incremental: bool = False):
+        """Deduplicate all entities of a given type.
+        
+        In incremental mode only entities added since the last recorded run
+        (above the type's high-water mark) are compared against the full set.
+        Runs that merge (not dry runs) record the new high-water mark. Pairs
+        whose LLM verification failed hold the mark below their newer entity,
+        so the next incremental run compares them again. Partly verified
+        clusters are settled by their verdicts: only sub-clusters verified as
+        duplicates throughout are merged.
+        
+        Statistics of the run are kept in self.run_stats[entity_type].
+        """
         print(f"\n{'='*60}")
         print(f"DEDUPLICATING {entity_type.upper()} ENTITIES")
         print(f"{'='*60}")
         
+        stats = self.run_stats[entity_type] = {
+            'entities': 0,
+            'new_entities': None,
+            'candidates': 0,
+            'pairs_checked': 0,
+            'verified': 0,
+            'merged': 0,
+            'unresolved': 0,
+            'llm_calls': 0,
+            'cache_hits': 0,
+            'phase_seconds': {'candidates': 0.0, 'verification': 0.0, 'merge': 0.0}
+        }
+        llm_calls_before, cache_hits_before = self.llm_calls, self.cache_hits
+        phase_start = time.time()
+        
         # Get total entity count
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -722,17 +1308,48 @@ Brief explanation (1 line).""")
             'application': 'applications'
         }
         table = table_map[entity_type]
-        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        total_entities = cursor.fetchone()[0]
-        conn.close()
+        cursor.execute(f"SELECT COUNT(*), MAX(id) FROM {table}")
+        total_entities, max_id = cursor.fetchone()
         
+        stats['entities'] = total_entities
         print(f"\nTotal {entity_type}s in database: {total_entities}")
         
+        # Entities added since the last run
+        new_ids = None
+        if incremental:
+            last_id = self.get_high_water_mark(entity_type)
+            if last_id is None:
+                print("   No previous deduplication recorded, comparing all entities")
+            else:
+                cursor.execute(f"SELECT id FROM {table} WHERE id > ?", (last_id,))
+                new_ids = {row['id'] for row in cursor.fetchall()}
+                stats['new_entities'] = len(new_ids)
+                print(f"   New {entity_type}s since last deduplication: {len(new_ids)}")
+        conn.close()
+        
+        if new_ids is not None and not new_ids:
+            print("\nNo new entities to deduplicate!")
+            return []
+        
+        # Pairs to compare again in the next run
+        unresolved = []
+        
+        def record_high_water_mark():
+            stats['unresolved'] = len(unresolved)
+            if dry_run or max_id is None:
+                return
+            mark = max_id
+            if unresolved:
+                # Incremental runs find a pair again while its newer entity is above the mark
+                mark = min(mark, min(max(id1, id2) for id1, id2, _ in unresolved) - 1)
+                print(f"\n⚠️  {len(unresolved)} pairs unresolved, high-water mark held at id {mark}")
+            self.set_high_water_mark(entity_type, mark)
+        
         # Find candidates
         print("\n1. Finding duplicate candidates...")
         
         # String-based candidates
-        string_candidates = self.find_string_duplicates(entity_type)
+        string_candidates = self.find_string_duplicates(entity_type, new_ids)
         print(f"   String-based candidates: {len(string_candidates)}")
         if string_candidates:
             string_scores = [s[2] for s in string_candidates]
@@ -745,7 +1362,7 @@ Brief explanation (1 line).""")
         embedding_candidates = []
         if use_embeddings:
             try:
-                embedding_candidates = self.find_embedding_duplicates(entity_type)
+                embedding_candidates = self.find_embedding_duplicates(entity_type, new_ids)
                 print(f"   Embedding-based candidates: {len(embedding_candidates)}")
                 if embedding_candidates:
                     emb_scores = [s[2] for s in embedding_candidates]
@@ -787,8 +1404,13 @@ Brief explanation (1 line).""")
         print(f"     - Found by both methods: {len(both_methods)}")
         print(f"   Total unique pairs: {len(sorted_candidates)}")
         
+        stats['candidates'] = len(sorted_candidates)
+        stats['phase_seconds']['candidates'] = round(time.time() - phase_start, 2)
+        phase_start = time.time()
+        
         if not sorted_candidates:
             print("\nNo duplicate candidates found!")
+            record_high_water_mark()
             return []
         
         verified_clusters = []  # Initialize at top level
@@ -809,33 +1431,31 @@ Brief explanation (1 line).""")
             print(f"\n3. Verifying clusters with LLM (parallel workers: {parallel_workers})...")
             
             total_pairs = sum(len(c['pairs']) for c in clusters)
+            stats['pairs_checked'] = total_pairs
             print(f"   Total pairs to verify: {total_pairs}")
             
             start_time = time.time()
             
+            # Contexts of every clustered entity, fetched once for all clusters
+            contexts = self.load_entity_contexts(
+                entity_type, [eid for cluster in clusters for eid in cluster['ids']]
+            )
+            
             for cluster_idx, cluster in enumerate(clusters):
                 print(f"\n   Cluster {cluster_idx + 1}/{len(clusters)} ({len(cluster['ids'])} entities):")
                 
                 # Show entities in cluster
-                conn = self.get_connection()
-                cursor = conn.cursor()
-                table = {'topic': 'topics', 'person': 'people', 'project': 'projects',
-                        'institution': 'institutions', 'method': 'methods', 
-                        'application': 'applications'}[entity_type]
-                
-                names = []
-                for eid in cluster['ids']:
-                    cursor.execute(f"SELECT name FROM {table} WHERE id = ?", (eid,))
-                    names.append(cursor.fetchone()['name'])
-                conn.close()
+                names = [contexts[eid]['name'] for eid in cluster['ids']]
                 
                 print(f"     Entities: {', '.join(names[:5])}")
                 if len(names) > 5:
                     print(f"     ... and {len(names) - 5} more")
                 
                 # Verify pairs in parallel
+                failed_pairs = []
                 verified_pairs = self.verify_duplicates_parallel(
-                    entity_type, cluster['pairs'], max_workers=parallel_workers
+                    entity_type, cluster['pairs'], max_workers=parallel_workers,
+                    batch_size=batch_size, contexts=contexts, failed_pairs=failed_pairs
                 )
                 
                 # Check if cluster is valid (all pairs verified as duplicates)
@@ -847,8 +1467,12 @@ Brief explanation (1 line).""")
                     print(f"     ✓ All {len(verified_pairs)} pairs verified as duplicates")
                 else:
                     print(f"     ⚠ Only {len(verified_pairs)}/{len(cluster['pairs'])} pairs verified")
-                    # Handle partial clusters - break them up
-                    # This is a more complex case we can implement later
+                    # Pairs whose verification failed are compared again next run
+                    unresolved.extend(failed_pairs)
+                    # Partial cluster: merge the parts that are duplicates by every verdict
+                    for part in self.split_partial_cluster(cluster, verified_pairs):
+                        verified_clusters.append(part)
+                        print(f"     ✓ Sub-cluster of {len(part['cluster_ids'])} entities verified as duplicates")
             
             elapsed = time.time() - start_time
             print(f"\n   Verification completed in {elapsed:.1f} seconds")
@@ -864,6 +1488,12 @@ Brief explanation (1 line).""")
             
             verified_duplicates = []
             processed = 0
+            stats['pairs_checked'] = len(sorted_candidates)
+            
+            contexts = self.load_entity_contexts(
+                entity_type, [eid for id1, id2, _ in sorted_candidates for eid in (id1, id2)]
+            )
+            categories_section = self.get_categories_section(entity_type)
             
             for i in range(0, len(sorted_candidates), batch_size):
                 batch = sorted_candidates[i:i+batch_size]
@@ -874,12 +1504,13 @@ Brief explanation (1 line).""")
                     print(f"   [{processed}/{len(sorted_candidates)}] Checking pair (score: {score:.3f})...", end='')
                     
                     try:
-                        result = self.verify_duplicate(entity_type, id1, id2)
+                        entity1 = contexts[id1]
+                        entity2 = contexts[id2]
+                        result = self.verify_duplicate(entity_type, id1, id2, entity1, entity2,
+                                                       categories_section)
                         
                         if result.are_same:
                             # Determine keeper (prefer one with more relationships or canonical name)
-                            entity1 = self.get_entity_context(entity_type, id1)
-                            entity2 = self.get_entity_context(entity_type, id2)
                             
                             if result.canonical_name:
                                 # Use LLM's suggestion
@@ -906,9 +1537,16 @@ Brief explanation (1 line).""")
                             
                     except Exception as e:
                         print(f" ERROR: {e}")
+                        unresolved.append((id1, id2, score))
         
         print(f"\n3. Found {len(verified_duplicates)} verified duplicates")
         
+        stats['verified'] = len(verified_duplicates)
+        stats['llm_calls'] = self.llm_calls - llm_calls_before
+        stats['cache_hits'] = self.cache_hits - cache_hits_before
+        stats['phase_seconds']['verification'] = round(time.time() - phase_start, 2)
+        phase_start = time.time()
+        
         # Calculate statistics
         if sorted_candidates:
             detection_rate = len(verified_duplicates) / len(sorted_candidates) * 100
@@ -925,11 +1563,17 @@ Brief explanation (1 line).""")
             merge_results = []
             total_merged = 0
             
+            # Canonical entities for all clusters from one bulk lookup
+            keepers = self.choose_canonical_entities(
+                entity_type, [cluster['cluster_ids'] for cluster in verified_clusters]
+            )
+            
             for cluster_idx, cluster in enumerate(verified_clusters):
                 cluster_result = self.merge_cluster(
                     entity_type,
                     cluster['cluster_ids'],
-                    dry_run=dry_run
+                    dry_run=dry_run,
+                    keeper=keepers[cluster_idx]
                 )
                 merge_results.append(cluster_result)
                 
@@ -962,6 +1606,10 @@ Brief explanation (1 line).""")
                 print(f"     Remove: {result['duplicate']['name']} (id:{result['duplicate']['id']})")
                 print(f"     Actions: {', '.join(result['actions'])}")
         
+        if not dry_run:
+            stats['merged'] = len(verified_duplicates)
+        stats['phase_seconds']['merge'] = round(time.time() - phase_start, 2)
+        
         # Final statistics
         print(f"\n5. Summary for {entity_type}s:")
         print(f"   Original count: {total_entities}")
@@ -969,14 +1617,21 @@ Brief explanation (1 line).""")
         print(f"   Final count after dedup: {total_entities - len(verified_duplicates)}")
         print(f"   Reduction: {len(verified_duplicates) / total_entities * 100:.1f}%")
         
+        record_high_water_mark()
+        
         return verified_duplicates
     
     def deduplicate_all(self, dry_run: bool = True, use_clustering: bool = True, 
-                       parallel_workers: int = 5):
-        """Deduplicate all entity types."""
+                       parallel_workers: int = 5, batch_size: int = 10,
+                       incremental: bool = False) -> Dict:
+        """Deduplicate all entity types.
+        
+        Returns run statistics: per-type stats (see deduplicate_entity_type)
+        under 'entity_types', plus totals of pairs checked, duplicates merged,
+        LLM calls and cache hits, and seconds per phase.
+        """
         entity_types = ['topic', 'person', 'project', 'institution', 'method', 'application']
         
-        all_results = {}
         entity_stats = {}
         
         # Get initial counts
@@ -1005,9 +1660,10 @@ Brief explanation (1 line).""")
                 entity_type, 
                 dry_run=dry_run,
                 use_clustering=use_clustering,
-                parallel_workers=parallel_workers
+                parallel_workers=parallel_workers,
+                batch_size=batch_size,
+                incremental=incremental
             )
-            all_results[entity_type] = results
             entity_stats[entity_type]['duplicates'] = len(results)
         
         # Summary
@@ -1038,6 +1694,18 @@ Brief explanation (1 line).""")
         total_reduction = (total_duplicates / total_original * 100) if total_original > 0 else 0
         print(f"{'TOTAL':12s}  {total_original:8d}  {total_duplicates:10d}  {total_final:5d}  {total_reduction:6.1f}%")
         
+        if self.cache_hits:
+            print(f"\nLLM verdicts reused from cache: {self.cache_hits}")
+        
+        run_stats = {entity_type: self.run_stats[entity_type] for entity_type in entity_types}
+        summary = {'dry_run': dry_run, 'entity_types': run_stats}
+        for key in ['pairs_checked', 'verified', 'merged', 'unresolved', 'llm_calls', 'cache_hits']:
+            summary[key] = sum(stats[key] for stats in run_stats.values())
+        summary['phase_seconds'] = {
+            phase: round(sum(stats['phase_seconds'][phase] for stats in run_stats.values()), 2)
+            for phase in ['candidates', 'verification', 'merge']
+        }
+        
         if dry_run:
             print("\nThis was a DRY RUN. No changes were made.")
             print("Run with --merge to actually merge duplicates.")
@@ -1053,7 +1721,7 @@ Brief explanation (1 line).""")
                 json.dump(self.audit_log, f, indent=2)
             print(f"\nAudit log saved to: {log_file}")
         
-        return all_results
+        return summary
 
 
 def main():
@@ -1073,13 +1741,17 @@ def main():
     parser.add_argument('--no-embeddings', action='store_true',
                        help='Skip embedding-based duplicate detection')
     parser.add_argument('--batch-size', type=int, default=10,
-                       help='LLM verification batch size')
+                       help='Pairs per LLM verification request (1 = one request per pair)')
     parser.add_argument('--backup', action='store_true',
                        help='Create database backup before merging')
     parser.add_argument('--no-clustering', action='store_true',
                        help='Disable transitive clustering')
     parser.add_argument('--parallel-workers', type=int, default=5,
                        help='Number of parallel workers for LLM verification')
+    parser.add_argument('--no-verdict-cache', action='store_true',
+                       help='Re-verify every pair with the LLM instead of reusing cached verdicts')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Only compare entities added since the last merge run against the rest')
     
     args = parser.parse_args()
     
@@ -1092,10 +1764,15 @@ def main():
     if args.backup and args.merge:
         backup_path = db_path.with_suffix('.backup.db')
         print(f"Creating backup at: {backup_path}")
+        # Fold the write-ahead log into the main file so the copy is complete
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.close()
         shutil.copy2(db_path, backup_path)
     
     try:
-        deduplicator = EntityDeduplicator(str(db_path), args.threshold)
+        deduplicator = EntityDeduplicator(str(db_path), args.threshold,
+                                          use_verdict_cache=not args.no_verdict_cache)
         
         if args.entity_type:
             # Deduplicate single entity type
@@ -1105,14 +1782,17 @@ def main():
                 use_embeddings=not args.no_embeddings,
                 batch_size=args.batch_size,
                 use_clustering=not args.no_clustering,
-                parallel_workers=args.parallel_workers
+                parallel_workers=args.parallel_workers,
+                incremental=args.incremental
             )
         else:
             # Deduplicate all
             deduplicator.deduplicate_all(
                 dry_run=not args.merge,
                 use_clustering=not args.no_clustering,
-                parallel_workers=args.parallel_workers
+                parallel_workers=args.parallel_workers,
+                batch_size=args.batch_size,
+                incremental=args.incremental
             )
             
     except KeyboardInterrupt:
@@ -6,7 +6,6 @@ Uses semantic search across all entities with simple graph navigation.
 
 import os
 import sys
-import sqlite3
 from datetime import datetime
 from typing import List, Optional, Annotated, TypedDict, cast, Any
 from operator import add
@@ -33,6 +32,9 @@ sys.path.insert(0, str(mcp_path))
 
 # Profile content is now loaded from external files
 from RAG.semantic_search import SemanticSearchEngine
+from DB.utils.connection import read_connection
+from DB.utils.node_metrics import has_node_metrics
+from KG.path_query import MAX_HOPS, PathStep, get_relationship_graph, node_labels
 from agents.manuscript_agent import ManuscriptAgent
 # from client.mcp_client import SequentialThinkingClient  # Commented out until MCP client is fixed
 
@@ -119,15 +121,17 @@ def navigate_relationships(
         relationship_type: Optional - filter by specific relationship ('discusses', 'authored_by', etc.)
         limit: Maximum results
     
-    Returns connected entities with relationship details.
+    Returns connected entities with relationship details, most important
+    (highest PageRank) first when graph metrics have been computed.
     
     IMPORTANT PATTERNS:
     - Find author's papers: navigate_relationships("person", "person_3", mode="reverse", relationship_type="authored_by")
     - Find paper's institutions: navigate_relationships("document", "academic_1", mode="forward", relationship_type="affiliated_with")
-    - For author→institutions: Do person→papers(reverse authored_by), then papers→institutions(forward affiliated_with)
+    - For author→institutions: follow_relationship_path("person", "3", ["<authored_by", ">affiliated_with"])
+    - For how two entities are connected: find_paths("topic", "10", "person", "3")
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = read_connection(DB_PATH, row_factory=None)
         cursor = conn.cursor()
         
         # Normalize entity_id format for non-document entities
@@ -143,17 +147,24 @@ def navigate_relationships(
             if entity_id.isdigit():
                 entity_id = f"academic_{entity_id}"  # Default to academic, could be improved
         
+        # Precomputed centrality of the connected entity (node_metrics), when available
+        ranked = has_node_metrics(cursor)
+        other = "target" if mode == "forward" else "source"
+        importance = "m.pagerank" if ranked else "NULL"
+        metrics_join = (f"\n            LEFT JOIN node_metrics m ON m.node_type = r.{other}_type AND m.node_id = r.{other}_id"
+                        if ranked else "")
+        
         if mode == "forward":
-            query = """
-            SELECT r.target_type, r.target_id, r.relationship_type, r.confidence
-            FROM relationships r
+            query = f"""
+            SELECT r.target_type, r.target_id, r.relationship_type, r.confidence, {importance}
+            FROM relationships r{metrics_join}
             WHERE r.source_type = ? AND r.source_id = ?
             """
             params = [entity_type if entity_type != 'document' else 'document', entity_id]
         else:  # reverse
-            query = """
-            SELECT r.source_type, r.source_id, r.relationship_type, r.confidence
-            FROM relationships r
+            query = f"""
+            SELECT r.source_type, r.source_id, r.relationship_type, r.confidence, {importance}
+            FROM relationships r{metrics_join}
             WHERE r.target_type = ? AND r.target_id = ?
             """
             # For reverse queries, extract just the numeric ID for non-documents
@@ -167,7 +178,10 @@ def navigate_relationships(
             query += " AND r.relationship_type = ?"
             params.append(relationship_type)
         
-        query += " ORDER BY r.confidence DESC LIMIT ?"
+        if ranked:
+            query += " ORDER BY COALESCE(m.pagerank, 0) DESC, r.confidence DESC LIMIT ?"
+        else:
+            query += " ORDER BY r.confidence DESC LIMIT ?"
         params.append(str(limit))
         
         cursor.execute(query, params)
@@ -179,12 +193,14 @@ def navigate_relationships(
         output = [f"Relationships for {entity_type} {entity_id} ({mode}):"]
         
         for row in results:
+            other_type, other_id, rel_type, confidence, pagerank = row
+            details = f"confidence: {confidence:.2f}"
+            if pagerank is not None:
+                details += f", importance: {pagerank:.4g}"
             if mode == "forward":
-                target_type, target_id, rel_type, confidence = row
-                output.append(f"  → {rel_type} → {target_type}_{target_id} (confidence: {confidence:.2f})")
+                output.append(f"  → {rel_type} → {other_type}_{other_id} ({details})")
             else:
-                source_type, source_id, rel_type, confidence = row
-                output.append(f"  ← {rel_type} ← {source_type}_{source_id} (confidence: {confidence:.2f})")
+                output.append(f"  ← {rel_type} ← {other_type}_{other_id} ({details})")
         
         conn.close()
         return "\n".join(output)
@@ -193,6 +209,127 @@ def navigate_relationships(
         return f"Error navigating relationships: {str(e)}"
 
 
+def _relationship_key(entity_type: str, entity_id: str):
+    """Relationships table key for an entity id as the tools accept it"""
+    entity_id = str(entity_id)
+    if entity_type == 'document':
+        entity_id = entity_id.replace('document_', '')
+        if entity_id.isdigit():
+            entity_id = f"academic_{entity_id}"  # Default to academic, as in navigate_relationships
+        return ('document', entity_id)
+    # Entities are stored by numeric id ('person_3' -> '3')
+    return (entity_type, entity_id.rsplit('_', 1)[-1])
+
+
+def _describe_path(graph, path, labels) -> str:
+    """One line per path: node (label) → rel → node ..."""
+    parts = []
+    for node, arc in path:
+        key = graph.keys[node]
+        if arc >= 0:
+            rel_type, forward = graph.arc_description(arc)
+            parts.append(f"→ {rel_type} →" if forward else f"← {rel_type} ←")
+        name = f"{key[0]}_{key[1]}" if key[0] != 'document' else key[1]
+        label = labels.get(key)
+        parts.append(f"{name} ({label})" if label else name)
+    return " ".join(parts)
+
+
+@tool
+def find_paths(
+    from_type: str,
+    from_id: str,
+    to_type: str,
+    to_id: str,
+    max_hops: int = 4,
+    relationship_types: Optional[List[str]] = None,
+    limit: int = 5
+) -> str:
+    """
+    Find how two entities are connected: shortest relationship paths between them.
+    
+    Args:
+        from_type: Type of the first entity ('document', 'topic', 'person', 'method', 'institution', 'application', 'project')
+        from_id: ID of the first entity (e.g., 'academic_1', 'person_3', '10')
+        to_type: Type of the second entity
+        to_id: ID of the second entity
+        max_hops: Longest path to look for (at most 6)
+        relationship_types: Optional - only follow these relationships (['authored_by', 'discusses'])
+        limit: Maximum paths
+    
+    Returns the shortest paths in one call, relationships in either direction,
+    e.g. "Who connects topic X to person Y?" or "How is paper A related to paper B?".
+    """
+    try:
+        graph = get_relationship_graph(DB_PATH)
+        source = _relationship_key(from_type, from_id)
+        target = _relationship_key(to_type, to_id)
+        for key in (source, target):
+            if key not in graph.position:
+                return f"No relationships found for {key[0]} {key[1]}."
+        
+        paths = graph.shortest_paths(source, target, max_hops=min(max_hops, MAX_HOPS),
+                                     relationship_types=relationship_types, limit=limit)
+        if not paths:
+            return f"No path within {min(max_hops, MAX_HOPS)} hops between {from_type} {from_id} and {to_type} {to_id}."
+        
+        labels = node_labels(DB_PATH, [graph.keys[node] for path in paths for node, _ in path])
+        output = [f"Shortest paths ({len(paths[0]) - 1} hops) between {from_type} {from_id} and {to_type} {to_id}:"]
+        output.extend(f"  {_describe_path(graph, path, labels)}" for path in paths)
+        return "\n".join(output)
+        
+    except Exception as e:
+        return f"Error finding paths: {str(e)}"
+
+
+@tool
+def follow_relationship_path(
+    entity_type: str,
+    entity_id: str,
+    path: List[str],
+    limit: int = 20
+) -> str:
+    """
+    Follow a multi-hop relationship pattern from an entity in one call.
+    
+    Args:
+        entity_type: Type of the starting entity ('document', 'topic', 'person', 'method', 'institution', 'application', 'project')
+        entity_id: ID of the starting entity (e.g., 'academic_1', 'person_3', '10')
+        path: Steps as "[>|<]relationship[:entity_type]" - '>' follows relationships from the
+              current entity (forward), '<' into it (reverse), no prefix either way; '*' is any relationship
+        limit: Maximum results
+    
+    Returns the entities reached, those reached by the most paths first, with an example path.
+    
+    PATTERNS:
+    - Author's institutions: follow_relationship_path("person", "3", ["<authored_by", ">affiliated_with"])
+    - Co-authors: follow_relationship_path("person", "3", ["<authored_by", ">authored_by"])
+    - Methods used on a topic: follow_relationship_path("topic", "10", ["<discusses", ">uses_method"])
+    """
+    try:
+        if not path or len(path) > MAX_HOPS:
+            return f"Path must have between 1 and {MAX_HOPS} steps."
+        
+        graph = get_relationship_graph(DB_PATH)
+        start = _relationship_key(entity_type, entity_id)
+        if start not in graph.position:
+            return f"No relationships found for {entity_type} {entity_id}."
+        
+        steps = [PathStep.parse(step) for step in path]
+        results = graph.follow(start, steps, limit=limit)
+        if not results:
+            return f"Nothing reached from {entity_type} {entity_id} by {' '.join(map(repr, steps))}."
+        
+        labels = node_labels(DB_PATH, [graph.keys[node] for result in results for node, _ in result['example']])
+        output = [f"Reached from {entity_type} {entity_id} by {' '.join(map(repr, steps))}:"]
+        for result in results:
+            output.append(f"  {_describe_path(graph, result['example'], labels)} ({result['paths']} paths)")
+        return "\n".join(output)
+        
+    except Exception as e:
+        return f"Error following relationship path: {str(e)}"
+
+
 @tool
 def list_available_papers() -> str:
     """
@@ -242,7 +379,7 @@ def get_entity_details(entity_type: str, entity_id: str) -> str:
     Returns all attributes and content for the entity.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = read_connection(DB_PATH, row_factory=None)
         cursor = conn.cursor()
         
         # Map entity types to table names
@@ -488,7 +625,7 @@ class InteractiveCVAgent:
         print(f"🤖 Agent using model: {model_name}")
         
         # Define our minimal tools
-        self.tools = [semantic_search, navigate_relationships, get_entity_details, list_available_papers, consult_manuscript, sequential_reasoning]
+        self.tools = [semantic_search, navigate_relationships, find_paths, follow_relationship_path, get_entity_details, list_available_papers, consult_manuscript, sequential_reasoning]
         print(f"🔧 Using {len(self.tools)} embedding-first tools")
         
         # Bind tools to LLM
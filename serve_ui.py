@@ -4,15 +4,17 @@ Simple web server for the Interactive CV UI with integrated chat endpoint.
 """
 
 import os
-import json
-import sqlite3
+import threading
 from pathlib import Path
-from flask import Flask, render_template_string, jsonify, request, send_from_directory
+from flask import Flask, render_template_string, jsonify, request, send_file, send_from_directory
 from flask_cors import CORS
 from dotenv import load_dotenv
 
 # Import the interactive agent
 from interactive_agent import InteractiveCVAgent
+from DB.utils.connection import read_connection
+from KG.graph_index import GraphIndex
+from KG.graph_snapshot import fresh_snapshot
 
 # Load environment variables
 load_dotenv()
@@ -23,6 +25,20 @@ CORS(app)
 # Initialize the agent
 agent = None
 
+# Graph files in order of preference: pruned graph for the UI, then the main KG
+GRAPH_PATHS = (Path('web_ui/knowledge_graph.json'), Path('KG/knowledge_graph.json'))
+
+# Query limits for the graph API
+MAX_HOPS = 3
+MAX_PAGE_SIZE = 1000
+DEFAULT_NEIGHBOURHOOD_LIMIT = 500
+DEFAULT_CLUSTER_LIMIT = 500
+
+# In-memory graph index, rebuilt when the graph file changes
+graph_index = None
+graph_index_key = None
+graph_index_lock = threading.Lock()
+
 def get_agent():
     global agent
     if agent is None:
@@ -40,23 +56,144 @@ def favicon():
     """Return empty favicon to avoid 404 errors."""
     return '', 204
 
+def get_graph_path():
+    """First graph file that exists, or None"""
+    for kg_path in GRAPH_PATHS:
+        if kg_path.exists():
+            return kg_path
+    return None
+
+def get_graph_index():
+    """Return the graph index, loading the graph file once per change.
+    
+    A binary snapshot written with the graph is memory-mapped instead of
+    parsing the JSON.
+    """
+    global graph_index, graph_index_key
+    kg_path = get_graph_path()
+    if kg_path is None:
+        return GraphIndex({'nodes': [], 'links': []})
+    
+    source = fresh_snapshot(kg_path) or kg_path
+    stat = source.stat()
+    key = (str(source), stat.st_mtime_ns, stat.st_size)
+    with graph_index_lock:
+        if key != graph_index_key:
+            graph_index = GraphIndex.from_file(str(kg_path))
+            graph_index_key = key
+        return graph_index
+
+def list_arg(name):
+    """Comma-separated query parameter as a list (None when absent)"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return [item for item in value.split(',') if item]
+
+def int_arg(name, default, low, high):
+    """Integer query parameter clamped to [low, high]"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    return max(low, min(high, int(value)))
+
 @app.route('/knowledge_graph.json')
 def knowledge_graph():
     """Serve the knowledge graph data."""
-    # First check for pruned graph in web_ui folder
-    pruned_kg_path = Path('web_ui/knowledge_graph.json')
-    if pruned_kg_path.exists():
-        with open(pruned_kg_path, 'r') as f:
-            return jsonify(json.load(f))
-    
-    # Fall back to main KG
-    kg_path = Path('KG/knowledge_graph.json')
-    if kg_path.exists():
-        with open(kg_path, 'r') as f:
-            return jsonify(json.load(f))
-    else:
+    # Pruned graph in web_ui folder first, then the main KG
+    kg_path = get_graph_path()
+    if kg_path is None:
         # If KG doesn't exist, return empty graph
         return jsonify({"nodes": [], "links": []})
+    
+    # Files are served as written (no re-parsing); use the pre-compressed
+    # copy written by the graph export when the client accepts gzip
+    gz_path = kg_path.with_name(kg_path.name + '.gz')
+    if ('gzip' in request.headers.get('Accept-Encoding', '')
+            and gz_path.exists() and gz_path.stat().st_mtime >= kg_path.stat().st_mtime):
+        response = send_file(gz_path.resolve(), mimetype='application/json', conditional=True)
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
+    
+    return send_file(kg_path.resolve(), mimetype='application/json', conditional=True)
+
+@app.route('/api/graph/summary')
+def graph_summary():
+    """Node and relationship type counts of the knowledge graph."""
+    try:
+        return jsonify(get_graph_index().summary())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/graph/nodes')
+def graph_nodes():
+    """Paginated node list (?types=a,b&q=label&offset=0&limit=100)."""
+    try:
+        offset = int_arg('offset', 0, 0, 10 ** 9)
+        limit = int_arg('limit', 100, 1, MAX_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    
+    try:
+        return jsonify(get_graph_index().node_page(offset, limit, list_arg('types'), request.args.get('q')))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/graph/subgraph')
+def graph_subgraph():
+    """Nodes of some types and the links of some types between them (?types=&relationships=&limit=)."""
+    try:
+        limit = int_arg('limit', None, 1, 10 ** 9)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    
+    try:
+        return jsonify(get_graph_index().subgraph(list_arg('types'), list_arg('relationships'), limit))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/graph/neighbourhood/<path:node_id>')
+def graph_neighbourhood(node_id):
+    """k-hop neighbourhood of a node (?hops=1&types=&relationships=&limit=)."""
+    try:
+        hops = int_arg('hops', 1, 0, MAX_HOPS)
+        limit = int_arg('limit', DEFAULT_NEIGHBOURHOOD_LIMIT, 1, 10 ** 9)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    
+    try:
+        return jsonify(get_graph_index().neighbourhood(
+            node_id, hops, list_arg('types'), list_arg('relationships'), limit))
+    except KeyError:
+        return jsonify({'error': f'Unknown node: {node_id}'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/graph/clusters')
+def graph_clusters():
+    """Cluster super-nodes and their weighted links (graphs exported with communities)."""
+    try:
+        return jsonify(get_graph_index().cluster_summary())
+    except KeyError:
+        return jsonify({'error': 'Graph was exported without communities'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/graph/clusters/<path:cluster_id>')
+def graph_cluster(cluster_id):
+    """Members of one cluster and their links (?limit=)."""
+    try:
+        limit = int_arg('limit', DEFAULT_CLUSTER_LIMIT, 1, 10 ** 9)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {e}'}), 400
+    
+    try:
+        return jsonify(get_graph_index().expand_cluster(cluster_id, limit))
+    except KeyError:
+        return jsonify({'error': f'Unknown cluster: {cluster_id}'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
@@ -93,7 +230,7 @@ def chat():
 def stats():
     """Get database statistics."""
     try:
-        conn = sqlite3.connect('DB/metadata.db')
+        conn = read_connection('DB/metadata.db', row_factory=None)
         cursor = conn.cursor()
         
         # Get counts
@@ -135,6 +272,7 @@ if __name__ == '__main__':
     print("  - Main UI: http://localhost:8888")
     print("  - Chat API: http://localhost:8888/api/chat")
     print("  - Stats API: http://localhost:8888/api/stats")
+    print("  - Graph API: http://localhost:8888/api/graph/{summary,nodes,subgraph,neighbourhood/<id>}")
     print("\nPress Ctrl+C to stop the server\n")
     
     app.run(host='0.0.0.0', port=8888, debug=True)
\ No newline at end of file